@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Artifact persistence benchmark.
+
+Measures dump/load time and size on disk of the engine artifacts for each
+compression codec supported by the artifact serializers.
+
+Usage:
+
+    # artifacts of an engine already trained (e.g. after a dryrun)
+    python benchmarks/artifacts_codecs.py $MARVIN_DATA_PATH/.artifacts/sms_spam
+
+    # synthetic artifacts shaped like the public engines ones
+    python benchmarks/artifacts_codecs.py
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+from marvin_python_daemon.engine_base.serializers import default_registry
+
+CODECS = [
+    # (serializer, compression, level, protocol)
+    ('joblib', 'zlib', 3, 2),  # current default
+    ('joblib', 'none', 0, 4),
+    ('joblib', 'zlib', 1, 4),
+    ('joblib', 'lz4', 3, 4),
+    ('joblib', 'zstd', 1, 4),
+    ('joblib', 'zstd', 3, 4),
+    ('auto', 'none', 0, 4),
+]
+
+
+def synthetic_artifacts():
+    from scipy import sparse
+    import pandas as pd
+
+    random = np.random.RandomState(0)
+    artifacts = {}
+
+    # mnist-keras-engine tpreparator: float32 images scaled to [0, 1]
+    artifacts['mnist_dataset'] = {
+        'X_train': (random.randint(0, 256, size=(20000, 1, 28, 28)) *
+                    (random.rand(20000, 1, 28, 28) > 0.8) / 255.).astype('float32'),
+        'y_train': np.eye(10, dtype='float32')[random.randint(0, 10, 20000)]
+    }
+
+    # sms-spam-engine tpreparator: CountVectorizer output
+    artifacts['sms_spam_dataset'] = {
+        'X_train': sparse.random(4000, 7000, density=0.002, format='csr', random_state=0),
+        'X_test': sparse.random(1500, 7000, density=0.002, format='csr', random_state=1),
+        'y_train': random.randint(0, 2, 4000),
+        'y_test': random.randint(0, 2, 1500)
+    }
+
+    # kaggle-titanic-engine acquisitor: tabular initial dataset
+    artifacts['titanic_initialdataset'] = pd.DataFrame({
+        'Age': random.rand(100000) * 80,
+        'Fare': random.rand(100000) * 500,
+        'Pclass': random.randint(1, 4, 100000),
+        'Sex': random.choice(['male', 'female'], 100000),
+        'Survived': random.randint(0, 2, 100000)
+    })
+
+    return artifacts
+
+
+def load_artifacts(artifacts_dir):
+    artifacts = {}
+    for name in sorted(os.listdir(artifacts_dir)):
+        path = os.path.join(artifacts_dir, name)
+        if os.path.isfile(path) and not name.endswith('.manifest') and name != 'metrics':
+            artifacts[name] = default_registry.load(path)
+    return artifacts
+
+
+def benchmark(artifacts, repeat=3):
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, 'artifact')
+
+    print("{:<24} {:<8} {:<6} {:>5} {:>8} {:>10} {:>10} {:>12}".format(
+        'artifact', 'format', 'codec', 'level', 'protocol', 'dump (s)', 'load (s)', 'size (MB)'))
+
+    try:
+        for name, obj in artifacts.items():
+            for serializer, compression, level, protocol in CODECS:
+                try:
+                    dump_time, load_time = [], []
+                    for _ in range(repeat):
+                        start = time.time()
+                        default_registry.dump(obj, path, serializer=serializer, compression=compression,
+                                              compression_level=level, protocol=protocol)
+                        dump_time.append(time.time() - start)
+
+                        start = time.time()
+                        default_registry.load(path)
+                        load_time.append(time.time() - start)
+
+                except (ImportError, ValueError) as e:
+                    print("{:<24} {:<8} {:<6} skipped: {}".format(name, serializer, compression, e))
+                    continue
+
+                print("{:<24} {:<8} {:<6} {:>5} {:>8} {:>10.3f} {:>10.3f} {:>12.2f}".format(
+                    name, serializer, compression, level, protocol, min(dump_time), min(load_time),
+                    os.path.getsize(path) / 1024. / 1024.))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        benchmark(load_artifacts(sys.argv[1]))
+    else:
+        benchmark(synthetic_artifacts())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JSON codec microbenchmark.
+
+Measures the decode of the request messages and the encode of the responses
+of the public engines predictors with each json backend available, against
+the previous stdlib json with a `default=` callback.
+
+Usage:
+
+    python benchmarks/json_codecs.py
+"""
+
+import json
+import timeit
+
+import numpy as np
+
+from marvin_python_daemon.common import json_codec
+from marvin_python_daemon.common.utils import _to_json_default
+
+
+def payloads():
+    random = np.random.RandomState(0)
+
+    return {
+        # kaggle-titanic-engine: a passenger in, a numpy label out
+        'titanic': ({"Age": 22, "Pclass": 3, "Sex": 0, "Fare": 7.25}, {"prediction": np.int64(1)}),
+        # sms-spam-engine: a message in, a label and its probabilities out
+        'sms_spam': ({"msg": "Free entry in 2 a wkly comp to win FA Cup final tkts 21st May 2005"},
+                     {"label": "spam", "proba": random.rand(2)}),
+        # mnist-keras-engine: pixels in, class probabilities out
+        'mnist': ({"pixels": random.randint(0, 256, 784).tolist()}, random.rand(1, 10).astype('float32')),
+    }
+
+
+def stdlib_dumps(obj):
+    # the serving path before the codec layer
+    return json.dumps(obj, default=lambda o: o.tolist() if hasattr(o, 'tolist') else _to_json_default(o))
+
+
+def benchmark(number=20000):
+    print("{:<10} {:<8} {:>14} {:>14}".format('payload', 'codec', 'loads (us)', 'dumps (us)'))
+
+    for name, (message, response) in payloads().items():
+        encoded = json.dumps(message)
+
+        print("{:<10} {:<8} {:>14.2f} {:>14.2f}".format(
+            name, 'previous',
+            timeit.timeit(lambda: json.loads(encoded), number=number) / number * 1e6,
+            timeit.timeit(lambda: stdlib_dumps(response), number=number) / number * 1e6))
+
+        for backend in json_codec.BACKENDS:
+            try:
+                json_codec.set_backend(backend)
+            except ImportError:
+                print("{:<10} {:<8} skipped: not installed".format(name, backend))
+                continue
+
+            print("{:<10} {:<8} {:>14.2f} {:>14.2f}".format(
+                name, backend,
+                timeit.timeit(lambda: json_codec.loads(encoded), number=number) / number * 1e6,
+                timeit.timeit(lambda: json_codec.dumps(response), number=number) / number * 1e6))
+
+    json_codec.set_backend()
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JSON Codec Module.
+
+JSON encoding and decoding on the serving path. The fastest available
+backend is used, orjson, then ujson, then the standard library json, or the
+one set in the MARVIN_JSON_CODEC environment variable. NumPy arrays and
+scalars are serialized natively by orjson and converted by the other
+backends. All the backends produce compact JSON (no spaces).
+Outside the serving path utils.to_json and utils.from_json are used.
+"""
+
+import os
+import json
+
+__all__ = ['dumps', 'loads', 'get_backend', 'set_backend', 'BACKENDS']
+
+BACKENDS = ('orjson', 'ujson', 'json')
+
+
+def _numpy_default(obj):
+    # arrays not handled natively (e.g. non contiguous or object dtype) and numpy scalars
+    if hasattr(obj, 'tolist') and hasattr(obj, 'dtype'):
+        return obj.tolist()
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError('{obj} is not JSON serializable'.format(obj=repr(obj)))
+
+
+def _chain_default(default):
+    if default is None:
+        return _numpy_default
+
+    def chained(obj):
+        try:
+            return _numpy_default(obj)
+        except TypeError:
+            return default(obj)
+
+    return chained
+
+
+class _StdlibCodec(object):
+    name = 'json'
+
+    def dumps(self, obj, default=None):
+        return json.dumps(obj, default=_chain_default(default), separators=(',', ':'), ensure_ascii=False)
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class _UjsonCodec(_StdlibCodec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, obj, default=None):
+        try:
+            return self._ujson.dumps(obj, default=_chain_default(default), ensure_ascii=False)
+        except (TypeError, OverflowError):
+            return super(_UjsonCodec, self).dumps(obj, default=default)
+
+    def loads(self, data):
+        try:
+            return self._ujson.loads(data)
+        except ValueError:
+            # ujson rejects some inputs the standard library accepts (e.g. NaN)
+            return json.loads(data)
+
+
+class _OrjsonCodec(_StdlibCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, default=None):
+        try:
+            return self._orjson.dumps(obj, default=_chain_default(default), option=self._options).decode('utf-8')
+        except TypeError:
+            # e.g. integers over 64 bits
+            return super(_OrjsonCodec, self).dumps(obj, default=default)
+
+    def loads(self, data):
+        try:
+            return self._orjson.loads(data)
+        except ValueError:
+            return json.loads(data)
+
+
+_CODECS = {'orjson': _OrjsonCodec, 'ujson': _UjsonCodec, 'json': _StdlibCodec}
+
+_codec = None
+
+
+def set_backend(name=None):
+    """Selects the backend by name, or the fastest one available when None."""
+    global _codec
+
+    if name:
+        if name not in _CODECS:
+            raise ValueError('Unknown json codec {}, options are {}'.format(name, ", ".join(BACKENDS)))
+        _codec = _CODECS[name]()
+        return _codec.name
+
+    for backend in BACKENDS:
+        try:
+            _codec = _CODECS[backend]()
+            return _codec.name
+        except ImportError:
+            continue
+
+
+def get_backend():
+    return _codec.name
+
+
+def dumps(obj, default=None):
+    """Serializes obj to a JSON str, `default` converts the objects not supported."""
+    return _codec.dumps(obj, default=default)
+
+
+def loads(data):
+    """Deserializes a JSON str or bytes."""
+    return _codec.loads(data)
+
+
+set_backend(os.environ.get('MARVIN_JSON_CODEC'))
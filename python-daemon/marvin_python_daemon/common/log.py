@@ -22,11 +22,26 @@ This module is responsible to manage log messages and log file.
 
 import os
 import os.path
+import atexit
+import random
 import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
 
 DEFAULT_LOG_LEVEL = logging.INFO
 DEFAULT_LOG_DIR = os.environ['MARVIN_LOG']
 
+# hot path logging state, see configure_hot_path_logging
+_sample_rate = 1.0
+# per request, also for the tasks of the asyncio servers sharing a thread
+_sampled = contextvars.ContextVar('marvin_log_sampled', default=None)
+_queue_handlers = {}
+_queue_listeners = {}
+_queue_lock = threading.Lock()
+
 
 class Logger(logging.getLoggerClass()):
     """Custom logger class.
@@ -46,18 +61,38 @@ class Logger(logging.getLoggerClass()):
 logging.setLoggerClass(Logger)
 
 
-def get_logger(name, namespace='marvin_ai',
-               log_level=DEFAULT_LOG_LEVEL, log_dir=DEFAULT_LOG_DIR):
-    """Build a logger that outputs to a file and to the console,"""
+class RequestSamplingFilter(logging.Filter):
+    """Drops the records below WARNING of the requests not sampled."""
 
-    log_level = (os.getenv('{}_LOG_LEVEL'.format(namespace.upper())) or
-                 os.getenv('LOG_LEVEL', log_level))
-    log_dir = (os.getenv('{}_LOG_DIR'.format(namespace.upper())) or
-               os.getenv('LOG_DIR', log_dir))
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or _sampled.get() is not False
 
-    logger = logging.getLogger('{}.{}'.format(namespace, name))
-    logger.setLevel(log_level)
 
+_sampling_filter = RequestSamplingFilter()
+
+
+@contextmanager
+def sampled_request(sample_rate=None):
+    """Decides once per request if its logs are kept, nested calls keep the decision.
+
+    Usage:
+
+        with sampled_request():
+            logger.info("Received message %s", message)
+    """
+    sampled = _sampled.get()
+    if sampled is None:
+        sample_rate = _sample_rate if sample_rate is None else sample_rate
+        sampled = sample_rate >= 1 or random.random() < sample_rate
+
+    token = _sampled.set(sampled)
+    try:
+        yield sampled
+    finally:
+        _sampled.reset(token)
+
+
+def _build_handlers(namespace, log_level, log_dir):
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
@@ -65,7 +100,7 @@ def get_logger(name, namespace='marvin_ai',
     console_handler = logging.StreamHandler()
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
 
     try:
         log_path = os.path.abspath(log_dir)
@@ -81,9 +116,105 @@ def get_logger(name, namespace='marvin_ai',
         file_handler = logging.FileHandler(file_path)
         file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except OSError as e:
-        logger.error('Could not create log file {file}: {error}'.format(
+        logging.getLogger(namespace).error('Could not create log file {file}: {error}'.format(
             file=file_path, error=e.strerror))
 
+    return handlers
+
+
+def get_logger(name, namespace='marvin_ai',
+               log_level=DEFAULT_LOG_LEVEL, log_dir=DEFAULT_LOG_DIR):
+    """Build a logger that outputs to a file and to the console,"""
+
+    log_level = (os.getenv('{}_LOG_LEVEL'.format(namespace.upper())) or
+                 os.getenv('LOG_LEVEL', log_level))
+    log_dir = (os.getenv('{}_LOG_DIR'.format(namespace.upper())) or
+               os.getenv('LOG_DIR', log_dir))
+
+    logger = logging.getLogger('{}.{}'.format(namespace, name))
+    logger.setLevel(log_level)
+    logger.addFilter(_sampling_filter)
+
+    if namespace in _queue_handlers:
+        logger.addHandler(_queue_handlers[namespace])
+    else:
+        for handler in _build_handlers(namespace, log_level, log_dir):
+            logger.addHandler(handler)
+
     return logger
+
+
+def _start_queue_listener(namespace, log_level, log_dir):
+    with _queue_lock:
+        if namespace in _queue_handlers:
+            return
+
+        log_queue = Queue(-1)
+        listener = QueueListener(log_queue, *_build_handlers(namespace, log_level, log_dir),
+                                 respect_handler_level=True)
+        listener.start()
+
+        queue_handler = QueueHandler(log_queue)
+        _queue_handlers[namespace] = queue_handler
+        _queue_listeners[namespace] = listener
+
+        prefix = '{}.'.format(namespace)
+        for logger_name, logger in list(logging.root.manager.loggerDict.items()):
+            if logger_name.startswith(prefix) and isinstance(logger, logging.Logger):
+                for handler in list(logger.handlers):
+                    logger.removeHandler(handler)
+                    handler.close()
+                logger.addHandler(queue_handler)
+
+
+def stop_queue_listeners():
+    """Writes the records still queued and stops the listener threads."""
+    with _queue_lock:
+        for namespace in list(_queue_listeners):
+            _queue_listeners.pop(namespace).stop()
+
+
+# the records still queued are written before the process exits
+atexit.register(stop_queue_listeners)
+
+
+def restart_queue_listeners():
+    """Replaces the listener threads and queues inherited by a forked process."""
+    # the listener threads, and maybe the locks of their queues, are not usable in a forked process
+    global _queue_lock
+    _queue_lock = threading.Lock()
+
+    for namespace, listener in list(_queue_listeners.items()):
+        queue_handler = _queue_handlers[namespace]
+        queue_handler.queue = Queue(-1)
+        _queue_listeners[namespace] = QueueListener(queue_handler.queue, *listener.handlers,
+                                                    respect_handler_level=True)
+        _queue_listeners[namespace].start()
+
+
+# python 3.6 has no fork hooks, the forking code calls restart_queue_listeners itself
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=restart_queue_listeners)
+
+
+def configure_hot_path_logging(sample_rate=None, use_queue=False, namespace='marvin_ai',
+                               log_level=DEFAULT_LOG_LEVEL, log_dir=DEFAULT_LOG_DIR):
+    """Low overhead logging for the serving path.
+
+    `sample_rate` is the fraction of the requests whose logs below WARNING
+    are kept. With `use_queue` the loggers of the namespace only enqueue
+    their records, the console and file writes are done by a listener thread.
+    """
+    global _sample_rate
+
+    if sample_rate is not None and sample_rate != '':
+        _sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+
+    if use_queue:
+        log_level = (os.getenv('{}_LOG_LEVEL'.format(namespace.upper())) or
+                     os.getenv('LOG_LEVEL', log_level))
+        log_dir = (os.getenv('{}_LOG_DIR'.format(namespace.upper())) or
+                   os.getenv('LOG_DIR', log_dir))
+        _start_queue_listener(namespace, log_level, log_dir)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Metrics Module.
+
+In process registry of counters, gauges and histograms.
+"""
+import sys
+import bisect
+import itertools
+import threading
+
+__all__ = ['Histogram', 'MetricsRegistry', 'metrics_registry', 'estimate_size']
+
+# seconds, from 1ms to 1min
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float('inf'))
+
+
+class Histogram(object):
+    """Bucketed histogram, quantiles are estimated by the bucket upper bound."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        accumulated = 0
+        for bucket, count in zip(self.buckets, self.counts):
+            accumulated += count
+            if accumulated >= rank:
+                return min(bucket, self.max)
+
+        return self.max
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99)
+        }
+
+
+class MetricsRegistry(object):
+    """Thread safe registry of metrics identified by name and labels.
+
+    Usage:
+
+        registry.inc('requests', action='predictor')
+        registry.set('queue_depth', 3)
+        registry.observe('latency_seconds', 0.02, action='predictor')
+        registry.snapshot()
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        if not labels:
+            return name
+        return "{}{{{}}}".format(name, ",".join(
+            '{}="{}"'.format(key, value) for key, value in sorted(labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(buckets)
+            self._histograms[key].observe(value)
+
+    def get(self, name, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key in self._histograms:
+                return self._histograms[key].snapshot()
+            return self._counters.get(key, self._gauges.get(key))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'histograms': {key: histogram.snapshot() for key, histogram in self._histograms.items()}
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+metrics_registry = MetricsRegistry()
+
+
+def estimate_size(obj, _depth=0):
+    """Estimates the memory used by an object in bytes.
+
+    Numpy arrays, scipy sparse matrices and pandas objects report their own
+    buffers, containers and plain objects are walked a few levels deep.
+    """
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'columns'):
+        return int(obj.memory_usage(deep=True).sum())
+    if hasattr(obj, 'memory_usage') and hasattr(obj, 'index'):
+        return int(obj.memory_usage(deep=True))
+    if hasattr(obj, 'indptr') and hasattr(obj, 'indices'):
+        return int(obj.data.nbytes + obj.indices.nbytes + obj.indptr.nbytes)
+    if hasattr(obj, 'nbytes') and hasattr(obj, 'dtype'):
+        return int(obj.nbytes)
+
+    size = sys.getsizeof(obj)
+    if _depth >= 4:
+        return size
+
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key, _depth + 1) + estimate_size(value, _depth + 1)
+                    for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        # large containers are estimated from a sample of their items
+        sample = list(itertools.islice(obj, 1000))
+        if sample:
+            size += sum(estimate_size(item, _depth + 1) for item in sample) * len(obj) // len(sample)
+    elif hasattr(obj, 'loaded_keys'):
+        # lazy artifacts only account for the keys already loaded
+        size += sum(estimate_size(obj[key], _depth + 1) for key in obj.loaded_keys())
+    elif hasattr(obj, '__dict__'):
+        size += estimate_size(vars(obj), _depth + 1)
+
+    return size
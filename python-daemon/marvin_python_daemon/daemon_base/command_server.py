@@ -35,16 +35,23 @@ command_list = ['DRYRUN', 'TEST', 'TDD',
 
 def call_dryrun(config, parameters):
     profiling = strtobool(parameters['profiling'])
+    memoize = strtobool(parameters['memoize']) if parameters['memoize'] else False
 
-    dryrun(config, parameters['action'], bool(profiling))
+    dryrun(config, parameters['action'], bool(profiling), bool(memoize))
 
 
 def call_grpc(config, parameters):
+    aio = strtobool(parameters['aio']) if parameters['aio'] else False
     max_workers = int(parameters['max_workers']) if parameters['max_workers'] else multiprocessing.cpu_count()
-    max_rpc_workers = int(parameters['max_rpc_workers']) if parameters['max_rpc_workers'] else multiprocessing.cpu_count()
+    # the asyncio server does not bound the concurrent rpcs unless asked to
+    max_rpc_workers = int(parameters['max_rpc_workers']) if parameters['max_rpc_workers'] else (
+        None if aio else multiprocessing.cpu_count())
+    memoize = strtobool(parameters['memoize']) if parameters['memoize'] else False
+    # worker processes per action, sharing its port
+    processes = int(parameters['processes']) if parameters['processes'] else None
 
     return engine_server(config, parameters['action'], max_workers,
-                        max_rpc_workers)
+                        max_rpc_workers, bool(memoize), bool(aio), processes)
 
 
 def call_notebook(config, parameters):
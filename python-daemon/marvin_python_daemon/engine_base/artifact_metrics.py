@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Artifact I/O instrumentation.
+
+Every artifact dump and load records into the metrics registry:
+
+    artifact_{dump,load}_seconds        total time
+    artifact_{dump,load}_io_seconds     time reading or writing the file
+    artifact_{dump,load}_codec_seconds  time (de)serializing and (de)compressing
+    artifact_bytes_on_disk
+    artifact_memory_bytes               estimated size of the object in memory,
+                                        only with the measureMemory artifact option
+
+and the last measures of each artifact in `.artifacts_report.json`, in the
+engine artifacts directory. The measures are kept in memory and the report is
+written by `flush_report`, once per phase of the engine (and at exit).
+"""
+
+import os
+import json
+import time
+import uuid
+import atexit
+import threading
+
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry, estimate_size
+from .serializers.registry import io_timer
+
+__all__ = ['measure_artifact_io', 'flush_report', 'read_report', 'REPORT_FILE']
+
+logger = get_logger('artifact_metrics')
+
+REPORT_FILE = '.artifacts_report.json'
+
+_report_lock = threading.Lock()
+# {directory: {name: entry}} measures not written yet
+_pending_reports = {}
+
+
+def _size_on_disk(object_file_path):
+    if os.path.isfile(object_file_path):
+        return os.path.getsize(object_file_path)
+
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(object_file_path, followlinks=True) for name in names)
+
+
+def read_report(directory):
+    report_file_path = os.path.join(directory, REPORT_FILE)
+    if not os.path.exists(report_file_path):
+        return {}
+
+    with open(report_file_path, 'r') as f:
+        return json.loads(f.read())
+
+
+def _update_report(directory, name, operation, measures):
+    with _report_lock:
+        entry = _pending_reports.setdefault(directory, {}).setdefault(name, {})
+        entry['bytesOnDisk'] = measures.pop('bytesOnDisk')
+        memory_bytes = measures.pop('memoryBytes')
+        if memory_bytes is not None:
+            entry['memoryBytes'] = memory_bytes
+        entry[operation] = measures
+
+
+def flush_report(directory=None):
+    """Writes the measures recorded since the last flush into the reports."""
+    with _report_lock:
+        directories = [directory] if directory is not None else list(_pending_reports)
+
+        for directory in directories:
+            entries = _pending_reports.pop(directory, None)
+            if not entries or not os.path.isdir(directory):
+                # e.g. the artifacts removed since
+                continue
+
+            try:
+                try:
+                    report = read_report(directory)
+                except ValueError:
+                    report = {}
+
+                for name, entry in entries.items():
+                    report.setdefault(name, {}).update(entry)
+
+                tmp_file_path = os.path.join(directory, "{}.{}".format(REPORT_FILE, uuid.uuid4().hex))
+                with open(tmp_file_path, 'w') as f:
+                    f.write(json.dumps(report, sort_keys=True, indent=4, separators=(',', ': ')))
+                os.replace(tmp_file_path, os.path.join(directory, REPORT_FILE))
+
+            except Exception as e:
+                # instrumentation never fails the engine
+                logger.warning("Could not write the artifacts report of {}: {}".format(directory, e))
+
+
+atexit.register(flush_report)
+
+
+def measure_artifact_io(operation, object_file_path, call, obj=None, measure_memory=False):
+    """Calls `call()`, the dump or load of the artifact, and records its measures.
+
+    Returns what `call` returns. With `measure_memory` the memory estimate,
+    which walks the whole object, is taken from `obj` on dumps and from the
+    loaded object on loads.
+    """
+    start_time = time.time()
+    with io_timer() as io_stats:
+        result = call()
+    seconds = time.time() - start_time
+
+    try:
+        name = os.path.basename(object_file_path)
+        obj = result if operation == 'load' else obj
+        # serializers overridden by the engine (e.g. keras) do not report their io
+        io_seconds = io_stats['seconds'] if io_stats['bytes'] else None
+
+        measures = {
+            'seconds': seconds,
+            'ioSeconds': io_seconds,
+            'codecSeconds': seconds - io_seconds if io_seconds is not None else None,
+            'bytesOnDisk': _size_on_disk(object_file_path),
+            'memoryBytes': estimate_size(obj) if measure_memory else None,
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+
+        metrics_registry.observe('artifact_{}_seconds'.format(operation), seconds, artifact=name)
+        if io_seconds is not None:
+            metrics_registry.observe('artifact_{}_io_seconds'.format(operation), io_seconds, artifact=name)
+            metrics_registry.observe('artifact_{}_codec_seconds'.format(operation), seconds - io_seconds,
+                                     artifact=name)
+        metrics_registry.set('artifact_bytes_on_disk', measures['bytesOnDisk'], artifact=name)
+        if measures['memoryBytes'] is not None:
+            metrics_registry.set('artifact_memory_bytes', measures['memoryBytes'], artifact=name)
+
+        logger.info("Artifact {} {} in {:.4f}s (io {}), {} bytes on disk, ~{} bytes in memory".format(
+            name, 'saved' if operation == 'dump' else 'loaded', seconds,
+            "{:.4f}s".format(io_seconds) if io_seconds is not None else "n/a",
+            measures['bytesOnDisk'], measures['memoryBytes'] if measure_memory else "n/a"))
+
+        _update_report(os.path.dirname(object_file_path), name, operation, measures)
+
+    except Exception as e:
+        # instrumentation never fails the artifact dump or load
+        logger.warning("Could not record the {} measures of {}: {}".format(operation, object_file_path, e))
+
+    return result
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Artifact residency manager.
+
+Keeps the artifacts loaded by all the actions of the process under a memory
+budget. Artifacts are tracked by file path, so an artifact shared by several
+actions (e.g. the model of ppreparator and predictor) is accounted once. When
+the budget is exceeded the least recently used artifacts are released from
+memory and loaded again from disk by `_load_obj` on their next access.
+
+Hits of an artifact already accounted only stamp it with the time of use,
+without taking the lock of the manager, and the artifacts are ordered by
+those stamps when evicting.
+"""
+
+import re
+import weakref
+import itertools
+import threading
+
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry, estimate_size
+
+__all__ = ['ArtifactResidencyManager', 'residency_manager', 'parse_size']
+
+logger = get_logger('artifact_residency')
+
+_SIZE_UNITS = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30, 't': 1 << 40}
+
+
+def parse_size(value):
+    """Parses sizes like 512, '800M' or '2GB' into bytes, None when empty."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, int):
+        return value
+
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$', str(value).lower())
+    if not match:
+        raise ValueError('Invalid size {}'.format(value))
+
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def _loaded_count(obj):
+    # lazy artifacts grow as their keys are loaded
+    loaded_keys = getattr(obj, 'loaded_keys', None)
+    return len(loaded_keys()) if callable(loaded_keys) else None
+
+
+class _Resident(object):
+    __slots__ = ('size', 'obj_id', 'loaded', 'last_used', 'holders')
+
+    def __init__(self):
+        self.size = 0
+        self.obj_id = None
+        self.loaded = None
+        self.last_used = 0
+        # (weakref to the action, object reference)
+        self.holders = set()
+
+
+class ArtifactResidencyManager(object):
+    """LRU accounting of the artifacts in memory.
+
+    Usage:
+
+        residency_manager.configure(budget_bytes=parse_size('2G'))
+        residency_manager.touch(action, '_model', model)
+    """
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = budget_bytes
+        self._lock = threading.RLock()
+        self._residents = {}
+        self._paths = weakref.WeakKeyDictionary()
+        # residents of each action by object reference, for the hits without the lock
+        self._held = weakref.WeakKeyDictionary()
+        self._loading = {}
+        self._clock = itertools.count(1)
+
+    @property
+    def enabled(self):
+        return self.budget_bytes is not None
+
+    @property
+    def resident_bytes(self):
+        with self._lock:
+            return sum(resident.size for resident in self._residents.values())
+
+    def configure(self, budget_bytes):
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            logger.info("Artifacts memory budget set to {} bytes".format(budget_bytes))
+            self._evict()
+
+    def _get_path(self, action, object_reference):
+        paths = self._paths.setdefault(action, {})
+        if object_reference not in paths:
+            paths[object_reference] = action._get_object_file_path(object_reference)
+        return paths[object_reference]
+
+    def loading_lock(self, action, object_reference):
+        """Lock of the loads of an artifact, the loads of other artifacts do not wait for it."""
+        with self._lock:
+            return self._loading.setdefault(self._get_path(action, object_reference), threading.Lock())
+
+    def touch(self, action, object_reference, obj):
+        """Marks the artifact as the most recently used one and evicts if over budget."""
+        if not self.enabled or obj is None:
+            return
+
+        loaded = _loaded_count(obj)
+        resident = self._held.get(action, {}).get(object_reference)
+        if resident is not None and resident.obj_id == id(obj) and resident.loaded == loaded:
+            resident.last_used = next(self._clock)
+            return
+
+        with self._lock:
+            object_file_path = self._get_path(action, object_reference)
+            resident = self._residents.get(object_file_path)
+            if resident is None:
+                resident = self._residents[object_file_path] = _Resident()
+            resident.last_used = next(self._clock)
+            resident.holders.add((weakref.ref(action), object_reference))
+            self._held.setdefault(action, {})[object_reference] = resident
+
+            # reloaded, or a lazy artifact with keys loaded or evicted since estimated
+            if resident.obj_id == id(obj) and resident.loaded == loaded:
+                return
+
+            resident.obj_id = id(obj)
+            resident.loaded = loaded
+            resident.size = estimate_size(obj)
+            logger.debug("Artifact {} resident with ~{} bytes".format(object_file_path, resident.size))
+
+            self._evict(keep=object_file_path)
+
+    def release(self, action, object_reference):
+        """Stops tracking an artifact the action released by itself."""
+        with self._lock:
+            object_file_path = self._paths.get(action, {}).get(object_reference)
+            self._held.get(action, {}).pop(object_reference, None)
+            resident = self._residents.get(object_file_path)
+            if resident is None:
+                return
+
+            resident.holders = set((ref, o_ref) for ref, o_ref in resident.holders
+                                   if ref() is not None and (ref() is not action or o_ref != object_reference))
+            if not resident.holders:
+                resident.obj_id = None
+                del self._residents[object_file_path]
+            self._update_metrics()
+
+    def _evict(self, keep=None):
+        if self.enabled:
+            # least recently used first
+            for object_file_path, _ in sorted(self._residents.items(), key=lambda item: item[1].last_used):
+                if self.resident_bytes <= self.budget_bytes:
+                    break
+                if object_file_path != keep:
+                    self._evict_resident(object_file_path)
+
+            if self.resident_bytes > self.budget_bytes:
+                logger.warning("Artifacts in use take ~{} bytes, over the {} bytes budget".format(
+                    self.resident_bytes, self.budget_bytes))
+
+        self._update_metrics()
+
+    def _evict_resident(self, object_file_path):
+        resident = self._residents.pop(object_file_path)
+        # the next touch of the artifact accounts it again
+        resident.obj_id = None
+
+        for action_ref, object_reference in resident.holders:
+            action = action_ref()
+            if action is not None:
+                action._evict_obj(object_reference)
+
+        metrics_registry.inc('artifact_evictions')
+        logger.info("Artifact {} evicted from memory, ~{} bytes released".format(object_file_path, resident.size))
+
+    def _update_metrics(self):
+        metrics_registry.set('artifact_resident_bytes', self.resident_bytes)
+        metrics_registry.set('artifact_resident_count', len(self._residents))
+
+    def reset(self):
+        with self._lock:
+            self.budget_bytes = None
+            self._residents.clear()
+            self._paths.clear()
+            self._held.clear()
+            self._loading.clear()
+
+
+# one per process, shared by all the actions it hosts
+residency_manager = ArtifactResidencyManager()
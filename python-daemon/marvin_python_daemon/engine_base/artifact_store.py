@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Content-addressed artifact store.
+
+Each serialized artifact is stored once under its content hash and the
+artifact path used by the engine (`{engine}/{name}`) is a symbolic link to
+the current version. Layout of the engine artifacts directory:
+
+    {name}                      -> .objects/{hash}/{name}
+    {name}.manifest             -> .objects/{hash}/{name}.manifest
+    .objects/{hash}/{name}
+    .index.json                 {name: {"current": 2, "versions": {"1": {"hash": ...}, ...}}}
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+
+import joblib
+
+from ..common.log import get_logger
+
+__all__ = ['ArtifactStore', 'artifact_hash']
+
+logger = get_logger('artifact_store')
+
+# the index is shared by all the actions of the same engine
+_index_locks = {}
+_index_locks_lock = threading.Lock()
+
+
+def _get_index_lock(index_file_path):
+    with _index_locks_lock:
+        return _index_locks.setdefault(index_file_path, threading.RLock())
+
+
+def _hash_path(path):
+    # artifacts may be saved as directories (e.g. keras saved models)
+    hasher = hashlib.sha256()
+    paths = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+
+    for file_path in paths:
+        hasher.update(os.path.relpath(file_path, path).encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def _remove(path):
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+def artifact_hash(object_file_path):
+    """Content hash of an artifact, taken from its store link when it has one."""
+    if os.path.islink(object_file_path):
+        target = os.readlink(object_file_path).split(os.sep)
+        if len(target) == 3 and target[0] == ArtifactStore.objects_dir:
+            return target[1]
+
+    return _hash_path(object_file_path)
+
+
+class ArtifactStore(object):
+    """Stores the versions of the artifacts of an engine.
+
+    Usage:
+
+        store = ArtifactStore(directory)
+        version = store.save('model', obj, dump=serializer_dump, options=options)
+        store.checkout('model', version - 1)
+    """
+
+    objects_dir = '.objects'
+    index_file = '.index.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.objects_path = os.path.join(directory, self.objects_dir)
+        self.index_file_path = os.path.join(directory, self.index_file)
+        self._lock = _get_index_lock(self.index_file_path)
+
+    def read_index(self):
+        if not os.path.exists(self.index_file_path):
+            return {}
+
+        with open(self.index_file_path, 'r') as f:
+            return json.load(f)
+
+    def _write_index(self, index):
+        tmp_file_path = "{}.{}".format(self.index_file_path, uuid.uuid4().hex)
+        with open(tmp_file_path, 'w') as f:
+            json.dump(index, f, sort_keys=True, indent=4, separators=(',', ': '))
+        os.replace(tmp_file_path, self.index_file_path)
+
+    def versions(self, name):
+        return self.read_index().get(name, {}).get('versions', {})
+
+    def current_version(self, name):
+        return self.read_index().get(name, {}).get('current')
+
+    @staticmethod
+    def content_hash(name, obj, options=None):
+        try:
+            # hashing the object is far cheaper than serializing and compressing it
+            obj_hash = joblib.hash(obj, hash_name='sha1')
+        except Exception as e:
+            logger.debug("Object {} can not be hashed ({}), hashing its file instead.".format(name, e))
+            return None
+
+        return hashlib.sha256(json.dumps(
+            [name, obj_hash, options or {}], sort_keys=True).encode('utf-8')).hexdigest()
+
+    def save(self, name, obj, dump, options=None, keep_versions=None):
+        """Stores the object as the current version of the artifact.
+
+        `dump(obj, path)` serializes the object and is only called when no
+        stored object has the same content. Returns the current version.
+        """
+        key = self.content_hash(name, obj, options)
+        tmp_path = None
+
+        if key is None or not os.path.exists(os.path.join(self.objects_path, key)):
+            tmp_path = self._dump(name, obj, dump)
+            if key is None:
+                key = hashlib.sha256(json.dumps(
+                    [name, _hash_path(os.path.join(tmp_path, name)), options or {}],
+                    sort_keys=True).encode('utf-8')).hexdigest()
+        else:
+            logger.info("Artifact {} unchanged, skipping serialization.".format(name))
+
+        try:
+            with self._lock:
+                object_path = os.path.join(self.objects_path, key)
+                if not os.path.exists(object_path):
+                    if tmp_path is None:
+                        # pruned after the hash compare
+                        tmp_path = self._dump(name, obj, dump)
+                    os.rename(tmp_path, object_path)
+
+                index = self.read_index()
+                entry = index.setdefault(name, {'current': None, 'versions': {}})
+                stored = [int(v) for v, info in entry['versions'].items() if info['hash'] == key]
+
+                if stored:
+                    # same content as a stored version, only the pointer moves
+                    if entry['current'] != max(stored):
+                        entry['current'] = max(stored)
+                        self._write_index(index)
+                else:
+                    version = max([int(v) for v in entry['versions']] or [0]) + 1
+                    entry['versions'][str(version)] = {
+                        'hash': key, 'createdAt': time.strftime('%Y-%m-%dT%H:%M:%S')}
+                    entry['current'] = version
+                    logger.info("Artifact {} version {} saved with hash {}.".format(name, version, key))
+
+                    if keep_versions:
+                        self._prune(index, name, keep_versions)
+
+                    self._write_index(index)
+
+                self._link(name, key)
+
+                return entry['current']
+        finally:
+            if tmp_path is not None:
+                _remove(tmp_path)
+
+    def _dump(self, name, obj, dump):
+        tmp_path = os.path.join(self.objects_path, '.tmp-{}'.format(uuid.uuid4().hex))
+        os.makedirs(tmp_path)
+
+        try:
+            dump(obj, os.path.join(tmp_path, name))
+        except Exception:
+            _remove(tmp_path)
+            raise
+
+        return tmp_path
+
+    def _version_hash(self, index, name, version):
+        try:
+            return index[name]['versions'][str(version)]['hash']
+        except KeyError:
+            raise ValueError('Unknown version {} of artifact {}'.format(version, name))
+
+    def version_path(self, name, version):
+        """Path of a stored version, readable without checking it out."""
+        return os.path.join(self.objects_path, self._version_hash(self.read_index(), name, version), name)
+
+    def checkout(self, name, version):
+        """Points the artifact path to a stored version, nothing is rewritten."""
+        with self._lock:
+            index = self.read_index()
+            key = self._version_hash(index, name, version)
+
+            self._link(name, key)
+            index[name]['current'] = int(version)
+            self._write_index(index)
+
+        logger.info("Artifact {} switched to version {}.".format(name, version))
+
+    def _link(self, name, key):
+        # the manifest first, as written by the serializers
+        for suffix in ('.manifest', ''):
+            target = os.path.join(self.objects_dir, key, name + suffix)
+            link = os.path.join(self.directory, name + suffix)
+
+            if not os.path.lexists(os.path.join(self.directory, target)):
+                _remove(link)
+                continue
+
+            # the new link replaces the old one atomically
+            tmp_link = "{}.{}".format(link, uuid.uuid4().hex)
+            os.symlink(target, tmp_link)
+            if os.path.isdir(link) and not os.path.islink(link):
+                shutil.rmtree(link)
+            os.replace(tmp_link, link)
+
+    def _prune(self, index, name, keep_versions):
+        entry = index[name]
+        versions = sorted(int(v) for v in entry['versions'])
+
+        for version in versions[:-keep_versions]:
+            if version != entry['current']:
+                del entry['versions'][str(version)]
+
+        referenced = set(v['hash'] for e in index.values() for v in e['versions'].values())
+        for key in os.listdir(self.objects_path):
+            if not key.startswith('.') and key not in referenced:
+                logger.info("Removing unreferenced artifact object {}.".format(key))
+                _remove(os.path.join(self.objects_path, key))
@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Asyncio gRPC server of the online actions.
+
+Alternative to the thread pool server, selected with the `aio` parameter of
+the GRPC daemon command. The RPCs are coroutines of a grpc.aio server running
+on its own event loop, so concurrent requests and streams do not hold a
+thread each. Pipeline steps defining `async def execute` run on the event
+loop, sync steps are offloaded to an executor with as many threads as the
+server workers.
+
+Requires python 3.7 and grpcio 1.32, the module is only imported when the
+asyncio server is selected.
+"""
+
+import time
+import asyncio
+import inspect
+import functools
+import threading
+import contextvars
+from functools import partial
+
+import grpc
+import grpc.aio
+
+from .stubs.actions_pb2 import OnlineActionResponse, OnlineBatchActionResponse, OnlineStreamResponse
+from .stubs import actions_pb2_grpc
+from .payloads import InvalidPayload, decode_payload
+from .rpc_pools import MeteredThreadPoolExecutor
+from .load_shedding import QueueTimeShedder, DeadlineExceeded, RequestShed, deadline_scope, check_deadline, get_deadline
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry
+from ..common import json_codec
+
+__all__ = ['AsyncOnlineActionServicer', 'AsyncOnlineServer']
+
+logger = get_logger('async_server')
+
+
+def _execute_rpc(method):
+    # the deadline of the rpc is checked between the steps, the requests queued too long are shed
+    @functools.wraps(method)
+    async def wrapper(self, request, context):
+        await self._admit(context)
+        with deadline_scope(context):
+            try:
+                return await method(self, request, context)
+            except DeadlineExceeded as e:
+                metrics_registry.inc('rpc_deadline_exceeded', action=self.action.action_name)
+                logger.warning("%s request abandoned: %s", self.action.action_name, e)
+                await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, str(e))
+            except RequestShed as e:
+                await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+            except InvalidPayload as e:
+                logger.warning("%s invalid request: %s", self.action.action_name, e)
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+            finally:
+                self.inflight -= 1
+
+    return wrapper
+
+
+class AsyncOnlineActionServicer(actions_pb2_grpc.OnlineActionHandlerServicer):
+    """Coroutine handlers of the RPCs of an online action."""
+
+    def __init__(self, action, executor, max_concurrent_rpcs=None):
+        self.action = action
+        self.executor = executor
+        self.is_async = action._is_async()
+        self.shedder = QueueTimeShedder(action._max_queue_ms, name=action.action_name)
+        # only the execute rpcs are limited, health checks and reloads are always served
+        self.max_concurrent_rpcs = max_concurrent_rpcs
+        self.inflight = 0
+
+    async def _admit(self, context):
+        # all the rpcs run on the event loop thread, no lock is needed
+        if self.max_concurrent_rpcs and self.inflight >= self.max_concurrent_rpcs:
+            metrics_registry.inc('rpc_rejected', pool='execute', action=self.action.action_name)
+            await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, 'Limit of {} concurrent rpcs reached'.format(
+                self.max_concurrent_rpcs))
+        self.inflight += 1
+
+    def _run(self, func, *args):
+        # blocking work runs off the event loop, bounded by the executor threads
+        return asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args))
+
+    def _run_request(self, func, *args):
+        # in the context of the request, shed when it waited too long for a thread
+        context = contextvars.copy_context()
+        submitted = time.time()
+
+        def run():
+            self.shedder.check(time.time() - submitted)
+            return context.run(func, *args)
+
+        return self._run(run)
+
+    def _get_params(self, request):
+        return json_codec.loads(request.params) if request.params else self.action._params
+
+    def _execute_limited(self, input_message, params, timings=None):
+        with self.action._limit_concurrency():
+            return self.action._execute_message(input_message, params, timings)
+
+    async def _execute_message(self, input_message, params, timings=None):
+        action = self.action
+
+        if not self.is_async:
+            if action._micro_batcher is not None:
+                return await asyncio.wrap_future(
+                    action._micro_batcher.submit(input_message, params, deadline=get_deadline()))
+            return await self._run_request(self._execute_limited, input_message, params, timings)
+
+        # the snapshot is pinned in the context of the request task
+        with action._pin_snapshot(action._snapshot):
+            for step, execute, _ in action._get_pipeline():
+                check_deadline(step)
+                logger.info("Start of the %s execute method!", step)
+                start = time.time()
+                if inspect.iscoroutinefunction(execute):
+                    input_message = await execute(input_message, params)
+                else:
+                    input_message = await self._run_request(execute, input_message, params)
+                action._observe_step(step, time.time() - start, timings)
+
+        if action._pending_saved_objects:
+            await self._run(action._flush_saved_objects)
+
+        return input_message
+
+    async def _execute_cached(self, input_message, params, timings=None):
+        key = self.action._get_cache_key(input_message, params)
+        hit, _message = self.action._get_cached(key)
+
+        if not hit:
+            _message = await self._execute_message(input_message, params, timings)
+            self.action._cache_result(key, _message)
+
+        return _message
+
+    @_execute_rpc
+    async def _remote_execute(self, request, context):
+        logger.debug("Received Params: %s", request.params)
+        logger.debug("Received Message: %s", request.message)
+
+        timings = [] if self.action._step_timings else None
+        _message = await self._execute_cached(
+            self.action._get_input_message(request), self._get_params(request), timings)
+        self.action._send_step_timings(context, timings)
+
+        return self.action._make_response(OnlineActionResponse, _message, binary=request.HasField('payload'))
+
+    @_execute_rpc
+    async def _remote_execute_batch(self, request, context):
+        if not self.is_async:
+            # the messages not cached are still executed as one batch
+            timings = [] if self.action._step_timings else None
+            response = await self._run_request(self.action._execute_batch_request, request, timings)
+            self.action._send_step_timings(context, timings)
+            return response
+
+        logger.info("Received batch of %d messages from client and sending to engine action...",
+                    len(request.payloads or request.messages))
+
+        if request.payloads:
+            input_messages = [decode_payload(payload) for payload in request.payloads]
+        else:
+            input_messages = [json_codec.loads(message) if message else None for message in request.messages]
+        params = self._get_params(request)
+
+        _messages = await asyncio.gather(*[self._execute_cached(input_message, params)
+                                           for input_message in input_messages])
+
+        return OnlineBatchActionResponse(
+            messages=[_message if type(_message) == str else json_codec.dumps(_message) for _message in _messages])
+
+    async def _remote_execute_stream(self, request_iterator, context):
+        await self._admit(context)
+        try:
+            async for response in self._execute_stream(request_iterator, context):
+                yield response
+        finally:
+            self.inflight -= 1
+
+    async def _execute_stream(self, request_iterator, context):
+        logger.info("Received stream from client, executing its messages as they arrive...")
+
+        slots = asyncio.Semaphore(self.action._get_stream_window())
+        responses = asyncio.Queue()
+        pending = set()
+
+        async def respond(request):
+            try:
+                _message = await self._execute_cached(self.action._get_input_message(request), self._get_params(request))
+                response = self.action._make_response(
+                    OnlineStreamResponse, _message, binary=request.HasField('payload'),
+                    correlation_id=request.correlation_id)
+            except Exception as e:
+                logger.error("Message %s of the stream failed: %s", request.correlation_id, e)
+                response = OnlineStreamResponse(correlation_id=request.correlation_id, error=str(e))
+
+            slots.release()
+            responses.put_nowait(response)
+
+        async def read():
+            try:
+                async for request in request_iterator:
+                    # the stream is not read further while the window is full
+                    await slots.acquire()
+                    task = asyncio.ensure_future(respond(request))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            except Exception as e:
+                logger.error("Stream closed by an error: {}".format(e))
+            finally:
+                if pending:
+                    await asyncio.wait(list(pending))
+                responses.put_nowait(None)
+
+        # the messages run with the deadline of the stream
+        with deadline_scope(context):
+            reader = asyncio.ensure_future(read())
+
+        count = 0
+        try:
+            while True:
+                response = await responses.get()
+                if response is None:
+                    break
+                count += 1
+                yield response
+        finally:
+            reader.cancel()
+
+        logger.info("Stream finished after {} messages!".format(count))
+
+    async def _remote_reload(self, request, context):
+        if request.artifacts and self.action._reload_disabled:
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, self.action._reload_disabled)
+
+        # on the reload pool of the action, never on the threads of the execute methods
+        return await asyncio.get_running_loop().run_in_executor(
+            self.action._get_rpc_pools()['_remote_reload'], partial(self.action._remote_reload, request, context))
+
+    async def _health_check(self, request, context):
+        return self.action._health_check(request, context)
+
+
+class AsyncOnlineServer(object):
+    """grpc.aio server of an online action, served by an event loop thread.
+
+    Has the start and stop methods of the thread pool server, so the daemon
+    manages both the same way.
+
+    Usage:
+
+        server = AsyncOnlineServer(action, port=8080, workers=8)
+        server.start()
+        ...
+        server.stop(0)
+    """
+
+    def __init__(self, action, port, workers, rpc_workers=None, options=None):
+        self.action = action
+        self.port = port
+        self.rpc_workers = rpc_workers
+        self.options = options
+        self.executor = MeteredThreadPoolExecutor(workers, 'execute', action=action.action_name)
+        self._loop = None
+        self._thread = None
+        self._stopping = None
+        self._grace = None
+        self._error = None
+
+    async def _serve(self, started):
+        server = grpc.aio.server(options=self.options)
+        actions_pb2_grpc.add_OnlineActionHandlerServicer_to_server(
+            AsyncOnlineActionServicer(self.action, self.executor, max_concurrent_rpcs=self.rpc_workers), server)
+        self.port = server.add_insecure_port('[::]:{}'.format(self.port))
+        self._stopping = asyncio.Event()
+
+        await server.start()
+        started.set()
+
+        # the server is stopped by the loop that started it
+        await self._stopping.wait()
+        await server.stop(self._grace)
+
+    def start(self):
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._serve(started))
+            except Exception as e:
+                self._error = e
+                started.set()
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='{}-aio-server'.format(self.action.action_name))
+        self._thread.daemon = True
+        self._thread.start()
+        started.wait()
+
+        if self._error is not None:
+            raise self._error
+
+    def stop(self, grace):
+        stopped = threading.Event()
+
+        if self._thread is not None and self._thread.is_alive():
+            self._grace = grace
+            self._loop.call_soon_threadsafe(self._stopping.set)
+            self._thread.join()
+
+        self.executor.shutdown(wait=False)
+        stopped.set()
+        return stopped
+
+    def wait_for_termination(self, timeout=None):
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
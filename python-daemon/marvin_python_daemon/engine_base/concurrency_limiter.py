@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Adaptive concurrency limit of the online actions.
+
+The number of requests executed at the same time is adjusted from the
+latency observed, instead of being fixed by the number of server workers.
+Configured per action in engine.metadata:
+
+    {"name": "predictor", ..., "concurrencyLimit": {"algorithm": "gradient", "initialLimit": 4,
+                                                    "minLimit": 1, "maxLimit": 64, "maxQueue": 100}}
+
+gradient  the limit follows the ratio between the long term latency and the
+          latest one: it grows while latency is stable and shrinks as soon
+          as requests start queueing inside the engine.
+aimd      the limit grows by one while latency is below latencyThresholdMs
+          and is multiplied by `backoff` when it is above or a deadline is
+          exceeded.
+
+Requests over the limit wait for a slot, up to `maxQueue` of them, the
+others are rejected with RESOURCE_EXHAUSTED.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry
+from .load_shedding import DeadlineExceeded, RequestShed
+
+__all__ = ['AdaptiveConcurrencyLimiter', 'LimitExceeded', 'GRADIENT', 'AIMD']
+
+logger = get_logger('concurrency_limiter')
+
+GRADIENT = 'gradient'
+AIMD = 'aimd'
+
+
+class LimitExceeded(RequestShed):
+    pass
+
+
+class AdaptiveConcurrencyLimiter(object):
+    """Thread safe concurrency limit adjusted from the latency of the requests.
+
+    Usage:
+
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=64)
+        with limiter.slot(deadline):
+            execute()
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=64, algorithm=GRADIENT, max_queue=None,
+                 tolerance=2.0, smoothing=0.2, backoff=0.9, latency_threshold_ms=None, name='action'):
+        if algorithm not in (GRADIENT, AIMD):
+            raise ValueError('Unknown concurrency limit algorithm {}, options are {}, {}'.format(
+                algorithm, GRADIENT, AIMD))
+        if algorithm == AIMD and not latency_threshold_ms:
+            raise ValueError('The aimd concurrency limit requires latencyThresholdMs')
+
+        self.min_limit = max(int(min_limit), 1)
+        self.max_limit = max(int(max_limit), self.min_limit)
+        self.limit = float(min(max(int(initial_limit), self.min_limit), self.max_limit))
+        self.algorithm = algorithm
+        self.max_queue = int(max_queue) if max_queue is not None else None
+        self.tolerance = float(tolerance)
+        self.smoothing = float(smoothing)
+        self.backoff = float(backoff)
+        self.latency_threshold = float(latency_threshold_ms) / 1000.0 if latency_threshold_ms else None
+        self.name = name
+        self.inflight = 0
+        self.waiting = 0
+        self._long_latency = None
+        self._condition = threading.Condition()
+        self._report()
+
+    @classmethod
+    def from_metadata(cls, options, max_limit=64, name='action'):
+        return cls(initial_limit=options.get('initialLimit', 4), min_limit=options.get('minLimit', 1),
+                   max_limit=options.get('maxLimit', max_limit), algorithm=options.get('algorithm', GRADIENT),
+                   max_queue=options.get('maxQueue'), tolerance=options.get('tolerance', 2.0),
+                   backoff=options.get('backoff', 0.9), latency_threshold_ms=options.get('latencyThresholdMs'),
+                   name=name)
+
+    def _report(self):
+        metrics_registry.set('concurrency_limit', int(self.limit), action=self.name)
+        metrics_registry.set('concurrency_inflight', self.inflight, action=self.name)
+        metrics_registry.set('concurrency_queue_depth', self.waiting, action=self.name)
+
+    def acquire(self, deadline=None):
+        with self._condition:
+            if self.inflight >= int(self.limit):
+                if self.max_queue is not None and self.waiting >= self.max_queue:
+                    metrics_registry.inc('concurrency_rejected', action=self.name)
+                    raise LimitExceeded('{} concurrency limit of {} reached with {} requests queued'.format(
+                        self.name, int(self.limit), self.waiting))
+
+                self.waiting += 1
+                self._report()
+                try:
+                    # the limit may change while waiting
+                    while self.inflight >= int(self.limit):
+                        remaining = deadline - time.time() if deadline is not None else None
+                        if remaining is not None and remaining <= 0:
+                            raise DeadlineExceeded('Deadline exceeded waiting for a slot of {}'.format(self.name))
+                        self._condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+            self.inflight += 1
+            self._report()
+
+    def release(self, latency=None, dropped=False):
+        with self._condition:
+            if latency is not None or dropped:
+                self._update(latency, dropped)
+            self.inflight -= 1
+            self._report()
+            self._condition.notify_all()
+
+    def _update(self, latency, dropped):
+        if self.algorithm == AIMD:
+            if dropped or latency > self.latency_threshold:
+                limit = self.limit * self.backoff
+            elif self.inflight * 2 >= self.limit:
+                limit = self.limit + 1
+            else:
+                limit = self.limit
+
+        else:
+            if dropped:
+                limit = self.limit * 0.5
+            else:
+                # the long term latency moves slowly, the latest one shows the queueing
+                self._long_latency = latency if self._long_latency is None else \
+                    self._long_latency * 0.99 + latency * 0.01
+                gradient = max(0.5, min(1.0, self.tolerance * self._long_latency / max(latency, 1e-9)))
+                limit = self.limit * gradient + math.sqrt(self.limit)
+
+                # only grow when the current limit is being used
+                if self.inflight * 2 < self.limit:
+                    limit = min(limit, self.limit)
+
+            limit = self.limit * (1 - self.smoothing) + limit * self.smoothing
+
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+
+    @contextmanager
+    def slot(self, deadline=None):
+        self.acquire(deadline)
+        start = time.time()
+        latency, dropped = None, False
+
+        try:
+            yield
+            latency = time.time() - start
+        except DeadlineExceeded:
+            dropped = True
+            raise
+        finally:
+            # failures of the action other than deadlines do not change the limit
+            self.release(latency, dropped)
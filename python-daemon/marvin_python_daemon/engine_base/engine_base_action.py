@@ -17,23 +17,85 @@
 
 from __future__ import unicode_literals
 import os
+import sys
+import time
+import shutil
+import inspect
+import hashlib
+import threading
+import contextvars
+import queue
+from functools import partial
+from contextlib import contextmanager
+from types import MappingProxyType
 
 from abc import ABCMeta, abstractmethod
-import joblib as serializer
 from concurrent import futures
 import grpc
 import json
 
 from .stubs.actions_pb2 import BatchActionResponse, OnlineActionResponse, ReloadResponse, HealthCheckResponse
+from .stubs.actions_pb2 import OnlineBatchActionResponse, OnlineStreamResponse
 from .stubs import actions_pb2_grpc
+from .serializers import default_registry as serializer_registry
+from .artifact_store import ArtifactStore, artifact_hash
+from .artifact_metrics import measure_artifact_io, flush_report
+from .artifact_residency import residency_manager
+from .micro_batcher import MicroBatcher
+from .payloads import decode_payload, encode_payload, is_array
+from .prediction_cache import PredictionCache, cache_key
+from .load_shedding import QueueTimeShedder, LoadSheddingInterceptor, deadline_aware, deadline_scope, check_deadline, \
+    get_deadline
+from .concurrency_limiter import AdaptiveConcurrencyLimiter
+from .rpc_pools import MeteredThreadPoolExecutor, RpcPoolsInterceptor, HEALTH_POOL_WORKERS, RELOAD_POOL_WORKERS
 
-from ..common.log import get_logger
+from ..common.log import get_logger, sampled_request
+from ..common.metrics import metrics_registry
+from ..common import json_codec
 
 
 __all__ = ['EngineBaseAction',
            'EngineBaseBatchAction', 'EngineBaseOnlineAction']
 logger = get_logger('engine_base_action')
 
+# artifactsOptions keys accepted in engine.metadata and the serializer arguments they map to
+ARTIFACT_OPTIONS = {
+    'serializer': 'serializer',
+    'mmap': 'mmap',
+    'lazy': 'lazy',
+    'compression': 'compression',
+    'compressionLevel': 'compression_level',
+    'protocol': 'protocol'
+}
+
+# trailing metadata with the time of each step, sent when stepTimings is enabled
+STEP_TIMINGS_METADATA_KEY = 'marvin-step-ms'
+
+
+def _link_file(source, destination):
+    try:
+        os.link(source, destination)
+    except OSError:
+        # e.g. another file system
+        shutil.copy2(source, destination)
+
+
+def _link_path(source, destination):
+    # hard links, the artifacts are replaced and never written through a link (see _dump_obj)
+    if os.path.isdir(source):
+        shutil.copytree(source, destination, copy_function=_link_file)
+    else:
+        _link_file(source, destination)
+
+
+def _is_shared(path):
+    if os.path.islink(path):
+        return True
+    if os.path.isfile(path):
+        return os.stat(path).st_nlink > 1
+    return any(os.stat(os.path.join(root, name)).st_nlink > 1
+               for root, _, names in os.walk(path) for name in names)
+
 
 class EngineBaseAction():
     __metaclass__ = ABCMeta
@@ -44,33 +106,74 @@ class EngineBaseAction():
     _previous_step = None
     _is_remote_calling = False
     _local_saved_objects = {}
+    _pending_saved_objects = []
+    _persistence_executor = None
+    _artifacts_options = {}
+    _memoize = False
+    _input_artifacts = []
+    _snapshot = None
+    _pinned = None
+    _reload_disabled = None
+    _warmup_messages = []
+    _max_queue_ms = None
+    _rpc_pools = None
 
     def __init__(self, **kwargs):
         self.action_name = self.__class__.__name__
         self._params = self._get_arg(kwargs=kwargs, arg='params')
+        self._artifacts_options = self._get_arg(
+            kwargs=kwargs, arg='artifacts_options', default_value={})
         self._persistence_mode = self._get_arg(
             kwargs=kwargs, arg='persistence_mode', default_value='memory')
+        # appended by the threads of the action, drained by _flush_saved_objects
+        self._pending_saved_objects = []
+        self._pending_saved_objects_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._local_saved_objects = {}
         self._default_root_path = self._get_arg(kwargs=kwargs, arg='default_root_path', default_value=os.path.join(
             os.environ['MARVIN_DATA_PATH'], '.artifacts'))
         logger.info("default_root_path: {}".format(self._default_root_path))
         self._is_remote_calling = self._get_arg(
             kwargs=kwargs, arg='is_remote_calling', default_value=False)
+        self._memoize = self._get_arg(
+            kwargs=kwargs, arg='memoize', default_value=False)
+        self._input_artifacts = self._get_arg(
+            kwargs=kwargs, arg='input_artifacts', default_value=[])
+        self._warmup_messages = self._get_arg(
+            kwargs=kwargs, arg='warmup_messages', default_value=[])
+        self._max_queue_ms = self._get_arg(
+            kwargs=kwargs, arg='max_queue_ms', default_value=None)
+        # per thread, and per task in the asyncio server
+        self._pinned = contextvars.ContextVar('{}_pinned'.format(self.action_name), default=None)
         logger.info("Starting {} engine action with {} persistence mode...".format(
             self.__class__.__name__, self._persistence_mode))
 
     def _get_arg(self, kwargs, arg, default_value=None):
         return kwargs.get(arg, default_value)
 
-    def _get_object_file_path(self, object_reference):
+    def _get_artifacts_directory(self, create=True):
         engine_name = self.__module__.split('.')[0].replace(
             'marvin_', '').replace('_engine', '')
         directory = os.path.join(self._default_root_path, engine_name)
 
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+        if create:
+            # the threads of the action may save their first objects concurrently
+            os.makedirs(directory, exist_ok=True)
+
+        return directory
+
+    def _get_object_file_path(self, object_reference, create=True):
+        object_file_path = os.path.join(
+            self._get_artifacts_directory(create=create), "{}".format(object_reference.replace('_', '')))
+
+        logger.debug("Object %s path: %s", object_reference, object_file_path)
+        return object_file_path
 
-        logger.info(os.path.join(directory, "{}".format(object_reference.replace('_', ''))))
-        return os.path.join(directory, "{}".format(object_reference.replace('_', '')))
+    def _get_artifact_options(self, object_file_path):
+        options = dict(self._artifacts_options.get('default', {}))
+        options.update(self._artifacts_options.get(
+            object_file_path.split(os.sep)[-1], {}))
+        return options
 
     def _serializer_dump(self, obj, object_file_path):
         if object_file_path.split(os.sep)[-1] == 'metrics':
@@ -78,14 +181,17 @@ class EngineBaseAction():
                 json.dump(obj, f, sort_keys=True,
                           indent=4, separators=(',', ': '))
         else:
-            serializer.dump(obj, object_file_path, protocol=2, compress=3)
+            artifact_options = self._get_artifact_options(object_file_path)
+            serializer_registry.dump(obj, object_file_path, **{
+                ARTIFACT_OPTIONS[option]: value for option, value in artifact_options.items()
+                if option in ARTIFACT_OPTIONS})
 
     def _serializer_load(self, object_file_path):
         if object_file_path.split(os.sep)[-1] == 'metrics':
             with open(object_file_path, 'r') as f:
                 return json.load(f)
         else:
-            return serializer.load(object_file_path)
+            return serializer_registry.load(object_file_path)
 
     def _save_obj(self, object_reference, obj):
         if not self._is_remote_calling:
@@ -96,37 +202,163 @@ class EngineBaseAction():
 
         setattr(self, object_reference, obj)
 
+        pinned = self._get_pinned_snapshot()
+        if pinned is not None and object_reference in pinned:
+            self._pinned.set(MappingProxyType(dict(pinned, **{object_reference: obj})))
+
         if self._persistence_mode == 'local':
             object_file_path = self._get_object_file_path(object_reference)
-            logger.info("Saving object to {}".format(object_file_path))
-            self._serializer_dump(obj, object_file_path)
-            logger.info("Object {} saved!".format(object_reference))
+
+            if self._get_artifact_options(object_file_path).get('writeBehind'):
+                # the object is persisted in background and the action goes on,
+                # the write is awaited by _flush_saved_objects
+                logger.info("Scheduling save of object to {}".format(object_file_path))
+                future = self._get_persistence_executor().submit(
+                    self._dump_obj, object_reference, obj, object_file_path)
+                with self._pending_saved_objects_lock:
+                    self._pending_saved_objects.append((object_reference, future))
+            else:
+                self._dump_obj(object_reference, obj, object_file_path)
+
             self._local_saved_objects[object_reference] = object_file_path
+            residency_manager.touch(self, object_reference, obj)
+
+    def _dump_obj(self, object_reference, obj, object_file_path):
+        logger.info("Saving object to {}".format(object_file_path))
+        artifact_options = self._get_artifact_options(object_file_path)
+
+        if artifact_options.get('versions'):
+            version = measure_artifact_io('dump', object_file_path, lambda: ArtifactStore(
+                os.path.dirname(object_file_path)).save(
+                    os.path.basename(object_file_path), obj, dump=self._serializer_dump,
+                    options={option: value for option, value in artifact_options.items() if option in ARTIFACT_OPTIONS},
+                    keep_versions=int(artifact_options['versions'])),
+                obj=obj, measure_memory=artifact_options.get('measureMemory', False))
+            logger.info("Object {} saved as version {}!".format(object_reference, version))
+        else:
+            # never write through a link into the artifact store or the memos
+            for path in (object_file_path, "{}.manifest".format(object_file_path)):
+                if os.path.lexists(path) and _is_shared(path):
+                    if os.path.isdir(path) and not os.path.islink(path):
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+
+            measure_artifact_io('dump', object_file_path, lambda: self._serializer_dump(obj, object_file_path),
+                                obj=obj, measure_memory=artifact_options.get('measureMemory', False))
+            logger.info("Object {} saved!".format(object_reference))
+
+    def _checkout_obj(self, object_reference, version):
+        object_file_path = self._get_object_file_path(object_reference)
+        ArtifactStore(os.path.dirname(object_file_path)).checkout(
+            os.path.basename(object_file_path), version)
+
+    def _get_version_file_path(self, object_reference, version):
+        object_file_path = self._get_object_file_path(object_reference)
+        return ArtifactStore(os.path.dirname(object_file_path)).version_path(
+            os.path.basename(object_file_path), version)
+
+    def _get_persistence_executor(self):
+        # a single writer keeps the writes of the same artifact in order
+        with self._pending_saved_objects_lock:
+            if self._persistence_executor is None:
+                self._persistence_executor = futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix='{}-persistence'.format(self.action_name))
+        return self._persistence_executor
+
+    def _flush_saved_objects(self, object_reference=None):
+        if self._previous_step and object_reference is None:
+            self._previous_step._flush_saved_objects()
+
+        with self._pending_saved_objects_lock:
+            flushing, pending = [], []
+            for reference, future in self._pending_saved_objects:
+                if object_reference is None or reference == object_reference:
+                    flushing.append((reference, future))
+                else:
+                    pending.append((reference, future))
+            self._pending_saved_objects = pending
+
+        # waited outside of the lock, the action keeps scheduling saves meanwhile
+        errors = []
+        for reference, future in flushing:
+            try:
+                future.result()
+            except Exception as e:
+                logger.error("Object {} could not be saved: {}".format(reference, e))
+                errors.append(e)
+
+        if errors:
+            raise errors[0]
+
+    def _get_pinned_snapshot(self):
+        return self._pinned.get() if self._pinned is not None else None
+
+    @contextmanager
+    def _pin_snapshot(self, snapshot):
+        # artifacts read by the current thread come from the pinned snapshot
+        previous = self._get_pinned_snapshot()
+        self._pinned.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            self._pinned.set(previous)
 
     def _load_obj(self, object_reference, force=False):
         object_reference = object_reference if object_reference.startswith(
             '_') else '_%s' % object_reference
-        if (getattr(self, object_reference, None) is None and self._persistence_mode == 'local') or force:
-            object_file_path = self._get_object_file_path(object_reference)
-            logger.info("Loading object from {}".format(object_file_path))
-            setattr(self, object_reference,
-                    self._serializer_load(object_file_path))
-            logger.info("Object {} loaded!".format(object_reference))
 
-        return getattr(self, object_reference)
+        pinned = self._get_pinned_snapshot()
+        if pinned is not None and object_reference in pinned and not force:
+            obj = pinned[object_reference]
+
+        elif self._persistence_mode == 'local' or force:
+            # read once, the residency manager may evict the artifact at any time
+            obj = None if force else getattr(self, object_reference, None)
+
+            if obj is None:
+                with residency_manager.loading_lock(self, object_reference):
+                    obj = None if force else getattr(self, object_reference, None)
+
+                    if obj is None:
+                        self._flush_saved_objects(object_reference)
+                        object_file_path = self._get_object_file_path(object_reference)
+                        logger.info("Loading object from {}".format(object_file_path))
+                        obj = measure_artifact_io(
+                            'load', object_file_path, lambda: self._serializer_load(object_file_path),
+                            measure_memory=self._get_artifact_options(object_file_path).get('measureMemory', False))
+                        setattr(self, object_reference, obj)
+                        logger.info("Object {} loaded!".format(object_reference))
+
+        else:
+            obj = getattr(self, object_reference)
+
+        if self._persistence_mode == 'local':
+            residency_manager.touch(self, object_reference, obj)
+
+        return obj
+
+    def _evict_obj(self, object_reference):
+        # called by the residency manager, the next _load_obj reads the object from disk
+        setattr(self, object_reference, None)
+
+        if self._snapshot is not None and object_reference in self._snapshot:
+            self._snapshot = MappingProxyType(
+                {ref: obj for ref, obj in self._snapshot.items() if ref != object_reference})
 
     def _release_local_saved_objects(self):
         for object_reference in self._local_saved_objects.keys():
             logger.info(
                 "Removing object {} from memory..".format(object_reference))
             setattr(self, object_reference, None)
+            residency_manager.release(self, object_reference)
 
         self._local_saved_objects = {}
 
     @classmethod
     def retrieve_obj(self, object_file_path):
         logger.info("Retrieve object from {}".format(object_file_path))
-        return self._serializer_load(self, object_file_path)
+        return measure_artifact_io('load', object_file_path, lambda: self._serializer_load(self, object_file_path))
 
     def _remote_reload(self, request, context):
         protocol = request.protocol
@@ -137,9 +369,19 @@ class EngineBaseAction():
 
         message = "Reloaded"
 
-        if artifacts:
-            for artifact in artifacts.split(","):
-                self._load_obj(object_reference=artifact, force=True)
+        if artifacts and self._reload_disabled:
+            # the artifacts of the other processes serving the action would not change
+            logger.warning("Reload of [{}] rejected: {}".format(artifacts, self._reload_disabled))
+            if context is not None:
+                context.abort(grpc.StatusCode.FAILED_PRECONDITION, self._reload_disabled)
+            return ReloadResponse(message=self._reload_disabled)
+
+        elif artifacts:
+            # requests keep being served with the current snapshot meanwhile,
+            # concurrent reloads are staged and swapped one after the other
+            with self._reload_lock:
+                self._swap_snapshot(self._stage_reload(artifacts.split(",")))
+            flush_report()
 
         else:
             message = "Nothing to reload"
@@ -149,42 +391,222 @@ class EngineBaseAction():
         logger.info("Return final results to the client!")
         return response_message
 
+    def _stage_reload(self, artifacts):
+        staging = dict(self._snapshot or {})
+        checkouts = []
+
+        for artifact in artifacts:
+            # artifact@version switches to a stored version of the artifact
+            artifact, _, version = artifact.partition("@")
+            object_reference = artifact if artifact.startswith('_') else '_%s' % artifact
+            self._flush_saved_objects(object_reference)
+
+            if version:
+                # loaded from the store, the artifact path only switches once the snapshot is warmed up
+                object_file_path = self._get_version_file_path(object_reference, version)
+                checkouts.append((object_reference, version))
+            else:
+                object_file_path = self._get_object_file_path(object_reference)
+
+            logger.info("Loading object from {} into the staging snapshot".format(object_file_path))
+            staging[object_reference] = measure_artifact_io(
+                'load', object_file_path, lambda: self._serializer_load(object_file_path),
+                measure_memory=self._get_artifact_options(object_file_path).get('measureMemory', False))
+
+        snapshot = MappingProxyType(staging)
+        self._warmup(snapshot)
+
+        for object_reference, version in checkouts:
+            self._checkout_obj(object_reference=object_reference, version=version)
+
+        return snapshot
+
+    def _warmup(self, snapshot):
+        pass
+
+    def _swap_snapshot(self, snapshot):
+        # a single reference assignment, in-flight requests keep the snapshot they pinned
+        self._snapshot = snapshot
+
+        for object_reference, obj in snapshot.items():
+            setattr(self, object_reference, obj)
+            if self._persistence_mode == 'local':
+                residency_manager.touch(self, object_reference, obj)
+
+        logger.info("Artifacts {} swapped!".format(", ".join(snapshot.keys())))
+
+    def _get_rpc_pools(self):
+        # health checks and reloads never wait behind the execute requests
+        if self._rpc_pools is None:
+            self._rpc_pools = {
+                '_health_check': MeteredThreadPoolExecutor(HEALTH_POOL_WORKERS, 'health', action=self.action_name),
+                '_remote_reload': MeteredThreadPoolExecutor(RELOAD_POOL_WORKERS, 'reload', action=self.action_name),
+            }
+        return self._rpc_pools
+
+    def _get_server_interceptors(self, main_pool=None, max_concurrent_rpcs=None):
+        # requests waiting longer than maxQueueMs for a thread are rejected, the
+        # limit of concurrent rpcs only applies to the methods of the main pool
+        return [RpcPoolsInterceptor(self._get_rpc_pools(), main_pool=main_pool, max_concurrent_rpcs=max_concurrent_rpcs),
+                LoadSheddingInterceptor(QueueTimeShedder(self._max_queue_ms, name=self.action_name))]
+
+    def _is_ready(self):
+        return True
+
+    def _is_loadable(self, object_reference):
+        if getattr(self, object_reference) is not None:
+            return True
+
+        # evicted by the residency manager, loaded again from disk on its next access
+        return self._persistence_mode == 'local' and (
+            object_reference in self._local_saved_objects or
+            os.path.exists(self._get_object_file_path(object_reference, create=False)))
+
     def _health_check(self, request, context):
         logger.info("Received message from client with protocol health check [{}] artifacts...".format(
             request.artifacts))
         try:
             if request.artifacts:
                 for artifact in request.artifacts.split(","):
-                    if getattr(self, '_{0}'.format(artifact)) is None:
-                        return HealthCheckResponse(status=HealthCheckResponse.NOK)
-            return HealthCheckResponse(status=HealthCheckResponse.OK)
+                    if not self._is_loadable('_{0}'.format(artifact)):
+                        return HealthCheckResponse(status=HealthCheckResponse.NOK, live=True, ready=False)
+
+            # live as soon as it answers, ready (and OK) once warmed up
+            ready = self._is_ready()
+            return HealthCheckResponse(
+                status=HealthCheckResponse.OK if ready else HealthCheckResponse.NOK, live=True, ready=ready)
 
         except Exception as e:
             logger.error(e)
-            return HealthCheckResponse(status=HealthCheckResponse.NOK)
+            return HealthCheckResponse(status=HealthCheckResponse.NOK, live=False, ready=False)
 
 
 class EngineBaseBatchAction(EngineBaseAction):
     __metaclass__ = ABCMeta
 
+    _memo_file = 'memo.json'
+    _memo_entries = 3
+
     @abstractmethod
     def execute(self, params, **kwargs):
         pass
 
+    def _get_fingerprint(self, params):
+        try:
+            source = inspect.getsource(self.__class__)
+        except (OSError, TypeError):
+            source = "{}.{}".format(self.__class__.__module__, self.__class__.__name__)
+
+        input_hashes = {}
+        for artifact in self._input_artifacts:
+            object_file_path = self._get_object_file_path(artifact)
+            input_hashes[artifact] = artifact_hash(object_file_path) if os.path.exists(object_file_path) else None
+
+        return hashlib.sha256(json.dumps({
+            'source': hashlib.sha256(source.encode('utf-8')).hexdigest(),
+            'params': params,
+            'inputs': input_hashes,
+            'artifacts_options': self._artifacts_options
+        }, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _save_memo(self, memo_path):
+        tmp_path = "{}.tmp".format(memo_path)
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        outputs = {}
+        for object_reference, object_file_path in self._local_saved_objects.items():
+            name = os.path.basename(object_file_path)
+
+            if os.path.islink(object_file_path):
+                # stored artifacts are referenced by their version, nothing is copied
+                outputs[object_reference] = {'name': name, 'version': ArtifactStore(
+                    os.path.dirname(object_file_path)).current_version(name)}
+                continue
+
+            for suffix in ('', '.manifest'):
+                if os.path.exists(object_file_path + suffix):
+                    _link_path(object_file_path + suffix, os.path.join(tmp_path, name + suffix))
+            outputs[object_reference] = {'name': name}
+
+        with open(os.path.join(tmp_path, self._memo_file), 'w') as f:
+            json.dump(outputs, f, sort_keys=True)
+
+        shutil.rmtree(memo_path, ignore_errors=True)
+        os.rename(tmp_path, memo_path)
+
+        # only the most recent runs of the action are kept
+        memo_dir = os.path.dirname(memo_path)
+        entries = sorted((os.path.join(memo_dir, entry) for entry in os.listdir(memo_dir)), key=os.path.getmtime)
+        for entry in entries[:-self._memo_entries]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def _restore_memo(self, memo_path):
+        with open(os.path.join(memo_path, self._memo_file), 'r') as f:
+            outputs = json.load(f)
+
+        for object_reference, output in outputs.items():
+            object_file_path = self._get_object_file_path(object_reference)
+
+            if output.get('version') is not None:
+                # the store index and the artifact hash stay the ones of the stored version
+                self._checkout_obj(object_reference=object_reference, version=output['version'])
+            else:
+                for suffix in ('', '.manifest'):
+                    path = object_file_path + suffix
+                    if os.path.islink(path) or os.path.isfile(path):
+                        os.remove(path)
+                    elif os.path.isdir(path):
+                        shutil.rmtree(path)
+
+                    if os.path.exists(os.path.join(memo_path, output['name'] + suffix)):
+                        _link_path(os.path.join(memo_path, output['name'] + suffix), path)
+
+            # loaded again from the restored artifact when needed
+            setattr(self, object_reference, None)
+            self._local_saved_objects[object_reference] = object_file_path
+
+        os.utime(memo_path, None)
+
+    def _memoized_execute(self, params):
+        if not self._memoize or self._persistence_mode != 'local':
+            return self.execute(params)
+
+        fingerprint = self._get_fingerprint(params)
+        memo_path = os.path.join(self._get_artifacts_directory(), '.memo', self.action_name, fingerprint)
+
+        if os.path.exists(os.path.join(memo_path, self._memo_file)):
+            logger.info("{} inputs unchanged, restoring artifacts from {}".format(self.action_name, memo_path))
+            try:
+                self._restore_memo(memo_path)
+                return
+            except ValueError as e:
+                # e.g. the stored version was pruned since
+                logger.warning("Could not restore the artifacts from {}: {}".format(memo_path, e))
+                shutil.rmtree(memo_path, ignore_errors=True)
+
+        self.execute(params)
+        self._flush_saved_objects()
+        self._save_memo(memo_path)
+
     def _pipeline_execute(self, params):
         if self._previous_step:
             self._previous_step._pipeline_execute(params)
 
+        check_deadline(self.action_name)
         logger.info("Start of the {} execute method!".format(self.action_name))
-        self.execute(params)
+        self._memoized_execute(params)
+        self._flush_saved_objects()
+        flush_report()
         logger.info("Finish of the {} execute method!".format(self.action_name))
 
+    @deadline_aware
     def _remote_execute(self, request, context):
         logger.info(
             "Received message from client and sending to engine action...")
         logger.debug("Received Params: {}".format(request.params))
 
-        params = json.loads(request.params) if request.params else self._params
+        params = json_codec.loads(request.params) if request.params else self._params
 
         self._pipeline_execute(params=params)
 
@@ -196,9 +618,10 @@ class EngineBaseBatchAction(EngineBaseAction):
         logger.info("Return final results to the client!")
         return response_message
 
-    def _prepare_remote_server(self, port, workers, rpc_workers):
-        server = grpc.server(thread_pool=futures.ThreadPoolExecutor(
-            max_workers=workers), maximum_concurrent_rpcs=rpc_workers)
+    def _prepare_remote_server(self, port, workers, rpc_workers, options=None):
+        thread_pool = MeteredThreadPoolExecutor(workers, 'execute', action=self.action_name)
+        server = grpc.server(thread_pool=thread_pool, options=options, interceptors=self._get_server_interceptors(
+            main_pool=thread_pool, max_concurrent_rpcs=rpc_workers))
         actions_pb2_grpc.add_BatchActionHandlerServicer_to_server(self, server)
         server.add_insecure_port('[::]:{}'.format(port))
         return server
@@ -206,47 +629,484 @@ class EngineBaseBatchAction(EngineBaseAction):
 
 class EngineBaseOnlineAction(EngineBaseAction):
     __metaclass__ = ABCMeta
+    _max_batch_size = None
+    _max_wait_ms = None
+    _micro_batcher = None
+    _workers = None
+    _stream_executor = None
+    _prediction_cache = None
+    _artifacts_generation = 0
+    _pipeline = None
+    _step_timings = False
+    _concurrency_options = None
+    _concurrency_limiter = None
+    _startup_warmup = 0
+    _startup_messages = []
+    _startup_thread = None
+    _startup_retries = 3
+    _startup_fail_open = True
+    # seconds before the first retry of a failed startup warmup, doubled on each one
+    _startup_backoff = 1.0
+    _ready = None
+
+    def __init__(self, **kwargs):
+        self._max_batch_size = self._get_arg(
+            kwargs=kwargs, arg='max_batch_size', default_value=None)
+        self._max_wait_ms = self._get_arg(
+            kwargs=kwargs, arg='max_wait_ms', default_value=5)
+        self._step_timings = self._get_arg(
+            kwargs=kwargs, arg='step_timings', default_value=False)
+
+        # predictionCache options of the action in engine.metadata
+        cache_options = self._get_arg(kwargs=kwargs, arg='prediction_cache')
+        self._prediction_cache = PredictionCache.from_metadata(
+            cache_options, name=self.__class__.__name__) if cache_options else None
+
+        # concurrencyLimit options of the action in engine.metadata
+        self._concurrency_options = self._get_arg(kwargs=kwargs, arg='concurrency_limit')
+
+        # startupWarmup iterations over the messages before the server is ready
+        self._startup_warmup = int(self._get_arg(kwargs=kwargs, arg='startup_warmup', default_value=0) or 0)
+        self._startup_messages = self._get_arg(kwargs=kwargs, arg='startup_messages', default_value=None) or []
+        self._startup_retries = int(self._get_arg(kwargs=kwargs, arg='startup_retries', default_value=3))
+        self._startup_fail_open = bool(self._get_arg(kwargs=kwargs, arg='startup_fail_open', default_value=True))
+        self._ready = threading.Event()
+        if not (self._startup_warmup and self._startup_messages):
+            self._ready.set()
+
+        super(EngineBaseOnlineAction, self).__init__(**kwargs)
 
     @abstractmethod
     def execute(self, input_message, params, **kwargs):
         pass
 
-    def _pipeline_execute(self, input_message, params):
-        if self._previous_step:
-            input_message = self._previous_step._pipeline_execute(
-                input_message, params)
+    def execute_batch(self, input_messages, params, **kwargs):
+        # override to use the vectorized path of the model, one result per message
+        return [self.execute(input_message, params, **kwargs) for input_message in input_messages]
 
-        logger.info("Start of the {} execute method!".format(self.action_name))
-        return self.execute(input_message, params)
-        logger.info("Finish of the {} execute method!".format(self.action_name))
+    def _pipeline_steps(self):
+        # the first step of the pipeline first, this action last
+        steps = [self]
+        while steps[0]._previous_step is not None:
+            steps.insert(0, steps[0]._previous_step)
+        return steps
+
+    def _is_async(self):
+        return any(inspect.iscoroutinefunction(step.execute) for step in self._pipeline_steps())
+
+    def _get_pipeline(self):
+        # flat list of the (name, execute, execute_batch) of the steps, compiled once by the server
+        if self._pipeline is not None:
+            return self._pipeline
+
+        return tuple((step.action_name, step.execute, step.execute_batch) for step in self._pipeline_steps())
+
+    def _compile_pipeline(self):
+        self._pipeline = None
+        self._pipeline = self._get_pipeline()
+        return self._pipeline
+
+    def _observe_step(self, step, elapsed, timings=None, batch=False):
+        metrics_registry.observe('pipeline_batch_step_seconds' if batch else 'pipeline_step_seconds', elapsed,
+                                 action=self.action_name, step=step)
+        logger.info("Finish of the %s execute method in %.4f (seconds)!", step, elapsed)
+
+        if timings is not None:
+            timings.append((step, elapsed))
+
+    def _send_step_timings(self, context, timings):
+        # e.g. marvin-step-ms: PredictionPreparator=0.412,Predictor=12.030
+        if timings and context is not None:
+            context.set_trailing_metadata(((STEP_TIMINGS_METADATA_KEY, ",".join(
+                "{}={:.3f}".format(step, elapsed * 1000) for step, elapsed in timings)),))
+
+    def _pipeline_execute(self, input_message, params, timings=None):
+        for step, execute, _ in self._get_pipeline():
+            check_deadline(step)
+            logger.info("Start of the %s execute method!", step)
+            start = time.time()
+            input_message = execute(input_message, params)
+            self._observe_step(step, time.time() - start, timings)
+
+        return input_message
+
+    def _pipeline_execute_batch(self, input_messages, params, timings=None):
+        for step, _, execute_batch in self._get_pipeline():
+            check_deadline(step)
+            logger.info("Start of the %s execute_batch method with %d messages!", step, len(input_messages))
+            start = time.time()
+            input_messages = execute_batch(input_messages, params)
+            self._observe_step(step, time.time() - start, timings, batch=True)
+
+        return input_messages
+
+    @sampled_request()
+    def _execute_message(self, input_message, params, timings=None):
+        with self._pin_snapshot(self._snapshot):
+            message = self._pipeline_execute(
+                input_message=input_message, params=params, timings=timings)
+        self._flush_saved_objects()
+
+        return message
+
+    @sampled_request()
+    def _execute_batch(self, input_messages, params, timings=None):
+        with self._pin_snapshot(self._snapshot):
+            messages = self._pipeline_execute_batch(
+                input_messages=input_messages, params=params, timings=timings)
+        self._flush_saved_objects()
+
+        if len(messages) != len(input_messages):
+            raise ValueError('{} execute_batch returned {} results for {} messages'.format(
+                self.action_name, len(messages), len(input_messages)))
+
+        return messages
+
+    def _swap_snapshot(self, snapshot):
+        super(EngineBaseOnlineAction, self)._swap_snapshot(snapshot)
+
+        # results computed with the previous artifacts are not served anymore
+        self._artifacts_generation += 1
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
 
+    def _get_cache_key(self, input_message, params):
+        if self._prediction_cache is None:
+            return None
+
+        return cache_key(input_message, params, self._artifacts_generation)
+
+    def _get_cached(self, key):
+        if key is None:
+            return False, None
+
+        return self._prediction_cache.get(key)
+
+    def _cache_result(self, key, _message):
+        if key is not None:
+            self._prediction_cache.put(key, _message)
+
+    def _warmup(self, snapshot):
+        with self._pin_snapshot(snapshot):
+            for input_message in self._warmup_messages:
+                self._pipeline_execute(input_message=input_message, params=self._params)
+
+        if self._warmup_messages:
+            logger.info("Staging snapshot warmed up with {} messages!".format(len(self._warmup_messages)))
+
+    def _get_input_message(self, request):
+        # binary payloads are decoded instead of the json message
+        if request.HasField('payload'):
+            return decode_payload(request.payload)
+
+        return json_codec.loads(request.message) if request.message else None
+
+    def _make_response(self, response_class, _message, binary=False, **fields):
+        # only the clients sending payloads read them back, the others get the json message
+        if binary and is_array(_message):
+            return response_class(payload=encode_payload(_message), **fields)
+
+        if type(_message) != str:
+            _message = json_codec.dumps(_message)
+
+        return response_class(message=_message, **fields)
+
+    @sampled_request()
+    @deadline_aware
     def _remote_execute(self, request, context):
         logger.info(
             "Received message from client and sending to engine action...")
-        logger.debug("Received Params: {}".format(request.params))
-        logger.debug("Received Message: {}".format(request.message))
+        logger.debug("Received Params: %s", request.params)
+        logger.debug("Received Message: %s", request.message)
+
+        input_message = self._get_input_message(request)
+        params = json_codec.loads(request.params) if request.params else self._params
 
-        input_message = json.loads(
-            request.message) if request.message else None
-        params = json.loads(request.params) if request.params else self._params
+        key = self._get_cache_key(input_message, params)
+        hit, _message = self._get_cached(key)
+        timings = [] if self._step_timings else None
 
-        _message = self._pipeline_execute(
-            input_message=input_message, params=params)
+        if hit:
+            logger.info("Returning cached result of the message!")
+        elif self._micro_batcher is not None:
+            # grouped with the concurrent requests and executed by the batcher thread
+            with self._limit_concurrency():
+                _message = self._micro_batcher.submit(input_message, params, deadline=get_deadline()).result()
+            self._cache_result(key, _message)
+        else:
+            with self._limit_concurrency():
+                _message = self._execute_message(input_message=input_message, params=params, timings=timings)
+            self._cache_result(key, _message)
 
         logger.info("Handling returned message from engine action...")
+        response_message = self._make_response(OnlineActionResponse, _message, binary=request.HasField('payload'))
+        self._send_step_timings(context, timings)
 
-        if type(_message) != str:
-            _message = json.dumps(_message)
+        logger.info("Return final results to the client!")
+        return response_message
+
+    def _execute_batch_request(self, request, timings=None):
+        if request.payloads:
+            input_messages = [decode_payload(payload) for payload in request.payloads]
+        else:
+            input_messages = [json_codec.loads(message) if message else None for message in request.messages]
+        params = json_codec.loads(request.params) if request.params else self._params
+
+        keys = [self._get_cache_key(input_message, params) for input_message in input_messages]
+        _messages = [None] * len(input_messages)
+        missing = []
+
+        for index, key in enumerate(keys):
+            hit, _messages[index] = self._get_cached(key)
+            if not hit:
+                missing.append(index)
 
-        response_message = OnlineActionResponse(message=_message)
+        if missing:
+            # only the messages not cached are executed, still as one batch
+            with self._limit_concurrency():
+                executed = self._execute_batch(
+                    input_messages=[input_messages[index] for index in missing], params=params, timings=timings)
+            for index, _message in zip(missing, executed):
+                _messages[index] = _message
+                self._cache_result(keys[index], _message)
+
+        return OnlineBatchActionResponse(
+            messages=[_message if type(_message) == str else json_codec.dumps(_message) for _message in _messages])
+
+    @sampled_request()
+    @deadline_aware
+    def _remote_execute_batch(self, request, context):
+        logger.info("Received batch of %d messages from client and sending to engine action...",
+                    len(request.payloads or request.messages))
+        logger.debug("Received Params: %s", request.params)
+
+        timings = [] if self._step_timings else None
+        response_message = self._execute_batch_request(request, timings)
+        self._send_step_timings(context, timings)
 
         logger.info("Return final results to the client!")
         return response_message
 
-    def _prepare_remote_server(self, port, workers, rpc_workers):
-        server = grpc.server(thread_pool=futures.ThreadPoolExecutor(
-            max_workers=workers), maximum_concurrent_rpcs=rpc_workers)
+    def _get_stream_window(self):
+        # as many messages in flight per stream as the server has workers
+        return max(int(self._workers or 1), 1)
+
+    def _get_stream_executor(self):
+        if self._stream_executor is None:
+            self._stream_executor = futures.ThreadPoolExecutor(
+                max_workers=self._get_stream_window(), thread_name_prefix='{}-stream'.format(self.action_name))
+        return self._stream_executor
+
+    def _execute_stream_message(self, input_message, params):
+        check_deadline(self.action_name)
+
+        with self._limit_concurrency():
+            if self._micro_batcher is not None:
+                return self._micro_batcher.submit(input_message, params, deadline=get_deadline()).result()
+            return self._execute_message(input_message=input_message, params=params)
+
+    def _submit_stream_message(self, request):
+        try:
+            input_message = self._get_input_message(request)
+            params = json_codec.loads(request.params) if request.params else self._params
+        except ValueError as e:
+            future = futures.Future()
+            future.set_exception(e)
+            return future
+
+        key = self._get_cache_key(input_message, params)
+        hit, _message = self._get_cached(key)
+        if hit:
+            future = futures.Future()
+            future.set_result(_message)
+            return future
+
+        # under the same concurrency limit as the unary requests
+        future = self._get_stream_executor().submit(
+            contextvars.copy_context().run, self._execute_stream_message, input_message, params)
+
+        if key is not None:
+            future.add_done_callback(
+                lambda done: self._cache_result(key, done.result()) if done.exception() is None else None)
+
+        return future
+
+    def _remote_execute_stream(self, request_iterator, context):
+        logger.info("Received stream from client, executing its messages as they arrive...")
+
+        window = self._get_stream_window()
+        slots = threading.Semaphore(window)
+        responses = queue.Queue()
+
+        def respond(correlation_id, binary, future):
+            try:
+                response = self._make_response(
+                    OnlineStreamResponse, future.result(), binary=binary, correlation_id=correlation_id)
+            except Exception as e:
+                logger.error("Message %s of the stream failed: %s", correlation_id, e)
+                response = OnlineStreamResponse(correlation_id=correlation_id, error=str(e))
+
+            responses.put(response)
+            slots.release()
+
+        def read():
+            try:
+                # the messages run with the deadline of the stream
+                with deadline_scope(context):
+                    for request in request_iterator:
+                        # the stream is not read further while the window is full,
+                        # so gRPC flow control holds back the client
+                        slots.acquire()
+                        try:
+                            future = self._submit_stream_message(request)
+                        except Exception as e:
+                            # answered as a failed message, which also releases its slot
+                            future = futures.Future()
+                            future.set_exception(e)
+                        future.add_done_callback(
+                            partial(respond, request.correlation_id, request.HasField('payload')))
+            except Exception as e:
+                logger.error("Stream closed by an error: {}".format(e))
+            finally:
+                # every response is queued before the end of the stream
+                for _ in range(window):
+                    slots.acquire()
+                responses.put(None)
+
+        reader = threading.Thread(target=read, name='{}-stream-reader'.format(self.action_name))
+        reader.daemon = True
+        reader.start()
+
+        count = 0
+        # responses are sent as they complete, clients match them by correlation id
+        for response in iter(responses.get, None):
+            count += 1
+            yield response
+
+        logger.info("Stream finished after {} messages!".format(count))
+
+    def _is_ready(self):
+        return self._ready is None or self._ready.is_set()
+
+    def _start_startup_warmup(self):
+        # the server answers health checks as live, but not ready, meanwhile
+        if self._ready.is_set() or self._startup_thread is not None:
+            return
+
+        if self._is_async():
+            logger.warning("Startup warmup is not available for async execute methods")
+            self._ready.set()
+            return
+
+        self._startup_thread = threading.Thread(
+            target=self._run_startup_warmup, name='{}-warmup'.format(self.action_name), daemon=True)
+        self._startup_thread.start()
+
+    def _warmup_once(self):
+        for _ in range(self._startup_warmup):
+            for input_message in self._startup_messages:
+                self._pipeline_execute(input_message=input_message, params=self._params)
+            if self._micro_batcher is not None:
+                self._pipeline_execute_batch(input_messages=self._startup_messages, params=self._params)
+
+    def _run_startup_warmup(self):
+        start = time.time()
+        for attempt in range(self._startup_retries + 1):
+            try:
+                self._warmup_once()
+                break
+            except Exception as e:
+                metrics_registry.inc('startup_warmup_failures', action=self.action_name)
+                logger.error("Startup warmup of {} failed (attempt {} of {}): {}".format(
+                    self.action_name, attempt + 1, self._startup_retries + 1, e))
+
+            if attempt < self._startup_retries:
+                time.sleep(self._startup_backoff * 2 ** attempt)
+        else:
+            if not self._startup_fail_open:
+                # kept out of the traffic until restarted
+                logger.error("{} is not ready, startup warmup failed {} times".format(
+                    self.action_name, self._startup_retries + 1))
+                return
+
+            logger.error("{} is ready without warmup, startup warmup failed {} times".format(
+                self.action_name, self._startup_retries + 1))
+            self._ready.set()
+            return
+
+        metrics_registry.set('startup_warmup_seconds', time.time() - start, action=self.action_name)
+        logger.info("{} warmed up with {} messages {} times in {:.4f} (seconds), ready!".format(
+            self.action_name, len(self._startup_messages), self._startup_warmup, time.time() - start))
+        self._ready.set()
+
+    @contextmanager
+    def _limit_concurrency(self):
+        if self._concurrency_limiter is None:
+            yield
+        else:
+            with self._concurrency_limiter.slot(deadline=get_deadline()):
+                yield
+
+    def _start_concurrency_limiter(self, workers):
+        # the limit grows up to the server workers unless a larger maxLimit is set
+        if self._concurrency_options and self._concurrency_limiter is None:
+            self._concurrency_limiter = AdaptiveConcurrencyLimiter.from_metadata(
+                self._concurrency_options, max_limit=workers, name=self.action_name)
+            logger.info("Adaptive concurrency limit of {} up to {} requests".format(
+                self._concurrency_limiter.algorithm, self._concurrency_limiter.max_limit))
+
+        if self._concurrency_limiter is None:
+            return workers
+
+        # requests waiting for a slot hold a thread, the limiter bounds the work instead of the pool
+        return max(workers, self._concurrency_limiter.max_limit + (self._concurrency_limiter.max_queue or 0))
+
+    def _start_micro_batcher(self):
+        if self._max_batch_size and int(self._max_batch_size) > 1:
+            if self._is_async():
+                logger.warning("Micro-batching is not available for async execute methods")
+                return
+
+            self._micro_batcher = MicroBatcher(
+                self._execute_batch, max_batch_size=self._max_batch_size, max_wait_ms=self._max_wait_ms,
+                name='{}-batcher'.format(self.action_name))
+            logger.info("Micro-batching requests up to {} messages or {}ms".format(
+                self._max_batch_size, self._max_wait_ms))
+
+    def _prepare_remote_server(self, port, workers, rpc_workers, options=None):
+        if self._is_async():
+            raise ValueError('{} pipeline has async execute methods, they are served by the aio server'.format(
+                self.action_name))
+
+        self._workers = workers
+        thread_pool = MeteredThreadPoolExecutor(self._start_concurrency_limiter(workers), 'execute',
+                                                action=self.action_name)
+        server = grpc.server(thread_pool=thread_pool, options=options, interceptors=self._get_server_interceptors(
+            main_pool=thread_pool, max_concurrent_rpcs=rpc_workers))
         actions_pb2_grpc.add_OnlineActionHandlerServicer_to_server(
             self, server)
+
+        self._compile_pipeline()
+        self._start_micro_batcher()
+        self._start_startup_warmup()
+
         server.add_insecure_port('[::]:{}'.format(port))
         return server
+
+    def _prepare_async_remote_server(self, port, workers, rpc_workers, options=None):
+        # grpc.aio is only available from grpcio 1.32, the context of the
+        # asyncio tasks from python 3.7
+        if sys.version_info < (3, 7):
+            raise ValueError('The asyncio server requires python 3.7 or later')
+        try:
+            from .async_server import AsyncOnlineServer
+        except ImportError as e:
+            raise ValueError('The asyncio server requires grpcio>=1.32: {}'.format(e))
+
+        # sync execute methods run on `workers` threads, the requests on the event loop
+        self._workers = workers
+        self._compile_pipeline()
+        self._start_micro_batcher()
+        self._start_startup_warmup()
+
+        return AsyncOnlineServer(self, port=port, workers=self._start_concurrency_limiter(workers), rpc_workers=rpc_workers, options=options)
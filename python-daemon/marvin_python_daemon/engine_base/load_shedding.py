@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deadlines and load shedding of the action servers.
+
+The deadline of the caller (e.g. the executor onlineActionTimeout) is read
+from the gRPC context and checked before each step of the pipeline, so the
+work of requests the caller gave up on is abandoned with DEADLINE_EXCEEDED.
+
+Requests waiting for a server thread longer than `maxQueueMs` (per action
+in engine.metadata) are rejected with RESOURCE_EXHAUSTED before any work is
+done, so a traffic spike does not turn into a queue every request waits in.
+"""
+
+import time
+import functools
+import contextvars
+from contextlib import contextmanager
+
+import grpc
+
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry
+from .payloads import InvalidPayload
+
+__all__ = ['DeadlineExceeded', 'RequestShed', 'QueueTimeShedder', 'LoadSheddingInterceptor',
+           'deadline_scope', 'get_deadline', 'check_deadline', 'deadline_aware']
+
+logger = get_logger('load_shedding')
+
+_deadline = contextvars.ContextVar('marvin_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class RequestShed(Exception):
+    pass
+
+
+def _time_remaining(context):
+    remaining = context.time_remaining() if context is not None else None
+    return remaining if isinstance(remaining, (int, float)) else None
+
+
+@contextmanager
+def deadline_scope(context):
+    """Sets the deadline of the rpc for the work done in the current context."""
+    remaining = _time_remaining(context)
+    token = _deadline.set(time.time() + remaining if remaining is not None else _deadline.get())
+    try:
+        yield _deadline.get()
+    finally:
+        _deadline.reset(token)
+
+
+def get_deadline():
+    return _deadline.get()
+
+
+def check_deadline(step, deadline=None):
+    deadline = deadline if deadline is not None else _deadline.get()
+    if deadline is not None and time.time() >= deadline:
+        raise DeadlineExceeded('Deadline exceeded before the {} step'.format(step))
+
+
+def deadline_aware(method):
+    """Runs an rpc method within its deadline, failing it with DEADLINE_EXCEEDED when it passes.
+
+    Requests shed while being served are failed with RESOURCE_EXHAUSTED, the
+    ones carrying a payload that cannot be decoded with INVALID_ARGUMENT.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, request, context):
+        with deadline_scope(context):
+            try:
+                return method(self, request, context)
+            except DeadlineExceeded as e:
+                metrics_registry.inc('rpc_deadline_exceeded', action=self.action_name)
+                logger.warning("%s request abandoned: %s", self.action_name, e)
+                if context is None:
+                    raise
+                context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, str(e))
+            except RequestShed as e:
+                logger.warning("%s request shed: %s", self.action_name, e)
+                if context is None:
+                    raise
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+            except InvalidPayload as e:
+                logger.warning("%s invalid request: %s", self.action_name, e)
+                if context is None:
+                    raise
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+    return wrapper
+
+
+class QueueTimeShedder(object):
+    """Rejects the requests that waited more than `max_queue_ms` for a worker."""
+
+    def __init__(self, max_queue_ms=None, name='action'):
+        self.max_queue = float(max_queue_ms) / 1000.0 if max_queue_ms else None
+        self.name = name
+
+    def check(self, queued):
+        metrics_registry.observe('rpc_queue_seconds', queued, action=self.name)
+
+        if self.max_queue is not None and queued > self.max_queue:
+            metrics_registry.inc('rpc_shed', action=self.name)
+            raise RequestShed('{} request shed after {:.1f}ms in queue'.format(self.name, queued * 1000))
+
+
+class LoadSheddingInterceptor(grpc.ServerInterceptor):
+    """Measures the time the unary execute requests wait for a thread of the server.
+
+    The interceptor runs when a request arrives, before it is queued for the
+    thread pool, and the handler it returns runs when a thread picks it up.
+    Health checks and reloads are never shed.
+    """
+
+    def __init__(self, shedder, methods=('_remote_execute', '_remote_execute_batch')):
+        self.shedder = shedder
+        self.methods = methods
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or handler.request_streaming or handler.response_streaming or \
+                handler_call_details.method.rsplit('/', 1)[-1] not in self.methods:
+            return handler
+
+        arrival = time.time()
+        behavior = handler.unary_unary
+
+        def shed(request, context):
+            try:
+                self.shedder.check(time.time() - arrival)
+            except RequestShed as e:
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, str(e))
+
+            if _time_remaining(context) == 0:
+                metrics_registry.inc('rpc_deadline_exceeded', action=self.shedder.name)
+                context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, 'Deadline exceeded while queued')
+
+            return behavior(request, context)
+
+        return grpc.unary_unary_rpc_method_handler(
+            shed, request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer)
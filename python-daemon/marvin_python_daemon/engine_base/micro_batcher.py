@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Micro-batching of online requests.
+
+Messages submitted by concurrent requests are grouped, up to `max_batch_size`
+messages or `max_wait_ms` after the first one, and handed together to the
+batch handler. Only messages with the same params are batched together.
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent import futures
+
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry
+from .load_shedding import DeadlineExceeded
+
+__all__ = ['MicroBatcher']
+
+logger = get_logger('micro_batcher')
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, float('inf'))
+
+
+class MicroBatcher(object):
+    """Groups messages into batches handled by a dispatcher thread.
+
+    Usage:
+
+        batcher = MicroBatcher(handler, max_batch_size=32, max_wait_ms=5)
+        result = batcher.submit(input_message, params).result()
+
+    `handler(input_messages, params)` returns one result per message. When a
+    batch fails its messages are handled one by one, so a bad message only
+    fails its own request. Messages whose deadline passed while waiting are
+    failed with DeadlineExceeded instead of being batched.
+    """
+
+    def __init__(self, handler, max_batch_size, max_wait_ms, name='micro-batcher'):
+        self.handler = handler
+        self.max_batch_size = max(int(max_batch_size), 1)
+        self.max_wait = max(float(max_wait_ms or 0), 0) / 1000.0
+        self.name = name
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, input_message, params, deadline=None):
+        future = futures.Future()
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('MicroBatcher {} is closed'.format(self.name))
+            self._pending.append((input_message, params, future, deadline))
+            self._condition.notify()
+
+        return future
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+
+            if not self._pending:
+                return None, None
+
+            params = self._pending[0][1]
+            deadline = time.time() + self.max_wait
+            while len(self._pending) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch, others = [], deque()
+            while self._pending:
+                item = self._pending.popleft()
+                if len(batch) < self.max_batch_size and item[1] == params:
+                    batch.append(item)
+                else:
+                    others.append(item)
+            self._pending = others
+
+            return batch, params
+
+    def _run(self):
+        while True:
+            batch, params = self._next_batch()
+            if batch is None:
+                return
+
+            batch = [item for item in batch if item[2].set_running_or_notify_cancel() and not self._expired(item)]
+            if batch:
+                metrics_registry.observe('{}_batch_size'.format(self.name), len(batch), buckets=BATCH_SIZE_BUCKETS)
+                self._dispatch(batch, params)
+
+    def _expired(self, item):
+        if item[3] is not None and time.time() >= item[3]:
+            item[2].set_exception(DeadlineExceeded('Deadline exceeded before the {} batch'.format(self.name)))
+            return True
+        return False
+
+    def _dispatch(self, batch, params):
+        try:
+            results = self.handler([item[0] for item in batch], params)
+            if len(results) != len(batch):
+                raise ValueError('Batch of {} messages returned {} results'.format(len(batch), len(results)))
+
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][2].set_exception(e)
+            else:
+                logger.warning("Batch of {} messages failed ({}), handling them one by one".format(len(batch), e))
+                for item in batch:
+                    self._dispatch([item], params)
+            return
+
+        for item, result in zip(batch, results):
+            item[2].set_result(result)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
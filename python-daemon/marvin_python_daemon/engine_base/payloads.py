@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Binary payloads of the online actions.
+
+A `Payload` carries bytes and the encoding used to produce them:
+
+    raw      numpy buffer, with its dtype (e.g. '<f4') and shape
+    msgpack  any msgpack document (requires the msgpack package)
+
+Raw payloads are decoded without copying, the resulting array is read only
+and shares the memory of the request. Payloads that cannot be decoded raise
+InvalidPayload, answered with INVALID_ARGUMENT by the action servers.
+"""
+
+from .stubs.actions_pb2 import Payload
+
+__all__ = ['RAW', 'MSGPACK', 'InvalidPayload', 'decode_payload', 'encode_payload', 'is_array']
+
+RAW = 'raw'
+MSGPACK = 'msgpack'
+
+
+class InvalidPayload(ValueError):
+    pass
+
+
+def _msgpack(error=ValueError):
+    try:
+        import msgpack
+    except ImportError:
+        raise error('The msgpack package is required by msgpack payloads')
+    return msgpack
+
+
+def is_array(obj):
+    return type(obj).__module__ == 'numpy' and type(obj).__name__ == 'ndarray' and obj.dtype.kind != 'O'
+
+
+def decode_payload(payload):
+    encoding = payload.encoding or RAW
+
+    if encoding == RAW:
+        import numpy as np
+        try:
+            array = np.frombuffer(payload.data, dtype=np.dtype(payload.dtype or 'uint8'))
+            return array.reshape(tuple(payload.shape)) if payload.shape else array
+        except (TypeError, ValueError) as e:
+            raise InvalidPayload('Invalid raw payload of dtype {} and shape {}: {}'.format(
+                payload.dtype, list(payload.shape), e))
+
+    if encoding == MSGPACK:
+        # servers without msgpack answer the payloads sent with it as invalid
+        msgpack = _msgpack(error=InvalidPayload)
+        try:
+            return msgpack.unpackb(payload.data, raw=False)
+        except ValueError as e:
+            raise InvalidPayload('Invalid msgpack payload: {}'.format(e))
+
+    raise InvalidPayload('Unknown payload encoding {}'.format(encoding))
+
+
+def encode_payload(obj, encoding=RAW):
+    if encoding == RAW:
+        import numpy as np
+        array = np.ascontiguousarray(obj)
+        return Payload(data=array.tobytes(), encoding=RAW, dtype=array.dtype.str, shape=array.shape)
+
+    if encoding == MSGPACK:
+        return Payload(data=_msgpack().packb(obj, use_bin_type=True), encoding=MSGPACK)
+
+    raise ValueError('Unknown payload encoding {}'.format(encoding))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prediction result cache.
+
+LRU cache of the results of an online action, with an optional time to live
+and memory cap. Configured per action in engine.metadata:
+
+    {"name": "predictor", ..., "predictionCache": {"maxEntries": 10000, "ttlSeconds": 300, "maxBytes": "64M"}}
+"""
+
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import joblib
+
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry, estimate_size
+from .artifact_residency import parse_size
+
+__all__ = ['PredictionCache', 'cache_key']
+
+logger = get_logger('prediction_cache')
+
+
+def cache_key(input_message, params, version):
+    """Canonical hash of a request, the same for equal messages and params."""
+    try:
+        return hashlib.sha256(json.dumps(
+            [input_message, params, version], sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+    except (TypeError, ValueError):
+        # binary payloads, e.g. numpy arrays
+        return joblib.hash([input_message, params, version], hash_name='sha1')
+
+
+class PredictionCache(object):
+    """Thread safe LRU cache with time to live and memory cap.
+
+    Usage:
+
+        cache = PredictionCache(max_entries=1000, ttl_seconds=60, max_bytes=parse_size('64M'))
+        hit, result = cache.get(key)
+        if not hit:
+            cache.put(key, compute())
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=None, max_bytes=None, name='prediction_cache'):
+        self.max_entries = int(max_entries) if max_entries else None
+        self.ttl_seconds = float(ttl_seconds) if ttl_seconds else None
+        self.max_bytes = parse_size(max_bytes)
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size_bytes = 0
+        self._lock = threading.Lock()
+        # key -> (value, expires_at, size)
+        self._entries = OrderedDict()
+
+    @classmethod
+    def from_metadata(cls, options, name='prediction_cache'):
+        return cls(max_entries=options.get('maxEntries', 1024), ttl_seconds=options.get('ttlSeconds'),
+                   max_bytes=options.get('maxBytes'), name=name)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _count(self, counter):
+        setattr(self, counter, getattr(self, counter) + 1)
+        metrics_registry.inc('prediction_cache_{}'.format(counter), cache=self.name)
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def get(self, key):
+        """Returns (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[1] is not None and entry[1] < time.time():
+                self._remove(key)
+                self._count('evictions')
+                entry = None
+
+            if entry is None:
+                self._count('misses')
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._count('hits')
+            return True, entry[0]
+
+    def put(self, key, value):
+        size = estimate_size(value) + len(key) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+            self._entries[key] = (value, expires_at, size)
+            self.size_bytes += size
+
+            while (self.max_entries and len(self._entries) > self.max_entries) or \
+                    (self.max_bytes and self.size_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._count('evictions')
+
+            metrics_registry.set('prediction_cache_bytes', self.size_bytes, cache=self.name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+            metrics_registry.set('prediction_cache_bytes', 0, cache=self.name)
+
+        logger.info("Prediction cache {} cleared".format(self.name))
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._entries), 'bytes': self.size_bytes}
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Thread pools of the action servers per kind of rpc.
+
+Health checks and reloads are served by pools of their own, so they never
+wait behind the execute requests filling the main pool of the server, and a
+long reload never holds a thread meant for predictions:
+
+    execute   the server workers (main pool)
+    health    HEALTH_POOL_WORKERS threads reserved to _health_check
+    reload    a single thread for _remote_reload
+
+Every pool reports its queue depth and the time requests wait in it.
+
+The cap of concurrent rpcs of the server (`rpc_workers`) only applies to the
+execute methods: gRPC core would otherwise reject health checks and reloads
+with RESOURCE_EXHAUSTED as soon as the execute calls reach it. Running the
+methods on their own pools requires a grpcio version honouring the
+`experimental_thread_pool` of the method handlers, older ones run every
+method on the main pool.
+"""
+
+import time
+import inspect
+import threading
+from concurrent import futures
+
+import grpc
+
+from ..common.log import get_logger
+from ..common.metrics import metrics_registry
+
+__all__ = ['MeteredThreadPoolExecutor', 'RpcPoolsInterceptor', 'HEALTH_POOL_WORKERS', 'RELOAD_POOL_WORKERS',
+           'method_pools_supported']
+
+logger = get_logger('rpc_pools')
+
+HEALTH_POOL_WORKERS = 2
+RELOAD_POOL_WORKERS = 1
+
+
+def method_pools_supported():
+    """Whether the installed grpcio runs the methods on the pool of their handler."""
+    try:
+        from grpc import _server
+        return 'experimental_thread_pool' in inspect.getsource(_server)
+    except (ImportError, IOError, TypeError):
+        return False
+
+
+class MeteredThreadPoolExecutor(futures.ThreadPoolExecutor):
+    """ThreadPoolExecutor reporting the tasks waiting for a thread and for how long."""
+
+    def __init__(self, max_workers, name, action='action'):
+        super(MeteredThreadPoolExecutor, self).__init__(
+            max_workers=max_workers, thread_name_prefix='{}-{}'.format(action, name))
+        self.name = name
+        self.action = action
+        self._queued = 0
+        self._pending = 0
+        self._queued_lock = threading.Lock()
+        self._track(0, 0)
+
+    def _track(self, queued, pending):
+        with self._queued_lock:
+            self._queued += queued
+            self._pending += pending
+            metrics_registry.set('rpc_pool_queue_depth', self._queued, pool=self.name, action=self.action)
+
+    @property
+    def queue_depth(self):
+        return self._queued
+
+    @property
+    def pending(self):
+        """Tasks submitted and not finished yet, queued or running."""
+        return self._pending
+
+    def submit(self, fn, *args, **kwargs):
+        submitted = time.time()
+        self._track(1, 1)
+
+        def run():
+            self._track(-1, 0)
+            metrics_registry.observe('rpc_pool_queue_seconds', time.time() - submitted,
+                                     pool=self.name, action=self.action)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._track(0, -1)
+
+        return super(MeteredThreadPoolExecutor, self).submit(run)
+
+
+class RpcPoolsInterceptor(grpc.ServerInterceptor):
+    """Runs the unary rpc methods given in `pools` on their own thread pool.
+
+    Methods not in `pools` keep running on the main pool of the server,
+    rejected with RESOURCE_EXHAUSTED when `max_concurrent_rpcs` of them are
+    already queued or running there.
+    """
+
+    def __init__(self, pools, main_pool=None, max_concurrent_rpcs=None):
+        self.pools = pools
+        self.main_pool = main_pool
+        self.max_concurrent_rpcs = max_concurrent_rpcs
+        self._reject_pool = None
+
+        if pools and not method_pools_supported():
+            logger.warning("The installed grpcio ignores the thread pools of the methods, {} are served by "
+                           "the main pool".format(", ".join(sorted(pools))))
+
+    def _rejected(self, handler):
+        metrics_registry.inc('rpc_rejected', pool=self.main_pool.name, action=self.main_pool.action)
+
+        def reject(request, context):
+            context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, 'Limit of {} concurrent rpcs reached'.format(
+                self.max_concurrent_rpcs))
+
+        def reject_stream(request, context):
+            reject(request, context)
+            yield
+
+        # answered right away, not behind the calls queued in the main pool
+        behavior = reject_stream if handler.response_streaming else reject
+        behavior.experimental_thread_pool = self._get_reject_pool()
+
+        if handler.request_streaming:
+            method_handler = grpc.stream_stream_rpc_method_handler if handler.response_streaming else \
+                grpc.stream_unary_rpc_method_handler
+        else:
+            method_handler = grpc.unary_stream_rpc_method_handler if handler.response_streaming else \
+                grpc.unary_unary_rpc_method_handler
+        return method_handler(behavior, request_deserializer=handler.request_deserializer,
+                              response_serializer=handler.response_serializer)
+
+    def _get_reject_pool(self):
+        if self._reject_pool is None:
+            self._reject_pool = MeteredThreadPoolExecutor(1, 'rejected', action=self.main_pool.action)
+        return self._reject_pool
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return handler
+
+        pool = self.pools.get(handler_call_details.method.rsplit('/', 1)[-1])
+        if pool is None:
+            # calls are accepted one at a time, so the check and the submit to the pool do not race
+            if self.max_concurrent_rpcs and self.main_pool is not None and \
+                    self.main_pool.pending >= self.max_concurrent_rpcs:
+                return self._rejected(handler)
+            return handler
+
+        if handler.request_streaming or handler.response_streaming:
+            return handler
+
+        behavior = handler.unary_unary
+
+        def run(request, context):
+            return behavior(request, context)
+
+        # the grpc server submits the behavior to this pool instead of the main one
+        run.experimental_thread_pool = pool
+
+        return grpc.unary_unary_rpc_method_handler(
+            run, request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer)
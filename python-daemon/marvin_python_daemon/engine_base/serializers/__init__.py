@@ -16,3 +16,5 @@
 # limitations under the License.
 
 from .keras_serializer import KerasSerializer
+from .registry import SerializerRegistry, default_registry
+from .formats import LazyDict
@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Artifact serialization formats.
+
+Every format writes exactly one file per artifact, so artifacts can still be
+copied around by the executor artifact savers.
+"""
+
+import io
+import os
+import json
+import pickle
+import struct
+import sys
+import zipfile
+import threading
+from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import joblib
+from joblib import register_compressor
+from joblib.compressor import CompressorWrapper
+
+__all__ = ['BaseSerializer', 'JoblibSerializer', 'NumpySerializer', 'SparseSerializer',
+           'ParquetSerializer', 'FeatherSerializer', 'PickleSerializer', 'DictSerializer', 'LazyDict']
+
+
+def _register_zstd_compressor():
+    try:
+        import pyzstd
+    except ImportError:
+        return
+
+    class ZstdFile(pyzstd.ZstdFile):
+        def __init__(self, filename, mode='rb', compresslevel=None):
+            super(ZstdFile, self).__init__(filename, mode, level_or_option=compresslevel)
+
+    register_compressor('zstd', CompressorWrapper(
+        ZstdFile, prefix=b'\x28\xb5\x2f\xfd', extension='.zst'))
+
+
+# registered on import so joblib can detect zstd artifacts when loading them
+_register_zstd_compressor()
+
+
+def _is_instance_of(obj, module_name, class_name):
+    # avoid importing optional dependencies only to check the object type
+    module = sys.modules.get(module_name)
+    return module is not None and isinstance(obj, getattr(module, class_name))
+
+
+class BaseSerializer(object):
+    name = None
+    magic = None
+    mmap_support = False
+    lazy_support = False
+    # compressions applied by the format, 'none' writes it uncompressed
+    codecs = {'none': None}
+
+    def accepts(self, obj):
+        return False
+
+    def supports(self, compression):
+        return compression is None or compression in self.codecs
+
+    def codec(self, compression):
+        try:
+            return self.codecs[compression]
+        except KeyError:
+            raise ValueError('Unsupported compression {} of {} artifacts, options are {}'.format(
+                compression, self.name, ', '.join(sorted(self.codecs))))
+
+    def sniff(self, object_file_path, header):
+        return self.magic is not None and header.startswith(self.magic)
+
+    def dump(self, obj, f, **options):
+        raise NotImplementedError()
+
+    def load(self, f, mmap_mode=None):
+        raise NotImplementedError()
+
+
+class JoblibSerializer(BaseSerializer):
+    name = 'joblib'
+    mmap_support = True
+    codecs = {codec: codec for codec in ('none', 'zlib', 'gzip', 'bz2', 'lzma', 'xz', 'lz4', 'zstd')}
+
+    def accepts(self, obj):
+        return type(obj).__module__.startswith('sklearn')
+
+    def dump(self, obj, f, mmap=False, compression='zlib', compression_level=3, protocol=2, **options):
+        self.codec(compression)
+
+        # memory mapped artifacts must be written uncompressed
+        if mmap or compression == 'none':
+            compression, compress = 'none', 0
+        else:
+            compress = (compression, compression_level)
+
+        joblib.dump(obj, f, protocol=protocol, compress=compress)
+        return {'compression': compression, 'compressionLevel': compression_level, 'protocol': protocol}
+
+    def load(self, f, mmap_mode=None):
+        if mmap_mode:
+            return joblib.load(f, mmap_mode=mmap_mode)
+        return joblib.load(f)
+
+
+class NumpySerializer(BaseSerializer):
+    name = 'npy'
+    magic = b'\x93NUMPY'
+    mmap_support = True
+
+    def accepts(self, obj):
+        return _is_instance_of(obj, 'numpy', 'ndarray') and not obj.dtype.hasobject
+
+    def dump(self, obj, f, compression='none', **options):
+        import numpy as np
+        self.codec(compression)
+        np.save(f, obj, allow_pickle=False)
+        return {'compression': compression}
+
+    def load(self, f, mmap_mode=None):
+        import numpy as np
+        return np.load(f, mmap_mode=mmap_mode, allow_pickle=False)
+
+
+class SparseSerializer(BaseSerializer):
+    name = 'npz'
+    magic = b'PK'
+
+    def accepts(self, obj):
+        scipy_sparse = sys.modules.get('scipy.sparse')
+        return scipy_sparse is not None and scipy_sparse.issparse(obj)
+
+    # npz files only support the zip deflate compression
+    codecs = {'none': False, 'zlib': True}
+
+    def dump(self, obj, f, compression='none', **options):
+        from scipy import sparse
+        sparse.save_npz(f, obj, compressed=self.codec(compression))
+        return {'compression': compression}
+
+    def load(self, f, mmap_mode=None):
+        from scipy import sparse
+        return sparse.load_npz(f)
+
+
+class ParquetSerializer(BaseSerializer):
+    name = 'parquet'
+    magic = b'PAR1'
+
+    def accepts(self, obj):
+        if not _is_instance_of(obj, 'pandas', 'DataFrame'):
+            return False
+
+        try:
+            import pyarrow
+        except ImportError:
+            return False
+
+        # parquet only supports string column names
+        return all(isinstance(column, str) for column in obj.columns)
+
+    codecs = {'none': None, 'zlib': 'gzip', 'lz4': 'lz4', 'zstd': 'zstd', 'snappy': 'snappy'}
+
+    def dump(self, obj, f, compression='snappy', compression_level=None, **options):
+        obj.to_parquet(f, compression=self.codec(compression),
+                       compression_level=compression_level if compression != 'none' else None)
+        return {'compression': compression, 'compressionLevel': compression_level}
+
+    def load(self, f, mmap_mode=None):
+        import pandas as pd
+        return pd.read_parquet(f)
+
+
+class FeatherSerializer(BaseSerializer):
+    name = 'feather'
+    magic = b'ARROW1'
+
+    codecs = {'none': 'uncompressed', 'lz4': 'lz4', 'zstd': 'zstd'}
+
+    def dump(self, obj, f, compression='lz4', compression_level=None, **options):
+        obj.to_feather(f, compression=self.codec(compression),
+                       compression_level=compression_level if compression != 'none' else None)
+        return {'compression': compression, 'compressionLevel': compression_level}
+
+    def load(self, f, mmap_mode=None):
+        import pandas as pd
+        return pd.read_feather(f)
+
+
+class PickleSerializer(BaseSerializer):
+    """Pickle with the large buffers (numpy arrays, pandas blocks, ...) kept
+    out-of-band, so they are written and read without extra copies.
+
+    File layout: magic, number of buffers, pickle size, pickle data and then
+    each buffer prefixed by its size.
+    """
+    name = 'pickle'
+    magic = b'MRVNPKL5'
+    protocol = min(5, pickle.HIGHEST_PROTOCOL)
+
+    _size = struct.Struct('<Q')
+
+    def accepts(self, obj):
+        return True
+
+    def dump(self, obj, f, compression='none', **options):
+        self.codec(compression)
+        buffers = []
+        if self.protocol >= 5:
+            data = pickle.dumps(obj, protocol=self.protocol,
+                                buffer_callback=buffers.append)
+        else:
+            data = pickle.dumps(obj, protocol=self.protocol)
+
+        f.write(self.magic)
+        f.write(self._size.pack(len(buffers)))
+        f.write(self._size.pack(len(data)))
+        f.write(data)
+
+        for buffer in buffers:
+            raw = buffer.raw()
+            f.write(self._size.pack(raw.nbytes))
+            f.write(raw)
+
+        return {'compression': compression}
+
+    def load(self, f, mmap_mode=None):
+        if isinstance(f, str):
+            with open(f, 'rb') as _f:
+                return self.load(_f)
+
+        # a single mutable block keeps the loaded arrays writeable
+        content = memoryview(bytearray(f.read()))
+        offset = len(self.magic)
+
+        n_buffers, = self._size.unpack_from(content, offset)
+        data_size, = self._size.unpack_from(content, offset + 8)
+        offset += 16
+        data = content[offset:offset + data_size]
+        offset += data_size
+
+        buffers = []
+        for _ in range(n_buffers):
+            buffer_size, = self._size.unpack_from(content, offset)
+            offset += 8
+            buffers.append(content[offset:offset + buffer_size])
+            offset += buffer_size
+
+        if buffers:
+            return pickle.loads(data, buffers=buffers)
+        return pickle.loads(data)
+
+
+class LazyDict(Mapping):
+    """Read-only mapping over an artifact saved by the dict serializer.
+
+    The file is opened once, so every key comes from the same generation of
+    the artifact even after it is saved again. Each key is deserialized on
+    first access and kept until evicted:
+
+        model = registry.load(path)  # nothing loaded yet
+        model['svm']                 # loads only the svm member
+        model.evict('svm')
+    """
+
+    def __init__(self, object_file_path, registry):
+        # the version the artifact store link points to now, not the one it points to later
+        self.object_file_path = os.path.realpath(object_file_path)
+        self.registry = registry
+        self._cache = {}
+        self._lock = threading.Lock()
+
+        # kept open, new saves replace the file and this one still reads the old content
+        self._file = open(self.object_file_path, 'rb')
+        self._zip = zipfile.ZipFile(self._file)
+        self._keys = json.loads(self._zip.read(DictSerializer.manifest_member).decode('utf-8'),
+                                object_pairs_hook=OrderedDict)
+
+    def __getitem__(self, key):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        serializer = self.registry.get(self._keys[key])
+
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = serializer.load(io.BytesIO(self._zip.read(key)))
+
+            return self._cache[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return "LazyDict({!r}, loaded={})".format(self.object_file_path, self.loaded_keys())
+
+    def loaded_keys(self):
+        return [key for key in self._keys if key in self._cache]
+
+    def evict(self, *keys):
+        """Releases the given keys, or all of them, until next accessed."""
+        with self._lock:
+            for key in keys or list(self._cache.keys()):
+                self._cache.pop(key, None)
+
+    def close(self):
+        with self._lock:
+            self._zip.close()
+            self._file.close()
+
+    def __del__(self):
+        if getattr(self, '_file', None) is not None:
+            self._file.close()
+
+
+class DictSerializer(BaseSerializer):
+    """Serializes each value of a dict with the format picked for its type,
+    storing all of them as members of a single zip file. The compression of
+    the dict is applied by the zip file to every member, which are then
+    serialized uncompressed.
+    """
+    name = 'dict'
+    magic = b'PK'
+    lazy_support = True
+    manifest_member = '__manifest__'
+
+    codecs = {'none': zipfile.ZIP_STORED, 'zlib': zipfile.ZIP_DEFLATED, 'bz2': zipfile.ZIP_BZIP2,
+              'lzma': zipfile.ZIP_LZMA, 'xz': zipfile.ZIP_LZMA}
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def accepts(self, obj):
+        return (type(obj) is dict or isinstance(obj, LazyDict)) and all(
+            isinstance(key, str) and key != self.manifest_member for key in obj.keys())
+
+    def sniff(self, object_file_path, header):
+        if not header.startswith(self.magic):
+            return False
+
+        with zipfile.ZipFile(object_file_path) as zf:
+            return self.manifest_member in zf.namelist()
+
+    def dump(self, obj, f, compression=None, compression_level=None, **options):
+        keys = {}
+        if compression is not None:
+            # compressed once, by the zip file
+            options.update(compression='none')
+
+        with zipfile.ZipFile(f, 'w', self.codec(compression or 'none'), allowZip64=True) as zf:
+            for key, value in obj.items():
+                serializer = self.registry.find(value)
+                with zf.open(key, 'w', force_zip64=True) as member:
+                    serializer.dump(value, member, **options)
+                keys[key] = serializer.name
+
+            zf.writestr(self.manifest_member, json.dumps(keys))
+
+        return {'keys': keys, 'compression': compression or 'none'}
+
+    def load(self, f, mmap_mode=None, lazy=False):
+        if lazy:
+            return LazyDict(f, self.registry)
+
+        obj = {}
+        with zipfile.ZipFile(f) as zf:
+            keys = json.loads(zf.read(self.manifest_member).decode('utf-8'))
+
+            for key, serializer_name in keys.items():
+                serializer = self.registry.get(serializer_name)
+                obj[key] = serializer.load(io.BytesIO(zf.read(key)))
+
+        return obj
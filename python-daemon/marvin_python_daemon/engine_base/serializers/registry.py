@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Serializer registry module.
+
+Picks the artifact serialization format and records the choice in a sidecar
+manifest file (`<artifact>.manifest`) used to load the artifact back.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+from ...common.log import get_logger
+from .formats import (JoblibSerializer, NumpySerializer, SparseSerializer, ParquetSerializer,
+                      FeatherSerializer, PickleSerializer, DictSerializer)
+
+__all__ = ['SerializerRegistry', 'default_registry', 'read_manifest', 'write_manifest', 'io_timer']
+
+logger = get_logger('serializer_registry')
+
+_io_stats = threading.local()
+
+
+@contextmanager
+def io_timer():
+    """Accumulates the time spent reading and writing artifact files in the
+    current thread, apart from the time spent serializing and compressing.
+
+    Usage:
+
+        with io_timer() as stats:
+            registry.dump(obj, path)
+        stats['seconds'], stats['bytes']
+    """
+    previous = getattr(_io_stats, 'stats', None)
+    _io_stats.stats = stats = {'seconds': 0.0, 'bytes': 0}
+    try:
+        yield stats
+    finally:
+        _io_stats.stats = previous
+
+
+class TimedFile(object):
+    """File wrapper accounting the raw reads and writes into io_timer."""
+
+    def __init__(self, f, stats):
+        self._f = f
+        self._stats = stats
+
+    def _timed(self, method, *args):
+        start_time = time.time()
+        result = method(*args)
+        self._stats['seconds'] += time.time() - start_time
+        return result
+
+    def write(self, data):
+        self._stats['bytes'] += memoryview(data).nbytes
+        return self._timed(self._f.write, data)
+
+    def read(self, *args):
+        data = self._timed(self._f.read, *args)
+        self._stats['bytes'] += len(data)
+        return data
+
+    def readinto(self, buffer):
+        size = self._timed(self._f.readinto, buffer)
+        self._stats['bytes'] += size or 0
+        return size
+
+    def readline(self, *args):
+        data = self._timed(self._f.readline, *args)
+        self._stats['bytes'] += len(data)
+        return data
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def get_manifest_file_path(object_file_path):
+    return "{}.manifest".format(object_file_path)
+
+
+def read_manifest(object_file_path):
+    manifest_file_path = get_manifest_file_path(object_file_path)
+    if not os.path.exists(manifest_file_path):
+        return {}
+
+    with open(manifest_file_path, 'r') as f:
+        return json.load(f)
+
+
+def write_manifest(object_file_path, manifest):
+    # replaced atomically, readers never see a half written manifest
+    manifest_file_path = get_manifest_file_path(object_file_path)
+    tmp_file_path = '{}.tmp'.format(manifest_file_path)
+    try:
+        with open(tmp_file_path, 'w') as f:
+            json.dump(manifest, f, sort_keys=True)
+        os.replace(tmp_file_path, manifest_file_path)
+    finally:
+        if os.path.exists(tmp_file_path):
+            os.remove(tmp_file_path)
+
+
+def is_stale_manifest(object_file_path, manifest):
+    # the manifest is replaced before the file it describes, so for a moment
+    # it may describe the next file while the previous one is still in place
+    return 'size' in manifest and os.path.isfile(object_file_path) and \
+        os.path.getsize(object_file_path) != manifest['size']
+
+
+class SerializerRegistry(object):
+    """Registry of artifact serializers.
+
+    Usage:
+
+        registry.dump(obj, path, serializer='auto')
+        obj = registry.load(path)
+
+    With `serializer='auto'` the first registered serializer accepting the
+    object and applying the compression requested is used, falling back to
+    `pickle` or, for compressed artifacts, `joblib`.
+    """
+
+    def __init__(self):
+        self._serializers = OrderedDict()
+
+    def register(self, serializer):
+        self._serializers[serializer.name] = serializer
+        return serializer
+
+    def get(self, name):
+        try:
+            return self._serializers[name]
+        except KeyError:
+            raise ValueError('Unknown serializer: {}'.format(name))
+
+    def find(self, obj, compression=None):
+        for serializer in self._serializers.values():
+            if serializer.accepts(obj) and serializer.supports(compression):
+                return serializer
+
+        for name in ('pickle', 'joblib'):
+            if self.get(name).supports(compression):
+                return self.get(name)
+
+        raise ValueError('Unsupported compression {} of the artifacts'.format(compression))
+
+    def detect(self, object_file_path):
+        if not os.path.exists(object_file_path):
+            # let the default serializer report the missing artifact
+            return self.get('joblib')
+
+        with open(object_file_path, 'rb') as f:
+            header = f.read(16)
+
+        for serializer in self._serializers.values():
+            if serializer.sniff(object_file_path, header):
+                return serializer
+
+        return self.get('joblib')
+
+    def dump(self, obj, object_file_path, serializer='joblib', mmap=False, lazy=False, **options):
+        serializer = self.find(obj, options.get('compression')) if serializer == 'auto' else self.get(serializer)
+        mmap = mmap and serializer.mmap_support
+        lazy = lazy and serializer.lazy_support
+
+        logger.debug("Serializing {} with {} serializer.".format(
+            object_file_path, serializer.name))
+
+        # written aside and renamed, so readers of the previous file (lazy dicts,
+        # memory maps) keep their content and never see a half written one
+        tmp_file_path = '{}.tmp'.format(object_file_path)
+        try:
+            with open(tmp_file_path, 'wb') as f:
+                stats = getattr(_io_stats, 'stats', None)
+                manifest = serializer.dump(obj, TimedFile(f, stats) if stats is not None else f,
+                                           mmap=mmap, **options) or {}
+
+            manifest.update(serializer=serializer.name, mmap=mmap, size=os.path.getsize(tmp_file_path))
+            if lazy:
+                manifest.update(lazy=lazy)
+
+            # the manifest first, a reader never sees the new file with the previous manifest
+            write_manifest(object_file_path, manifest)
+            os.replace(tmp_file_path, object_file_path)
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+
+    def load(self, object_file_path):
+        manifest = read_manifest(object_file_path)
+        if is_stale_manifest(object_file_path, manifest):
+            logger.debug("Manifest of {} describes the next file, detecting its format.".format(object_file_path))
+            manifest = {}
+
+        if 'serializer' in manifest:
+            serializer = self.get(manifest['serializer'])
+        else:
+            # artifacts copied without their manifest or written by older versions
+            serializer = self.detect(object_file_path)
+
+        mmap_mode = 'r' if manifest.get('mmap') else None
+        if manifest.get('lazy'):
+            return serializer.load(object_file_path, mmap_mode=mmap_mode, lazy=True)
+
+        stats = getattr(_io_stats, 'stats', None)
+        if stats is not None and mmap_mode is None and os.path.isfile(object_file_path):
+            with open(object_file_path, 'rb') as f:
+                return serializer.load(TimedFile(f, stats))
+
+        return serializer.load(object_file_path, mmap_mode=mmap_mode)
+
+
+def _build_default_registry():
+    registry = SerializerRegistry()
+
+    # registration order is the lookup order used by find and detect
+    registry.register(NumpySerializer())
+    registry.register(DictSerializer(registry))
+    registry.register(SparseSerializer())
+    registry.register(ParquetSerializer())
+    registry.register(FeatherSerializer())
+    registry.register(JoblibSerializer())
+    registry.register(PickleSerializer())
+
+    return registry
+
+
+default_registry = _build_default_registry()
@@ -1,14 +1,15 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: actions.proto
 
-from google.protobuf import descriptor_pb2
 from google.protobuf import symbol_database as _symbol_database
 from google.protobuf import reflection as _reflection
 from google.protobuf import message as _message
 from google.protobuf import descriptor as _descriptor
 import sys
 _b = sys.version_info[0] < 3 and (
-    lambda x: x) or (lambda x: x.encode('latin1'))
+    lambda x: x) or (
+        lambda x: x.encode('latin1'))
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
@@ -18,7 +19,8 @@ DESCRIPTOR = _descriptor.FileDescriptor(
     name='actions.proto',
     package='',
     syntax='proto3',
-    serialized_pb=_b('\n\ractions.proto\"6\n\x13OnlineActionRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0e\n\x06params\x18\x02 \x01(\t\"\'\n\x14OnlineActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"$\n\x12\x42\x61tchActionRequest\x12\x0e\n\x06params\x18\x01 \x01(\t\"&\n\x13\x42\x61tchActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"4\n\rReloadRequest\x12\x10\n\x08protocol\x18\x01 \x01(\t\x12\x11\n\tartifacts\x18\x02 \x01(\t\"!\n\x0eReloadResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"\'\n\x12HealthCheckRequest\x12\x11\n\tartifacts\x18\x02 \x01(\t\"]\n\x13HealthCheckResponse\x12+\n\x06status\x18\x01 \x01(\x0e\x32\x1b.HealthCheckResponse.Status\"\x19\n\x06Status\x12\x06\n\x02OK\x10\x00\x12\x07\n\x03NOK\x10\x01\x32\xca\x01\n\x13OnlineActionHandler\x12@\n\x0f_remote_execute\x12\x14.OnlineActionRequest\x1a\x15.OnlineActionResponse\"\x00\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x32\xc7\x01\n\x12\x42\x61tchActionHandler\x12>\n\x0f_remote_execute\x12\x13.BatchActionRequest\x1a\x14.BatchActionResponse\"\x00\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x62\x06proto3')
+    serialized_options=None,
+    serialized_pb=_b('\n\ractions.proto\"G\n\x07Payload\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\x12\x10\n\x08\x65ncoding\x18\x02 \x01(\t\x12\r\n\x05\x64type\x18\x03 \x01(\t\x12\r\n\x05shape\x18\x04 \x03(\x03\"Q\n\x13OnlineActionRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0e\n\x06params\x18\x02 \x01(\t\x12\x19\n\x07payload\x18\x03 \x01(\x0b\x32\x08.Payload\"B\n\x14OnlineActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x19\n\x07payload\x18\x02 \x01(\x0b\x32\x08.Payload\"X\n\x18OnlineBatchActionRequest\x12\x10\n\x08messages\x18\x01 \x03(\t\x12\x0e\n\x06params\x18\x02 \x01(\t\x12\x1a\n\x08payloads\x18\x03 \x03(\x0b\x32\x08.Payload\"-\n\x19OnlineBatchActionResponse\x12\x10\n\x08messages\x18\x01 \x03(\t\"i\n\x13OnlineStreamRequest\x12\x16\n\x0e\x63orrelation_id\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0e\n\x06params\x18\x03 \x01(\t\x12\x19\n\x07payload\x18\x04 \x01(\x0b\x32\x08.Payload\"i\n\x14OnlineStreamResponse\x12\x16\n\x0e\x63orrelation_id\x18\x01 \x01(\t\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\r\n\x05\x65rror\x18\x03 \x01(\t\x12\x19\n\x07payload\x18\x04 \x01(\x0b\x32\x08.Payload\"$\n\x12\x42\x61tchActionRequest\x12\x0e\n\x06params\x18\x01 \x01(\t\"&\n\x13\x42\x61tchActionResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"4\n\rReloadRequest\x12\x10\n\x08protocol\x18\x01 \x01(\t\x12\x11\n\tartifacts\x18\x02 \x01(\t\"!\n\x0eReloadResponse\x12\x0f\n\x07message\x18\x01 \x01(\t\"\'\n\x12HealthCheckRequest\x12\x11\n\tartifacts\x18\x02 \x01(\t\"z\n\x13HealthCheckResponse\x12+\n\x06status\x18\x01 \x01(\x0e\x32\x1b.HealthCheckResponse.Status\x12\x0c\n\x04live\x18\x02 \x01(\x08\x12\r\n\x05ready\x18\x03 \x01(\x08\"\x19\n\x06Status\x12\x06\n\x02OK\x10\x00\x12\x07\n\x03NOK\x10\x01\x32\xe9\x02\n\x13OnlineActionHandler\x12@\n\x0f_remote_execute\x12\x14.OnlineActionRequest\x1a\x15.OnlineActionResponse\"\x00\x12P\n\x15_remote_execute_batch\x12\x19.OnlineBatchActionRequest\x1a\x1a.OnlineBatchActionResponse\"\x00\x12K\n\x16_remote_execute_stream\x12\x14.OnlineStreamRequest\x1a\x15.OnlineStreamResponse\"\x00(\x01\x30\x01\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x32\xc7\x01\n\x12\x42\x61tchActionHandler\x12>\n\x0f_remote_execute\x12\x13.BatchActionRequest\x1a\x14.BatchActionResponse\"\x00\x12\x33\n\x0e_remote_reload\x12\x0e.ReloadRequest\x1a\x0f.ReloadResponse\"\x00\x12<\n\r_health_check\x12\x13.HealthCheckRequest\x1a\x14.HealthCheckResponse\"\x00\x62\x06proto3')
 )
 
 
@@ -30,21 +32,73 @@ _HEALTHCHECKRESPONSE_STATUS = _descriptor.EnumDescriptor(
     values=[
         _descriptor.EnumValueDescriptor(
             name='OK', index=0, number=0,
-            options=None,
+            serialized_options=None,
             type=None),
         _descriptor.EnumValueDescriptor(
             name='NOK', index=1, number=1,
-            options=None,
+            serialized_options=None,
             type=None),
     ],
     containing_type=None,
-    options=None,
-    serialized_start=390,
-    serialized_end=415,
+    serialized_options=None,
+    serialized_start=897,
+    serialized_end=922,
 )
 _sym_db.RegisterEnumDescriptor(_HEALTHCHECKRESPONSE_STATUS)
 
 
+_PAYLOAD = _descriptor.Descriptor(
+    name='Payload',
+    full_name='Payload',
+    filename=None,
+    file=DESCRIPTOR,
+    containing_type=None,
+    fields=[
+        _descriptor.FieldDescriptor(
+            name='data', full_name='Payload.data', index=0,
+            number=1, type=12, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b(""),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='encoding', full_name='Payload.encoding', index=1,
+            number=2, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='dtype', full_name='Payload.dtype', index=2,
+            number=3, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='shape', full_name='Payload.shape', index=3,
+            number=4, type=3, cpp_type=2, label=3,
+            has_default_value=False, default_value=[],
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+    ],
+    extensions=[
+    ],
+    nested_types=[],
+    enum_types=[
+    ],
+    serialized_options=None,
+    is_extendable=False,
+    syntax='proto3',
+    extension_ranges=[],
+    oneofs=[
+    ],
+    serialized_start=17,
+    serialized_end=88,
+)
+
+
 _ONLINEACTIONREQUEST = _descriptor.Descriptor(
     name='OnlineActionRequest',
     full_name='OnlineActionRequest',
@@ -58,28 +112,35 @@ _ONLINEACTIONREQUEST = _descriptor.Descriptor(
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
         _descriptor.FieldDescriptor(
             name='params', full_name='OnlineActionRequest.params', index=1,
             number=2, type=9, cpp_type=9, label=1,
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='payload', full_name='OnlineActionRequest.payload', index=2,
+            number=3, type=11, cpp_type=10, label=1,
+            has_default_value=False, default_value=None,
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
     nested_types=[],
     enum_types=[
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=17,
-    serialized_end=71,
+    serialized_start=90,
+    serialized_end=171,
 )
 
 
@@ -96,21 +157,208 @@ _ONLINEACTIONRESPONSE = _descriptor.Descriptor(
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='payload', full_name='OnlineActionResponse.payload', index=1,
+            number=2, type=11, cpp_type=10, label=1,
+            has_default_value=False, default_value=None,
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+    ],
+    extensions=[
+    ],
+    nested_types=[],
+    enum_types=[
+    ],
+    serialized_options=None,
+    is_extendable=False,
+    syntax='proto3',
+    extension_ranges=[],
+    oneofs=[
+    ],
+    serialized_start=173,
+    serialized_end=239,
+)
+
+
+_ONLINEBATCHACTIONREQUEST = _descriptor.Descriptor(
+    name='OnlineBatchActionRequest',
+    full_name='OnlineBatchActionRequest',
+    filename=None,
+    file=DESCRIPTOR,
+    containing_type=None,
+    fields=[
+        _descriptor.FieldDescriptor(
+            name='messages', full_name='OnlineBatchActionRequest.messages', index=0,
+            number=1, type=9, cpp_type=9, label=3,
+            has_default_value=False, default_value=[],
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='params', full_name='OnlineBatchActionRequest.params', index=1,
+            number=2, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='payloads', full_name='OnlineBatchActionRequest.payloads', index=2,
+            number=3, type=11, cpp_type=10, label=3,
+            has_default_value=False, default_value=[],
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+    ],
+    extensions=[
+    ],
+    nested_types=[],
+    enum_types=[
+    ],
+    serialized_options=None,
+    is_extendable=False,
+    syntax='proto3',
+    extension_ranges=[],
+    oneofs=[
+    ],
+    serialized_start=241,
+    serialized_end=329,
+)
+
+
+_ONLINEBATCHACTIONRESPONSE = _descriptor.Descriptor(
+    name='OnlineBatchActionResponse',
+    full_name='OnlineBatchActionResponse',
+    filename=None,
+    file=DESCRIPTOR,
+    containing_type=None,
+    fields=[
+        _descriptor.FieldDescriptor(
+            name='messages', full_name='OnlineBatchActionResponse.messages', index=0,
+            number=1, type=9, cpp_type=9, label=3,
+            has_default_value=False, default_value=[],
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+    ],
+    extensions=[
+    ],
+    nested_types=[],
+    enum_types=[
+    ],
+    serialized_options=None,
+    is_extendable=False,
+    syntax='proto3',
+    extension_ranges=[],
+    oneofs=[
+    ],
+    serialized_start=331,
+    serialized_end=376,
+)
+
+
+_ONLINESTREAMREQUEST = _descriptor.Descriptor(
+    name='OnlineStreamRequest',
+    full_name='OnlineStreamRequest',
+    filename=None,
+    file=DESCRIPTOR,
+    containing_type=None,
+    fields=[
+        _descriptor.FieldDescriptor(
+            name='correlation_id', full_name='OnlineStreamRequest.correlation_id', index=0,
+            number=1, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='message', full_name='OnlineStreamRequest.message', index=1,
+            number=2, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='params', full_name='OnlineStreamRequest.params', index=2,
+            number=3, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='payload', full_name='OnlineStreamRequest.payload', index=3,
+            number=4, type=11, cpp_type=10, label=1,
+            has_default_value=False, default_value=None,
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
     nested_types=[],
     enum_types=[
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=73,
-    serialized_end=112,
+    serialized_start=378,
+    serialized_end=483,
+)
+
+
+_ONLINESTREAMRESPONSE = _descriptor.Descriptor(
+    name='OnlineStreamResponse',
+    full_name='OnlineStreamResponse',
+    filename=None,
+    file=DESCRIPTOR,
+    containing_type=None,
+    fields=[
+        _descriptor.FieldDescriptor(
+            name='correlation_id', full_name='OnlineStreamResponse.correlation_id', index=0,
+            number=1, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='message', full_name='OnlineStreamResponse.message', index=1,
+            number=2, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='error', full_name='OnlineStreamResponse.error', index=2,
+            number=3, type=9, cpp_type=9, label=1,
+            has_default_value=False, default_value=_b("").decode('utf-8'),
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='payload', full_name='OnlineStreamResponse.payload', index=3,
+            number=4, type=11, cpp_type=10, label=1,
+            has_default_value=False, default_value=None,
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+    ],
+    extensions=[
+    ],
+    nested_types=[],
+    enum_types=[
+    ],
+    serialized_options=None,
+    is_extendable=False,
+    syntax='proto3',
+    extension_ranges=[],
+    oneofs=[
+    ],
+    serialized_start=485,
+    serialized_end=590,
 )
 
 
@@ -127,21 +375,21 @@ _BATCHACTIONREQUEST = _descriptor.Descriptor(
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
     nested_types=[],
     enum_types=[
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=114,
-    serialized_end=150,
+    serialized_start=592,
+    serialized_end=628,
 )
 
 
@@ -158,21 +406,21 @@ _BATCHACTIONRESPONSE = _descriptor.Descriptor(
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
     nested_types=[],
     enum_types=[
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=152,
-    serialized_end=190,
+    serialized_start=630,
+    serialized_end=668,
 )
 
 
@@ -189,28 +437,28 @@ _RELOADREQUEST = _descriptor.Descriptor(
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
         _descriptor.FieldDescriptor(
             name='artifacts', full_name='ReloadRequest.artifacts', index=1,
             number=2, type=9, cpp_type=9, label=1,
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
     nested_types=[],
     enum_types=[
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=192,
-    serialized_end=244,
+    serialized_start=670,
+    serialized_end=722,
 )
 
 
@@ -227,21 +475,21 @@ _RELOADRESPONSE = _descriptor.Descriptor(
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
     nested_types=[],
     enum_types=[
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=246,
-    serialized_end=279,
+    serialized_start=724,
+    serialized_end=757,
 )
 
 
@@ -258,21 +506,21 @@ _HEALTHCHECKREQUEST = _descriptor.Descriptor(
             has_default_value=False, default_value=_b("").decode('utf-8'),
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
     nested_types=[],
     enum_types=[
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=281,
-    serialized_end=320,
+    serialized_start=759,
+    serialized_end=798,
 )
 
 
@@ -289,7 +537,21 @@ _HEALTHCHECKRESPONSE = _descriptor.Descriptor(
             has_default_value=False, default_value=0,
             message_type=None, enum_type=None, containing_type=None,
             is_extension=False, extension_scope=None,
-            options=None),
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='live', full_name='HealthCheckResponse.live', index=1,
+            number=2, type=8, cpp_type=7, label=1,
+            has_default_value=False, default_value=False,
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
+        _descriptor.FieldDescriptor(
+            name='ready', full_name='HealthCheckResponse.ready', index=2,
+            number=3, type=8, cpp_type=7, label=1,
+            has_default_value=False, default_value=False,
+            message_type=None, enum_type=None, containing_type=None,
+            is_extension=False, extension_scope=None,
+            serialized_options=None, file=DESCRIPTOR),
     ],
     extensions=[
     ],
@@ -297,20 +559,30 @@ _HEALTHCHECKRESPONSE = _descriptor.Descriptor(
     enum_types=[
         _HEALTHCHECKRESPONSE_STATUS,
     ],
-    options=None,
+    serialized_options=None,
     is_extendable=False,
     syntax='proto3',
     extension_ranges=[],
     oneofs=[
     ],
-    serialized_start=322,
-    serialized_end=415,
+    serialized_start=800,
+    serialized_end=922,
 )
 
+_ONLINEACTIONREQUEST.fields_by_name['payload'].message_type = _PAYLOAD
+_ONLINEACTIONRESPONSE.fields_by_name['payload'].message_type = _PAYLOAD
+_ONLINEBATCHACTIONREQUEST.fields_by_name['payloads'].message_type = _PAYLOAD
+_ONLINESTREAMREQUEST.fields_by_name['payload'].message_type = _PAYLOAD
+_ONLINESTREAMRESPONSE.fields_by_name['payload'].message_type = _PAYLOAD
 _HEALTHCHECKRESPONSE.fields_by_name['status'].enum_type = _HEALTHCHECKRESPONSE_STATUS
 _HEALTHCHECKRESPONSE_STATUS.containing_type = _HEALTHCHECKRESPONSE
+DESCRIPTOR.message_types_by_name['Payload'] = _PAYLOAD
 DESCRIPTOR.message_types_by_name['OnlineActionRequest'] = _ONLINEACTIONREQUEST
 DESCRIPTOR.message_types_by_name['OnlineActionResponse'] = _ONLINEACTIONRESPONSE
+DESCRIPTOR.message_types_by_name['OnlineBatchActionRequest'] = _ONLINEBATCHACTIONREQUEST
+DESCRIPTOR.message_types_by_name['OnlineBatchActionResponse'] = _ONLINEBATCHACTIONRESPONSE
+DESCRIPTOR.message_types_by_name['OnlineStreamRequest'] = _ONLINESTREAMREQUEST
+DESCRIPTOR.message_types_by_name['OnlineStreamResponse'] = _ONLINESTREAMRESPONSE
 DESCRIPTOR.message_types_by_name['BatchActionRequest'] = _BATCHACTIONREQUEST
 DESCRIPTOR.message_types_by_name['BatchActionResponse'] = _BATCHACTIONRESPONSE
 DESCRIPTOR.message_types_by_name['ReloadRequest'] = _RELOADREQUEST
@@ -319,60 +591,95 @@ DESCRIPTOR.message_types_by_name['HealthCheckRequest'] = _HEALTHCHECKREQUEST
 DESCRIPTOR.message_types_by_name['HealthCheckResponse'] = _HEALTHCHECKRESPONSE
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
-OnlineActionRequest = _reflection.GeneratedProtocolMessageType('OnlineActionRequest', (_message.Message,), dict(
-    DESCRIPTOR=_ONLINEACTIONREQUEST,
-    __module__='actions_pb2'
+Payload = _reflection.GeneratedProtocolMessageType('Payload', (_message.Message,), {
+    'DESCRIPTOR': _PAYLOAD,
+    '__module__': 'actions_pb2'
+    # @@protoc_insertion_point(class_scope:Payload)
+})
+_sym_db.RegisterMessage(Payload)
+
+OnlineActionRequest = _reflection.GeneratedProtocolMessageType('OnlineActionRequest', (_message.Message,), {
+    'DESCRIPTOR': _ONLINEACTIONREQUEST,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:OnlineActionRequest)
-))
+})
 _sym_db.RegisterMessage(OnlineActionRequest)
 
-OnlineActionResponse = _reflection.GeneratedProtocolMessageType('OnlineActionResponse', (_message.Message,), dict(
-    DESCRIPTOR=_ONLINEACTIONRESPONSE,
-    __module__='actions_pb2'
+OnlineActionResponse = _reflection.GeneratedProtocolMessageType('OnlineActionResponse', (_message.Message,), {
+    'DESCRIPTOR': _ONLINEACTIONRESPONSE,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:OnlineActionResponse)
-))
+})
 _sym_db.RegisterMessage(OnlineActionResponse)
 
-BatchActionRequest = _reflection.GeneratedProtocolMessageType('BatchActionRequest', (_message.Message,), dict(
-    DESCRIPTOR=_BATCHACTIONREQUEST,
-    __module__='actions_pb2'
+OnlineBatchActionRequest = _reflection.GeneratedProtocolMessageType('OnlineBatchActionRequest', (_message.Message,), {
+    'DESCRIPTOR': _ONLINEBATCHACTIONREQUEST,
+    '__module__': 'actions_pb2'
+    # @@protoc_insertion_point(class_scope:OnlineBatchActionRequest)
+})
+_sym_db.RegisterMessage(OnlineBatchActionRequest)
+
+OnlineBatchActionResponse = _reflection.GeneratedProtocolMessageType('OnlineBatchActionResponse', (_message.Message,), {
+    'DESCRIPTOR': _ONLINEBATCHACTIONRESPONSE,
+    '__module__': 'actions_pb2'
+    # @@protoc_insertion_point(class_scope:OnlineBatchActionResponse)
+})
+_sym_db.RegisterMessage(OnlineBatchActionResponse)
+
+OnlineStreamRequest = _reflection.GeneratedProtocolMessageType('OnlineStreamRequest', (_message.Message,), {
+    'DESCRIPTOR': _ONLINESTREAMREQUEST,
+    '__module__': 'actions_pb2'
+    # @@protoc_insertion_point(class_scope:OnlineStreamRequest)
+})
+_sym_db.RegisterMessage(OnlineStreamRequest)
+
+OnlineStreamResponse = _reflection.GeneratedProtocolMessageType('OnlineStreamResponse', (_message.Message,), {
+    'DESCRIPTOR': _ONLINESTREAMRESPONSE,
+    '__module__': 'actions_pb2'
+    # @@protoc_insertion_point(class_scope:OnlineStreamResponse)
+})
+_sym_db.RegisterMessage(OnlineStreamResponse)
+
+BatchActionRequest = _reflection.GeneratedProtocolMessageType('BatchActionRequest', (_message.Message,), {
+    'DESCRIPTOR': _BATCHACTIONREQUEST,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:BatchActionRequest)
-))
+})
 _sym_db.RegisterMessage(BatchActionRequest)
 
-BatchActionResponse = _reflection.GeneratedProtocolMessageType('BatchActionResponse', (_message.Message,), dict(
-    DESCRIPTOR=_BATCHACTIONRESPONSE,
-    __module__='actions_pb2'
+BatchActionResponse = _reflection.GeneratedProtocolMessageType('BatchActionResponse', (_message.Message,), {
+    'DESCRIPTOR': _BATCHACTIONRESPONSE,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:BatchActionResponse)
-))
+})
 _sym_db.RegisterMessage(BatchActionResponse)
 
-ReloadRequest = _reflection.GeneratedProtocolMessageType('ReloadRequest', (_message.Message,), dict(
-    DESCRIPTOR=_RELOADREQUEST,
-    __module__='actions_pb2'
+ReloadRequest = _reflection.GeneratedProtocolMessageType('ReloadRequest', (_message.Message,), {
+    'DESCRIPTOR': _RELOADREQUEST,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:ReloadRequest)
-))
+})
 _sym_db.RegisterMessage(ReloadRequest)
 
-ReloadResponse = _reflection.GeneratedProtocolMessageType('ReloadResponse', (_message.Message,), dict(
-    DESCRIPTOR=_RELOADRESPONSE,
-    __module__='actions_pb2'
+ReloadResponse = _reflection.GeneratedProtocolMessageType('ReloadResponse', (_message.Message,), {
+    'DESCRIPTOR': _RELOADRESPONSE,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:ReloadResponse)
-))
+})
 _sym_db.RegisterMessage(ReloadResponse)
 
-HealthCheckRequest = _reflection.GeneratedProtocolMessageType('HealthCheckRequest', (_message.Message,), dict(
-    DESCRIPTOR=_HEALTHCHECKREQUEST,
-    __module__='actions_pb2'
+HealthCheckRequest = _reflection.GeneratedProtocolMessageType('HealthCheckRequest', (_message.Message,), {
+    'DESCRIPTOR': _HEALTHCHECKREQUEST,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:HealthCheckRequest)
-))
+})
 _sym_db.RegisterMessage(HealthCheckRequest)
 
-HealthCheckResponse = _reflection.GeneratedProtocolMessageType('HealthCheckResponse', (_message.Message,), dict(
-    DESCRIPTOR=_HEALTHCHECKRESPONSE,
-    __module__='actions_pb2'
+HealthCheckResponse = _reflection.GeneratedProtocolMessageType('HealthCheckResponse', (_message.Message,), {
+    'DESCRIPTOR': _HEALTHCHECKRESPONSE,
+    '__module__': 'actions_pb2'
     # @@protoc_insertion_point(class_scope:HealthCheckResponse)
-))
+})
 _sym_db.RegisterMessage(HealthCheckResponse)
 
 
@@ -381,9 +688,9 @@ _ONLINEACTIONHANDLER = _descriptor.ServiceDescriptor(
     full_name='OnlineActionHandler',
     file=DESCRIPTOR,
     index=0,
-    options=None,
-    serialized_start=418,
-    serialized_end=620,
+    serialized_options=None,
+    serialized_start=925,
+    serialized_end=1286,
     methods=[
         _descriptor.MethodDescriptor(
             name='_remote_execute',
@@ -392,25 +699,43 @@ _ONLINEACTIONHANDLER = _descriptor.ServiceDescriptor(
             containing_service=None,
             input_type=_ONLINEACTIONREQUEST,
             output_type=_ONLINEACTIONRESPONSE,
-            options=None,
+            serialized_options=None,
+        ),
+        _descriptor.MethodDescriptor(
+            name='_remote_execute_batch',
+            full_name='OnlineActionHandler._remote_execute_batch',
+            index=1,
+            containing_service=None,
+            input_type=_ONLINEBATCHACTIONREQUEST,
+            output_type=_ONLINEBATCHACTIONRESPONSE,
+            serialized_options=None,
+        ),
+        _descriptor.MethodDescriptor(
+            name='_remote_execute_stream',
+            full_name='OnlineActionHandler._remote_execute_stream',
+            index=2,
+            containing_service=None,
+            input_type=_ONLINESTREAMREQUEST,
+            output_type=_ONLINESTREAMRESPONSE,
+            serialized_options=None,
         ),
         _descriptor.MethodDescriptor(
             name='_remote_reload',
             full_name='OnlineActionHandler._remote_reload',
-            index=1,
+            index=3,
             containing_service=None,
             input_type=_RELOADREQUEST,
             output_type=_RELOADRESPONSE,
-            options=None,
+            serialized_options=None,
         ),
         _descriptor.MethodDescriptor(
             name='_health_check',
             full_name='OnlineActionHandler._health_check',
-            index=2,
+            index=4,
             containing_service=None,
             input_type=_HEALTHCHECKREQUEST,
             output_type=_HEALTHCHECKRESPONSE,
-            options=None,
+            serialized_options=None,
         ),
     ])
 _sym_db.RegisterServiceDescriptor(_ONLINEACTIONHANDLER)
@@ -423,9 +748,9 @@ _BATCHACTIONHANDLER = _descriptor.ServiceDescriptor(
     full_name='BatchActionHandler',
     file=DESCRIPTOR,
     index=1,
-    options=None,
-    serialized_start=623,
-    serialized_end=822,
+    serialized_options=None,
+    serialized_start=1289,
+    serialized_end=1488,
     methods=[
         _descriptor.MethodDescriptor(
             name='_remote_execute',
@@ -434,7 +759,7 @@ _BATCHACTIONHANDLER = _descriptor.ServiceDescriptor(
             containing_service=None,
             input_type=_BATCHACTIONREQUEST,
             output_type=_BATCHACTIONRESPONSE,
-            options=None,
+            serialized_options=None,
         ),
         _descriptor.MethodDescriptor(
             name='_remote_reload',
@@ -443,7 +768,7 @@ _BATCHACTIONHANDLER = _descriptor.ServiceDescriptor(
             containing_service=None,
             input_type=_RELOADREQUEST,
             output_type=_RELOADRESPONSE,
-            options=None,
+            serialized_options=None,
         ),
         _descriptor.MethodDescriptor(
             name='_health_check',
@@ -452,369 +777,11 @@ _BATCHACTIONHANDLER = _descriptor.ServiceDescriptor(
             containing_service=None,
             input_type=_HEALTHCHECKREQUEST,
             output_type=_HEALTHCHECKRESPONSE,
-            options=None,
+            serialized_options=None,
         ),
     ])
 _sym_db.RegisterServiceDescriptor(_BATCHACTIONHANDLER)
 
 DESCRIPTOR.services_by_name['BatchActionHandler'] = _BATCHACTIONHANDLER
 
-try:
-    # THESE ELEMENTS WILL BE DEPRECATED.
-    # Please use the generated *_pb2_grpc.py files instead.
-    import grpc
-    from grpc.beta import implementations as beta_implementations
-    from grpc.beta import interfaces as beta_interfaces
-    from grpc.framework.common import cardinality
-    from grpc.framework.interfaces.face import utilities as face_utilities
-
-    class OnlineActionHandlerStub(object):
-        # missing associated documentation comment in .proto file
-        pass
-
-        def __init__(self, channel):
-            """Constructor.
-
-            Args:
-              channel: A grpc.Channel.
-            """
-            self._remote_execute = channel.unary_unary(
-                '/OnlineActionHandler/_remote_execute',
-                request_serializer=OnlineActionRequest.SerializeToString,
-                response_deserializer=OnlineActionResponse.FromString,
-            )
-            self._remote_reload = channel.unary_unary(
-                '/OnlineActionHandler/_remote_reload',
-                request_serializer=ReloadRequest.SerializeToString,
-                response_deserializer=ReloadResponse.FromString,
-            )
-            self._health_check = channel.unary_unary(
-                '/OnlineActionHandler/_health_check',
-                request_serializer=HealthCheckRequest.SerializeToString,
-                response_deserializer=HealthCheckResponse.FromString,
-            )
-
-    class OnlineActionHandlerServicer(object):
-        # missing associated documentation comment in .proto file
-        pass
-
-        def _remote_execute(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-            context.set_details('Method not implemented!')
-            raise NotImplementedError('Method not implemented!')
-
-        def _remote_reload(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-            context.set_details('Method not implemented!')
-            raise NotImplementedError('Method not implemented!')
-
-        def _health_check(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-            context.set_details('Method not implemented!')
-            raise NotImplementedError('Method not implemented!')
-
-    def add_OnlineActionHandlerServicer_to_server(servicer, server):
-        rpc_method_handlers = {
-            '_remote_execute': grpc.unary_unary_rpc_method_handler(
-                servicer._remote_execute,
-                request_deserializer=OnlineActionRequest.FromString,
-                response_serializer=OnlineActionResponse.SerializeToString,
-            ),
-            '_remote_reload': grpc.unary_unary_rpc_method_handler(
-                servicer._remote_reload,
-                request_deserializer=ReloadRequest.FromString,
-                response_serializer=ReloadResponse.SerializeToString,
-            ),
-            '_health_check': grpc.unary_unary_rpc_method_handler(
-                servicer._health_check,
-                request_deserializer=HealthCheckRequest.FromString,
-                response_serializer=HealthCheckResponse.SerializeToString,
-            ),
-        }
-        generic_handler = grpc.method_handlers_generic_handler(
-            'OnlineActionHandler', rpc_method_handlers)
-        server.add_generic_rpc_handlers((generic_handler,))
-
-    class BatchActionHandlerStub(object):
-        # missing associated documentation comment in .proto file
-        pass
-
-        def __init__(self, channel):
-            """Constructor.
-
-            Args:
-              channel: A grpc.Channel.
-            """
-            self._remote_execute = channel.unary_unary(
-                '/BatchActionHandler/_remote_execute',
-                request_serializer=BatchActionRequest.SerializeToString,
-                response_deserializer=BatchActionResponse.FromString,
-            )
-            self._remote_reload = channel.unary_unary(
-                '/BatchActionHandler/_remote_reload',
-                request_serializer=ReloadRequest.SerializeToString,
-                response_deserializer=ReloadResponse.FromString,
-            )
-            self._health_check = channel.unary_unary(
-                '/BatchActionHandler/_health_check',
-                request_serializer=HealthCheckRequest.SerializeToString,
-                response_deserializer=HealthCheckResponse.FromString,
-            )
-
-    class BatchActionHandlerServicer(object):
-        # missing associated documentation comment in .proto file
-        pass
-
-        def _remote_execute(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-            context.set_details('Method not implemented!')
-            raise NotImplementedError('Method not implemented!')
-
-        def _remote_reload(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-            context.set_details('Method not implemented!')
-            raise NotImplementedError('Method not implemented!')
-
-        def _health_check(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-            context.set_details('Method not implemented!')
-            raise NotImplementedError('Method not implemented!')
-
-    def add_BatchActionHandlerServicer_to_server(servicer, server):
-        rpc_method_handlers = {
-            '_remote_execute': grpc.unary_unary_rpc_method_handler(
-                servicer._remote_execute,
-                request_deserializer=BatchActionRequest.FromString,
-                response_serializer=BatchActionResponse.SerializeToString,
-            ),
-            '_remote_reload': grpc.unary_unary_rpc_method_handler(
-                servicer._remote_reload,
-                request_deserializer=ReloadRequest.FromString,
-                response_serializer=ReloadResponse.SerializeToString,
-            ),
-            '_health_check': grpc.unary_unary_rpc_method_handler(
-                servicer._health_check,
-                request_deserializer=HealthCheckRequest.FromString,
-                response_serializer=HealthCheckResponse.SerializeToString,
-            ),
-        }
-        generic_handler = grpc.method_handlers_generic_handler(
-            'BatchActionHandler', rpc_method_handlers)
-        server.add_generic_rpc_handlers((generic_handler,))
-
-    class BetaOnlineActionHandlerServicer(object):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This class was generated
-        only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0."""
-        # missing associated documentation comment in .proto file
-        pass
-
-        def _remote_execute(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.code(beta_interfaces.StatusCode.UNIMPLEMENTED)
-
-        def _remote_reload(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.code(beta_interfaces.StatusCode.UNIMPLEMENTED)
-
-        def _health_check(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.code(beta_interfaces.StatusCode.UNIMPLEMENTED)
-
-    class BetaOnlineActionHandlerStub(object):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This class was generated
-        only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0."""
-        # missing associated documentation comment in .proto file
-        pass
-
-        def _remote_execute(self, request, timeout, metadata=None, with_call=False, protocol_options=None):
-            # missing associated documentation comment in .proto file
-            pass
-            raise NotImplementedError()
-        _remote_execute.future = None
-
-        def _remote_reload(self, request, timeout, metadata=None, with_call=False, protocol_options=None):
-            # missing associated documentation comment in .proto file
-            pass
-            raise NotImplementedError()
-        _remote_reload.future = None
-
-        def _health_check(self, request, timeout, metadata=None, with_call=False, protocol_options=None):
-            # missing associated documentation comment in .proto file
-            pass
-            raise NotImplementedError()
-        _health_check.future = None
-
-    def beta_create_OnlineActionHandler_server(servicer, pool=None, pool_size=None, default_timeout=None, maximum_timeout=None):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This function was
-        generated only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0"""
-        request_deserializers = {
-            ('OnlineActionHandler', '_health_check'): HealthCheckRequest.FromString,
-            ('OnlineActionHandler', '_remote_execute'): OnlineActionRequest.FromString,
-            ('OnlineActionHandler', '_remote_reload'): ReloadRequest.FromString,
-        }
-        response_serializers = {
-            ('OnlineActionHandler', '_health_check'): HealthCheckResponse.SerializeToString,
-            ('OnlineActionHandler', '_remote_execute'): OnlineActionResponse.SerializeToString,
-            ('OnlineActionHandler', '_remote_reload'): ReloadResponse.SerializeToString,
-        }
-        method_implementations = {
-            ('OnlineActionHandler', '_health_check'): face_utilities.unary_unary_inline(servicer._health_check),
-            ('OnlineActionHandler', '_remote_execute'): face_utilities.unary_unary_inline(servicer._remote_execute),
-            ('OnlineActionHandler', '_remote_reload'): face_utilities.unary_unary_inline(servicer._remote_reload),
-        }
-        server_options = beta_implementations.server_options(request_deserializers=request_deserializers, response_serializers=response_serializers,
-                                                             thread_pool=pool, thread_pool_size=pool_size, default_timeout=default_timeout, maximum_timeout=maximum_timeout)
-        return beta_implementations.server(method_implementations, options=server_options)
-
-    def beta_create_OnlineActionHandler_stub(channel, host=None, metadata_transformer=None, pool=None, pool_size=None):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This function was
-        generated only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0"""
-        request_serializers = {
-            ('OnlineActionHandler', '_health_check'): HealthCheckRequest.SerializeToString,
-            ('OnlineActionHandler', '_remote_execute'): OnlineActionRequest.SerializeToString,
-            ('OnlineActionHandler', '_remote_reload'): ReloadRequest.SerializeToString,
-        }
-        response_deserializers = {
-            ('OnlineActionHandler', '_health_check'): HealthCheckResponse.FromString,
-            ('OnlineActionHandler', '_remote_execute'): OnlineActionResponse.FromString,
-            ('OnlineActionHandler', '_remote_reload'): ReloadResponse.FromString,
-        }
-        cardinalities = {
-            '_health_check': cardinality.Cardinality.UNARY_UNARY,
-            '_remote_execute': cardinality.Cardinality.UNARY_UNARY,
-            '_remote_reload': cardinality.Cardinality.UNARY_UNARY,
-        }
-        stub_options = beta_implementations.stub_options(host=host, metadata_transformer=metadata_transformer, request_serializers=request_serializers,
-                                                         response_deserializers=response_deserializers, thread_pool=pool, thread_pool_size=pool_size)
-        return beta_implementations.dynamic_stub(channel, 'OnlineActionHandler', cardinalities, options=stub_options)
-
-    class BetaBatchActionHandlerServicer(object):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This class was generated
-        only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0."""
-        # missing associated documentation comment in .proto file
-        pass
-
-        def _remote_execute(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.code(beta_interfaces.StatusCode.UNIMPLEMENTED)
-
-        def _remote_reload(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.code(beta_interfaces.StatusCode.UNIMPLEMENTED)
-
-        def _health_check(self, request, context):
-            # missing associated documentation comment in .proto file
-            pass
-            context.code(beta_interfaces.StatusCode.UNIMPLEMENTED)
-
-    class BetaBatchActionHandlerStub(object):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This class was generated
-        only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0."""
-        # missing associated documentation comment in .proto file
-        pass
-
-        def _remote_execute(self, request, timeout, metadata=None, with_call=False, protocol_options=None):
-            # missing associated documentation comment in .proto file
-            pass
-            raise NotImplementedError()
-        _remote_execute.future = None
-
-        def _remote_reload(self, request, timeout, metadata=None, with_call=False, protocol_options=None):
-            # missing associated documentation comment in .proto file
-            pass
-            raise NotImplementedError()
-        _remote_reload.future = None
-
-        def _health_check(self, request, timeout, metadata=None, with_call=False, protocol_options=None):
-            # missing associated documentation comment in .proto file
-            pass
-            raise NotImplementedError()
-        _health_check.future = None
-
-    def beta_create_BatchActionHandler_server(servicer, pool=None, pool_size=None, default_timeout=None, maximum_timeout=None):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This function was
-        generated only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0"""
-        request_deserializers = {
-            ('BatchActionHandler', '_health_check'): HealthCheckRequest.FromString,
-            ('BatchActionHandler', '_remote_execute'): BatchActionRequest.FromString,
-            ('BatchActionHandler', '_remote_reload'): ReloadRequest.FromString,
-        }
-        response_serializers = {
-            ('BatchActionHandler', '_health_check'): HealthCheckResponse.SerializeToString,
-            ('BatchActionHandler', '_remote_execute'): BatchActionResponse.SerializeToString,
-            ('BatchActionHandler', '_remote_reload'): ReloadResponse.SerializeToString,
-        }
-        method_implementations = {
-            ('BatchActionHandler', '_health_check'): face_utilities.unary_unary_inline(servicer._health_check),
-            ('BatchActionHandler', '_remote_execute'): face_utilities.unary_unary_inline(servicer._remote_execute),
-            ('BatchActionHandler', '_remote_reload'): face_utilities.unary_unary_inline(servicer._remote_reload),
-        }
-        server_options = beta_implementations.server_options(request_deserializers=request_deserializers, response_serializers=response_serializers,
-                                                             thread_pool=pool, thread_pool_size=pool_size, default_timeout=default_timeout, maximum_timeout=maximum_timeout)
-        return beta_implementations.server(method_implementations, options=server_options)
-
-    def beta_create_BatchActionHandler_stub(channel, host=None, metadata_transformer=None, pool=None, pool_size=None):
-        """The Beta API is deprecated for 0.15.0 and later.
-
-        It is recommended to use the GA API (classes and functions in this
-        file not marked beta) for all further purposes. This function was
-        generated only to ease transition from grpcio<0.15.0 to grpcio>=0.15.0"""
-        request_serializers = {
-            ('BatchActionHandler', '_health_check'): HealthCheckRequest.SerializeToString,
-            ('BatchActionHandler', '_remote_execute'): BatchActionRequest.SerializeToString,
-            ('BatchActionHandler', '_remote_reload'): ReloadRequest.SerializeToString,
-        }
-        response_deserializers = {
-            ('BatchActionHandler', '_health_check'): HealthCheckResponse.FromString,
-            ('BatchActionHandler', '_remote_execute'): BatchActionResponse.FromString,
-            ('BatchActionHandler', '_remote_reload'): ReloadResponse.FromString,
-        }
-        cardinalities = {
-            '_health_check': cardinality.Cardinality.UNARY_UNARY,
-            '_remote_execute': cardinality.Cardinality.UNARY_UNARY,
-            '_remote_reload': cardinality.Cardinality.UNARY_UNARY,
-        }
-        stub_options = beta_implementations.stub_options(host=host, metadata_transformer=metadata_transformer, request_serializers=request_serializers,
-                                                         response_deserializers=response_deserializers, thread_pool=pool, thread_pool_size=pool_size)
-        return beta_implementations.dynamic_stub(channel, 'BatchActionHandler', cardinalities, options=stub_options)
-except ImportError:
-    pass
 # @@protoc_insertion_point(module_scope)
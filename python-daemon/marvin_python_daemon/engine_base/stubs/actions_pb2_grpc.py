@@ -21,6 +21,16 @@ class OnlineActionHandlerStub(object):
             request_serializer=actions__pb2.OnlineActionRequest.SerializeToString,
             response_deserializer=actions__pb2.OnlineActionResponse.FromString,
         )
+        self._remote_execute_batch = channel.unary_unary(
+            '/OnlineActionHandler/_remote_execute_batch',
+            request_serializer=actions__pb2.OnlineBatchActionRequest.SerializeToString,
+            response_deserializer=actions__pb2.OnlineBatchActionResponse.FromString,
+        )
+        self._remote_execute_stream = channel.stream_stream(
+            '/OnlineActionHandler/_remote_execute_stream',
+            request_serializer=actions__pb2.OnlineStreamRequest.SerializeToString,
+            response_deserializer=actions__pb2.OnlineStreamResponse.FromString,
+        )
         self._remote_reload = channel.unary_unary(
             '/OnlineActionHandler/_remote_reload',
             request_serializer=actions__pb2.ReloadRequest.SerializeToString,
@@ -44,6 +54,20 @@ class OnlineActionHandlerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def _remote_execute_batch(self, request, context):
+        # missing associated documentation comment in .proto file
+        pass
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def _remote_execute_stream(self, request_iterator, context):
+        # missing associated documentation comment in .proto file
+        pass
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def _remote_reload(self, request, context):
         # missing associated documentation comment in .proto file
         pass
@@ -66,6 +90,16 @@ def add_OnlineActionHandlerServicer_to_server(servicer, server):
             request_deserializer=actions__pb2.OnlineActionRequest.FromString,
             response_serializer=actions__pb2.OnlineActionResponse.SerializeToString,
         ),
+        '_remote_execute_batch': grpc.unary_unary_rpc_method_handler(
+            servicer._remote_execute_batch,
+            request_deserializer=actions__pb2.OnlineBatchActionRequest.FromString,
+            response_serializer=actions__pb2.OnlineBatchActionResponse.SerializeToString,
+        ),
+        '_remote_execute_stream': grpc.stream_stream_rpc_method_handler(
+            servicer._remote_execute_stream,
+            request_deserializer=actions__pb2.OnlineStreamRequest.FromString,
+            response_serializer=actions__pb2.OnlineStreamResponse.SerializeToString,
+        ),
         '_remote_reload': grpc.unary_unary_rpc_method_handler(
             servicer._remote_reload,
             request_deserializer=actions__pb2.ReloadRequest.FromString,
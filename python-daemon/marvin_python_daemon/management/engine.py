@@ -19,15 +19,21 @@ from __future__ import print_function
 
 import json
 import os
+import functools
 import sys
 import time
 import os.path
+import threading
 import subprocess
 import multiprocessing
+from concurrent import futures
 from ..common.profiling import profiling
 from ..common.data import MarvinData
-from ..common.log import get_logger
+from ..common.log import get_logger, configure_hot_path_logging
 from ..common.config import Config, load_conf_from_file
+from ..engine_base.artifact_residency import residency_manager, parse_size
+from ..engine_base.artifact_metrics import flush_report
+from .prefork import PreforkServer, REUSE_PORT_OPTIONS
 
 logger = get_logger('management.engine')
 
@@ -51,13 +57,55 @@ ARTIFACTS = {
     "Feedback": []
 }
 
-def dryrun(config, action, profiling):
+# marvin.ini [artifacts] entries used as default artifactsOptions of the engine
+ARTIFACTS_DEFAULT_OPTIONS = {
+    "artifacts_serializer": ("serializer", str),
+    "artifacts_compression": ("compression", str),
+    "artifacts_compression_level": ("compressionLevel", int),
+    "artifacts_protocol": ("protocol", int),
+    "artifacts_versions": ("versions", int),
+    "artifacts_write_behind": ("writeBehind", lambda value: str(value).lower() in ("true", "yes", "1")),
+    "artifacts_measure_memory": ("measureMemory", lambda value: str(value).lower() in ("true", "yes", "1"))
+}
+
+
+def get_artifacts_options(config, metadata):
+    artifacts_options = dict(metadata.get('artifactsOptions', {}))
+
+    default_options = {}
+    for key, (option, _type) in ARTIFACTS_DEFAULT_OPTIONS.items():
+        if config.get(key):
+            default_options[option] = _type(config[key])
+    default_options.update(artifacts_options.get('default', {}))
+
+    if default_options:
+        artifacts_options['default'] = default_options
+
+    return artifacts_options
+
+
+def configure_serving_logging(config):
+    # marvin.ini [log] sample_rate (e.g. 0.01) and queue (true) for the online servers
+    configure_hot_path_logging(
+        sample_rate=config.get('log_sample_rate'),
+        use_queue=str(config.get('log_queue', '')).lower() in ("true", "yes", "1"))
+
+
+def configure_artifacts_residency(config):
+    # marvin.ini [artifacts] memory_budget, e.g. 2G, shared by all the actions of the process
+    budget = parse_size(config.get('artifacts_memory_budget'))
+    if budget is not None:
+        residency_manager.configure(budget_bytes=budget)
+
+
+def dryrun(config, action, profiling, memoize=False):
     # setting spark configuration directory
     os.environ["SPARK_CONF_DIR"] = os.path.join(
         os.environ["SPARK_HOME"], "conf")
     os.environ["YARN_CONF_DIR"] = os.environ["SPARK_CONF_DIR"]
 
     params = read_file('engine.params')
+    metadata = read_file('engine.metadata')
     messages_file = read_file('engine.messages')
     feedback_file = read_file('feedback.messages')
 
@@ -67,8 +115,12 @@ def dryrun(config, action, profiling):
     else:
         pipeline = [action]
 
+    configure_artifacts_residency(config)
+
     _dryrun = MarvinDryRun(config=config, messages=[
-                           messages_file, feedback_file])
+                           messages_file, feedback_file],
+                           artifacts_options=get_artifacts_options(config, metadata),
+                           memoize=memoize)
 
     initial_start_time = time.time()
 
@@ -81,18 +133,22 @@ def dryrun(config, action, profiling):
 
 
 class MarvinDryRun(object):
-    def __init__(self, config, messages):
+    def __init__(self, config, messages, artifacts_options=None, memoize=False):
         self.predictor_messages = messages[0]
         self.feedback_messages = messages[1]
         self.pmessages = []
         self.package_name = config['marvin_package']
+        self.artifacts_options = artifacts_options
+        self.memoize = memoize
 
     def execute(self, clazz, params, profiling_enabled=False):
         self.print_start_step(clazz)
 
         _Step = dynamic_import("{}.{}".format(self.package_name, clazz))
 
-        kwargs = generate_kwargs(self.package_name, _Step, params)
+        kwargs = generate_kwargs(self.package_name, _Step, params,
+                                 artifacts_options=self.artifacts_options,
+                                 memoize=self.memoize)
 
         step = _Step(**kwargs)
 
@@ -128,9 +184,12 @@ class MarvinDryRun(object):
                 call_online_actions(step, msg, idx)
 
         else:
+            # memoized steps are skipped when their inputs did not change
+            step_execute = step._memoized_execute if self.memoize else step.execute
+
             if profiling_enabled:
                 with profiling(output_path=".profiling", uid=clazz) as prof:
-                    step.execute(params=params)
+                    step_execute(params=params)
 
                 prof.disable
 
@@ -138,7 +197,10 @@ class MarvinDryRun(object):
                     "\nProfile images created in {}\n".format(prof.image_path))
 
             else:
-                step.execute(params=params)
+                step_execute(params=params)
+
+        # artifacts saved in background must be on disk before the next step loads them
+        step._flush_saved_objects()
 
         self.print_finish_step()
 
@@ -172,7 +234,50 @@ def read_file(filename):
         return {}
 
 
-def generate_kwargs(package_name, clazz, params=None, initial_dataset='initialdataset', dataset='dataset', model='model', metrics='metrics'):
+class ArtifactsLoader(object):
+    """Loads artifacts concurrently, reading each artifact file only once.
+
+    Usage:
+
+        loader = ArtifactsLoader()
+        kwargs = generate_kwargs(package_name, clazz, artifacts_loader=loader)
+        kwargs = loader.resolve(kwargs)
+    """
+
+    def __init__(self, max_workers=None):
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers or multiprocessing.cpu_count(), thread_name_prefix='artifacts-loader')
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, clazz, object_file_path):
+        # actions with their own serializers (e.g. keras) do not share the loaded object
+        key = (object_file_path, clazz._serializer_load)
+
+        with self._lock:
+            if key not in self._futures:
+                self._futures[key] = self._executor.submit(self._load, clazz, object_file_path)
+            else:
+                logger.info("Artifact {} already being loaded, sharing it.".format(object_file_path))
+
+            return self._futures[key]
+
+    def _load(self, clazz, object_file_path):
+        start_time = time.time()
+        obj = clazz.retrieve_obj(object_file_path)
+        logger.info("Artifact {} loaded in {:.4f} (seconds)".format(
+            object_file_path, time.time() - start_time))
+        return obj
+
+    def resolve(self, kwargs):
+        return {key: value.result() if isinstance(value, futures.Future) else value
+                for key, value in kwargs.items()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def generate_kwargs(package_name, clazz, params=None, initial_dataset='initialdataset', dataset='dataset', model='model', metrics='metrics', artifacts_options=None, memoize=False, artifacts_loader=None):
     kwargs = {}
 
     kwargs["persistence_mode"] = 'local'
@@ -186,52 +291,163 @@ def generate_kwargs(package_name, clazz, params=None, initial_dataset='initialda
     logger.debug("clazz: {0}, artifacts to load: {1}".format(clazz, str(_artifacts_to_load)))
     if params:
         kwargs["params"] = params
+    if artifacts_options:
+        kwargs["artifacts_options"] = artifacts_options
+    if memoize:
+        kwargs["memoize"] = True
+        kwargs["input_artifacts"] = _artifacts_to_load
+
+    # with a shared loader the artifacts are returned as futures resolved by the caller
+    loader = artifacts_loader or ArtifactsLoader()
+
     if dataset in _artifacts_to_load:
-        kwargs["dataset"] = clazz.retrieve_obj(os.path.join(kwargs["default_root_path"],
+        kwargs["dataset"] = loader.submit(clazz, os.path.join(kwargs["default_root_path"],
                                                 _artifact_folder, dataset))
     if initial_dataset in _artifacts_to_load:
-        kwargs["initial_dataset"] = clazz.retrieve_obj(os.path.join(kwargs["default_root_path"],
+        kwargs["initial_dataset"] = loader.submit(clazz, os.path.join(kwargs["default_root_path"],
                                                 _artifact_folder, initial_dataset))
     if model in _artifacts_to_load:
-        kwargs["model"] = clazz.retrieve_obj(os.path.join(kwargs["default_root_path"],
+        kwargs["model"] = loader.submit(clazz, os.path.join(kwargs["default_root_path"],
                                                 _artifact_folder, model))
     if metrics in _artifacts_to_load:
-        kwargs["metrics"] = clazz.retrieve_obj(os.path.join(kwargs["default_root_path"],
+        kwargs["metrics"] = loader.submit(clazz, os.path.join(kwargs["default_root_path"],
                                                 _artifact_folder, metrics))
 
+    if artifacts_loader is None:
+        try:
+            kwargs = loader.resolve(kwargs)
+        finally:
+            loader.shutdown()
+
     return kwargs
 
 
 class MarvinEngineServer(object):
     @classmethod
-    def create(self, config, action, port, workers, rpc_workers, params, pipeline):
+    def create(self, config, action, port, workers, rpc_workers, params, pipeline, artifacts_options=None, memoize=False,
+               warmup_messages=None, artifacts_loader=None, max_batch_size=None, max_wait_ms=None,
+               prediction_cache=None, aio=False, processes=None, step_timings=False, max_queue_ms=None,
+               concurrency_limit=None, startup_warmup=None, startup_messages=None, startup_retries=None,
+               startup_fail_open=None):
+        kwargs = dict(port=port, workers=workers, rpc_workers=rpc_workers, params=params, pipeline=pipeline,
+                      artifacts_options=artifacts_options, memoize=memoize, warmup_messages=warmup_messages,
+                      max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, prediction_cache=prediction_cache,
+                      aio=aio, step_timings=step_timings, max_queue_ms=max_queue_ms,
+                      concurrency_limit=concurrency_limit, startup_warmup=startup_warmup,
+                      startup_messages=startup_messages, startup_retries=startup_retries,
+                      startup_fail_open=startup_fail_open)
+
+        if processes and int(processes) > 1:
+            # the worker processes load the artifacts and share the port,
+            # a reload would only reach the worker receiving it
+            kwargs["reload_disabled"] = "Reload is not supported with {} processes, restart the engine " \
+                                        "to serve new artifacts".format(processes)
+            server = PreforkServer(functools.partial(prepare_worker_server, config, action, **kwargs),
+                                   processes=processes, name=action)
+            logger.info(
+                "Starting {} GRPC server processes [{}] for {} Action".format(processes, port, action))
+        else:
+            server = self.prepare(config, action, artifacts_loader=artifacts_loader, **kwargs)
+            logger.info(
+                "Starting GRPC server [{}] for {} Action".format(port, action))
+
+        server.start()
+
+        return server
+
+    @classmethod
+    def prepare(self, config, action, port, workers, rpc_workers, params, pipeline, artifacts_options=None,
+                memoize=False, warmup_messages=None, artifacts_loader=None, max_batch_size=None, max_wait_ms=None,
+                prediction_cache=None, aio=False, step_timings=False, max_queue_ms=None, concurrency_limit=None,
+                startup_warmup=None, startup_messages=None, startup_retries=None, startup_fail_open=None,
+                options=None, reload_disabled=None):
         package_name = config['marvin_package']
+        loader = artifacts_loader or ArtifactsLoader()
+        start_time = time.time()
 
-        def create_object(act):
+        def generate_action_kwargs(act, **extra_kwargs):
             clazz = CLAZZES[act]
             _Action = dynamic_import("{}.{}".format(package_name, clazz))
-            kwargs = generate_kwargs(package_name, _Action, params)
-            return _Action(**kwargs)
-
-        root_obj = create_object(action)
-        previous_object = root_obj
+            kwargs = generate_kwargs(package_name, _Action, params,
+                                     artifacts_options=artifacts_options,
+                                     memoize=memoize,
+                                     artifacts_loader=loader)
+            kwargs.update(extra_kwargs)
+            return _Action, kwargs
+
+        # the artifacts of all the steps are loaded concurrently before creating any of them
+        # and reloaded artifacts are warmed up through the whole pipeline of the root action
+        root_kwargs = {"warmup_messages": warmup_messages, "max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms,
+                       "prediction_cache": prediction_cache, "step_timings": step_timings,
+                       "max_queue_ms": max_queue_ms, "concurrency_limit": concurrency_limit,
+                       "startup_warmup": startup_warmup, "startup_messages": startup_messages,
+                       "startup_retries": startup_retries, "startup_fail_open": startup_fail_open}
+        steps = [generate_action_kwargs(action, **{k: v for k, v in root_kwargs.items() if v is not None})]
+        steps += [generate_action_kwargs(step) for step in list(reversed(pipeline or []))]
+
+        try:
+            objects = [_Action(**loader.resolve(kwargs)) for _Action, kwargs in steps]
+        finally:
+            if artifacts_loader is None:
+                loader.shutdown()
+
+        logger.info("Artifacts of {} Action loaded in {:.4f} (seconds)".format(
+            action, time.time() - start_time))
+        flush_report()
+
+        root_obj = objects[0]
+        for previous_object, step_object in zip(objects, objects[1:]):
+            previous_object._previous_step = step_object
+
+        if reload_disabled:
+            root_obj._reload_disabled = reload_disabled
+
+        # only the online actions have an asyncio server
+        if aio and hasattr(root_obj, '_prepare_async_remote_server'):
+            return root_obj._prepare_async_remote_server(
+                port=port, workers=workers, rpc_workers=rpc_workers, options=options)
+        return root_obj._prepare_remote_server(
+            port=port, workers=workers, rpc_workers=rpc_workers, options=options)
+
+
+def prepare_worker_server(config, action, **kwargs):
+    # runs in the (spawned) worker processes of the action, which start without the daemon configuration
+    configure_serving_logging(config)
+    configure_artifacts_residency(config)
+    return MarvinEngineServer.prepare(config, action, options=REUSE_PORT_OPTIONS, **kwargs)
+
+
+def get_warmup_messages(action_name, action_metadata):
+    if not action_metadata.get("reloadWarmup"):
+        return None
+
+    return read_file('feedback.messages' if action_name == 'feedback' else 'engine.messages')
+
+
+def get_startup_warmup(action_name, action_metadata):
+    # "startupWarmup": 3 or {"iterations": 3, "messages": [...]}
+    warmup = action_metadata.get("startupWarmup")
+    if not warmup:
+        return None, None
+
+    if isinstance(warmup, dict):
+        iterations, messages = warmup.get("iterations", 1), warmup.get("messages")
+    else:
+        iterations, messages = warmup, None
 
-        if pipeline:
-            for step in list(reversed(pipeline)):
-                previous_object._previous_step = create_object(step)
-                previous_object = previous_object._previous_step
+    return int(iterations), messages or read_file('feedback.messages' if action_name == 'feedback' else 'engine.messages')
 
-        server = root_obj._prepare_remote_server(
-            port=port, workers=workers, rpc_workers=rpc_workers)
 
-        logger.info(
-            "Starting GRPC server [{}] for {} Action".format(port, action))
-        server.start()
+def get_startup_retries(action_metadata):
+    # "startupWarmup": {"retries": 3, "failOpen": false}, the defaults of the action when missing
+    warmup = action_metadata.get("startupWarmup")
+    if not isinstance(warmup, dict):
+        return None, None
 
-        return server
+    return warmup.get("retries"), warmup.get("failOpen")
 
 
-def engine_server(config, action, max_workers, max_rpc_workers):
+def engine_server(config, action, max_workers, max_rpc_workers, memoize=False, aio=False, processes=None):
 
     logger.info("Starting server ...")
 
@@ -251,19 +467,46 @@ def engine_server(config, action, max_workers, max_rpc_workers):
     else:
         action = {action: default_actions[action]}
 
+    configure_serving_logging(config)
+    configure_artifacts_residency(config)
+
+    # artifacts shared by the servers are loaded once
+    artifacts_loader = ArtifactsLoader()
+
     servers = []
-    for action_name in action.keys():
-        # initializing server configuration
-        engine_server = MarvinEngineServer.create(
-            config=config,
-            action=action_name,
-            port=action[action_name]["port"],
-            workers=max_workers,
-            rpc_workers=max_rpc_workers,
-            params=params,
-            pipeline=action[action_name]["pipeline"]
-        )
-
-        servers.append(engine_server)
+    try:
+        for action_name in action.keys():
+            startup_warmup, startup_messages = get_startup_warmup(action_name, action[action_name])
+            startup_retries, startup_fail_open = get_startup_retries(action[action_name])
+            # initializing server configuration
+            engine_server = MarvinEngineServer.create(
+                config=config,
+                action=action_name,
+                port=action[action_name]["port"],
+                workers=max_workers,
+                rpc_workers=max_rpc_workers,
+                params=params,
+                pipeline=action[action_name]["pipeline"],
+                artifacts_options=get_artifacts_options(config, metadata),
+                memoize=memoize,
+                warmup_messages=get_warmup_messages(action_name, action[action_name]),
+                max_batch_size=action[action_name].get("maxBatchSize"),
+                max_wait_ms=action[action_name].get("maxWaitMs"),
+                prediction_cache=action[action_name].get("predictionCache"),
+                step_timings=action[action_name].get("stepTimings", False),
+                max_queue_ms=action[action_name].get("maxQueueMs"),
+                concurrency_limit=action[action_name].get("concurrencyLimit"),
+                startup_warmup=startup_warmup,
+                startup_messages=startup_messages,
+                startup_retries=startup_retries,
+                startup_fail_open=startup_fail_open,
+                artifacts_loader=artifacts_loader,
+                aio=aio,
+                processes=processes
+            )
+
+            servers.append(engine_server)
+    finally:
+        artifacts_loader.shutdown()
 
     return servers
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Prefork serving of the engine actions.
+
+Worker processes serve the action on the same port (SO_REUSEPORT) and the
+kernel balances the connections between them, each one with its own GIL.
+
+gRPC does not support forking a process where it is already running (the
+daemon serves its commands through gRPC), so the workers are fresh
+interpreters (spawn) that load the artifacts of the action themselves.
+
+Each worker holds its own copy of the action, so the artifacts are not
+reloaded through the _remote_reload rpc, which is answered with
+FAILED_PRECONDITION: restart the engine to serve new artifacts.
+"""
+
+import time
+import signal
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+
+from ..common.log import get_logger, stop_queue_listeners
+from ..common.metrics import metrics_registry
+
+__all__ = ['PreforkServer', 'REUSE_PORT_OPTIONS']
+
+logger = get_logger('management.prefork')
+
+# every worker binds the port of the action
+REUSE_PORT_OPTIONS = [('grpc.so_reuseport', 1)]
+
+
+def _serve_worker(factory, grace):
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    server = factory()
+    server.start()
+
+    try:
+        while not stopping.wait(1):
+            pass
+        server.stop(grace).wait()
+    finally:
+        stop_queue_listeners()
+
+
+class PreforkServer(object):
+    """Supervisor of the worker processes serving an action.
+
+    Has the start and stop methods of the gRPC servers, so the daemon manages
+    it the same way. Workers that exit are restarted after `restart_delay`
+    seconds.
+
+    The `factory` creating the server of each worker runs in the worker
+    process, so it must be picklable (e.g. a module function or a partial).
+
+    Usage:
+
+        server = PreforkServer(functools.partial(prepare_worker_server, config, action, port=port),
+                               processes=16, name='predictor')
+        server.start()
+    """
+
+    def __init__(self, factory, processes, name='prefork', grace=5, restart_delay=1.0):
+        if int(processes) < 1:
+            raise ValueError('Invalid number of processes {}'.format(processes))
+
+        self.factory = factory
+        self.processes = int(processes)
+        self.name = name
+        self.grace = grace
+        self.restart_delay = restart_delay
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._supervisor = None
+
+    @property
+    def pids(self):
+        return [process.pid for process in self._workers.values()]
+
+    def _spawn(self, index):
+        process = self._context.Process(target=_serve_worker, args=(self.factory, self.grace),
+                                        name='{}-worker-{}'.format(self.name, index))
+        process.daemon = True
+        process.start()
+        self._workers[index] = process
+
+    def start(self):
+        with self._lock:
+            for index in range(self.processes):
+                self._spawn(index)
+
+        metrics_registry.set('prefork_workers', self.processes, server=self.name)
+        logger.info("Started {} worker processes for {}: {}".format(
+            self.processes, self.name, ", ".join(str(pid) for pid in self.pids)))
+
+        self._supervisor = threading.Thread(target=self._supervise, name='{}-supervisor'.format(self.name))
+        self._supervisor.daemon = True
+        self._supervisor.start()
+
+    def _supervise(self):
+        while not self._stopping.is_set():
+            sentinels = {process.sentinel: index for index, process in self._workers.items()}
+
+            for sentinel in wait(list(sentinels), timeout=1):
+                index = sentinels[sentinel]
+                process = self._workers[index]
+                process.join()
+
+                if self._stopping.wait(self.restart_delay):
+                    return
+
+                with self._lock:
+                    if self._stopping.is_set():
+                        return
+
+                    logger.warning("Worker {} of {} exited with code {}, restarting it".format(
+                        process.pid, self.name, process.exitcode))
+                    self._spawn(index)
+                    self.restarts += 1
+                    metrics_registry.inc('prefork_worker_restarts', server=self.name)
+
+    def stop(self, grace):
+        stopped = threading.Event()
+
+        with self._lock:
+            self._stopping.set()
+            for process in self._workers.values():
+                if process.is_alive():
+                    process.terminate()
+
+        deadline = time.time() + max(grace or 0, self.grace or 0) + 1
+        for process in self._workers.values():
+            process.join(max(deadline - time.time(), 0))
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+        if self._supervisor is not None:
+            self._supervisor.join()
+
+        metrics_registry.set('prefork_workers', 0, server=self.name)
+        stopped.set()
+        return stopped
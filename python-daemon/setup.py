@@ -70,6 +70,7 @@ REQUIREMENTS_EXTERNAL = [
     'python-slugify>=0.1.0',
     'grpcio>=1.13.0',
     'grpcio-tools>=1.13.0',
+    'contextvars; python_version < "3.7"',
     'joblib>=0.11',
     'autopep8>=1.3.3',
     'idna>=2.5',
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import numpy as np
+
+from marvin_python_daemon.common import json_codec
+
+
+@pytest.fixture(params=json_codec.BACKENDS)
+def backend(request):
+    try:
+        json_codec.set_backend(request.param)
+    except ImportError:
+        pytest.skip("{} is not installed".format(request.param))
+
+    yield request.param
+    json_codec.set_backend()
+
+
+def test_round_trip(backend):
+    obj = {"msg": "olá", "values": [1, 2.5, None, True]}
+
+    assert json_codec.loads(json_codec.dumps(obj)) == obj
+    assert json_codec.loads(json_codec.dumps(obj).encode('utf-8')) == obj
+
+
+def test_compact(backend):
+    assert json_codec.dumps({"a": [1, 2]}) == '{"a":[1,2]}'
+
+
+def test_numpy(backend):
+    obj = {"label": np.int64(1), "proba": np.array([0.25, 0.75]), "matrix": np.eye(2, dtype='float32')[:, ::-1]}
+
+    assert json_codec.loads(json_codec.dumps(obj)) == {
+        "label": 1, "proba": [0.25, 0.75], "matrix": [[0.0, 1.0], [1.0, 0.0]]}
+
+
+def test_default(backend):
+    class Obj(object):
+        id = '42'
+
+    assert json_codec.dumps({"i": Obj()}, default=lambda obj: obj.id) == '{"i":"42"}'
+
+    with pytest.raises(TypeError):
+        json_codec.dumps({"i": object()})
+
+
+def test_big_int(backend):
+    assert json_codec.loads(json_codec.dumps(2 ** 70)) == 2 ** 70
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        json_codec.set_backend('simplejson')
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import logging
+import multiprocessing
+from logging.handlers import QueueHandler
+
+from marvin_python_daemon.common import log
+from marvin_python_daemon.common.log import get_logger, sampled_request, configure_hot_path_logging, \
+    stop_queue_listeners
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_sampled_request(tmpdir):
+    logger = get_logger('sampling', namespace='test_sampling', log_dir=str(tmpdir))
+    handler = ListHandler()
+    logger.addHandler(handler)
+
+    with sampled_request(sample_rate=0) as sampled:
+        assert not sampled
+        logger.info("dropped %s", 1)
+        logger.warning("kept %s", 2)
+
+        # nested calls keep the decision of the request
+        with sampled_request(sample_rate=1) as nested:
+            assert not nested
+            logger.info("dropped %s", 3)
+
+    with sampled_request(sample_rate=1):
+        logger.info("kept %s", 4)
+
+    logger.info("kept %s", 5)
+
+    assert handler.messages == ["kept 2", "kept 4", "kept 5"]
+
+
+def test_sampled_request_decorator():
+    @sampled_request(sample_rate=0)
+    def handle():
+        return log._sampled.get()
+
+    assert handle() is False
+    assert log._sampled.get() is None
+
+
+def test_sampled_request_tasks():
+    # the tasks of an asyncio server share the thread, not the decision
+    async def handle(sample_rate, started, other_started):
+        with sampled_request(sample_rate=sample_rate) as sampled:
+            started.set()
+            await other_started.wait()
+            assert log._sampled.get() is sampled
+        return log._sampled.get()
+
+    async def main():
+        first, second = asyncio.Event(), asyncio.Event()
+        return await asyncio.gather(handle(0, first, second), handle(1, second, first))
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(main()) == [None, None]
+    finally:
+        loop.close()
+
+
+def test_configure_hot_path_logging_queue(tmpdir):
+    logger = get_logger('queue', namespace='test_queue', log_dir=str(tmpdir))
+    configure_hot_path_logging(use_queue=True, namespace='test_queue', log_dir=str(tmpdir))
+
+    assert [type(handler) for handler in logger.handlers] == [QueueHandler]
+    assert [type(handler) for handler in get_logger('new', namespace='test_queue').handlers] == [QueueHandler]
+
+    logger.info("written by the listener")
+    stop_queue_listeners()
+
+    assert "written by the listener" in tmpdir.listdir()[0].read()
+
+
+def test_configure_hot_path_logging_sample_rate():
+    configure_hot_path_logging(sample_rate='0.25')
+    assert log._sample_rate == 0.25
+
+    configure_hot_path_logging(sample_rate='')
+    assert log._sample_rate == 0.25
+
+    configure_hot_path_logging(sample_rate=1)
+    assert log._sample_rate == 1.0
+
+
+def test_queue_listener_after_fork(tmpdir):
+    logger = get_logger('forked', namespace='test_fork', log_dir=str(tmpdir))
+    configure_hot_path_logging(use_queue=True, namespace='test_fork', log_dir=str(tmpdir))
+
+    def child():
+        logger.info("written by the child")
+        stop_queue_listeners()
+
+    process = multiprocessing.get_context('fork').Process(target=child)
+    process.start()
+    process.join()
+    stop_queue_listeners()
+
+    assert process.exitcode == 0
+    assert "written by the child" in tmpdir.listdir()[0].read()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import numpy as np
+import pandas as pd
+
+from marvin_python_daemon.common.metrics import Histogram, MetricsRegistry, estimate_size
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1.0, float('inf')))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 4
+    assert snapshot['sum'] == 2.6
+    assert snapshot['min'] == 0.05
+    assert snapshot['max'] == 2.0
+    assert snapshot['p50'] == 0.1
+    assert snapshot['p90'] == 2.0
+
+
+def test_histogram_empty():
+    assert Histogram().snapshot()['p50'] is None
+
+
+def test_metrics_registry():
+    registry = MetricsRegistry()
+    registry.inc('requests', action='predictor')
+    registry.inc('requests', 2, action='predictor')
+    registry.set('queue_depth', 3)
+    registry.observe('latency_seconds', 0.02, action='predictor')
+
+    assert registry.get('requests', action='predictor') == 3
+    assert registry.get('requests', action='feedback') is None
+    assert registry.get('queue_depth') == 3
+    assert registry.get('latency_seconds', action='predictor')['count'] == 1
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters'] == {'requests{action="predictor"}': 3}
+    assert list(snapshot['histograms'].keys()) == ['latency_seconds{action="predictor"}']
+
+    registry.reset()
+    assert registry.snapshot() == {'counters': {}, 'gauges': {}, 'histograms': {}}
+
+
+def test_estimate_size():
+    array = np.zeros(1000)
+    assert estimate_size(array) == array.nbytes
+    assert estimate_size(pd.DataFrame({'a': array})) >= array.nbytes
+    assert estimate_size({'a': array}) > array.nbytes
+    assert estimate_size([1] * 5000) > sys.getsizeof([1] * 5000)
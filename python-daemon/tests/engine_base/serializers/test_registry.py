@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import mock
+import pytest
+import numpy as np
+
+from marvin_python_daemon.engine_base.serializers import default_registry, LazyDict
+from marvin_python_daemon.engine_base.serializers.registry import read_manifest, get_manifest_file_path
+
+
+@pytest.fixture
+def object_file_path(tmpdir):
+    return str(tmpdir.join('dataset'))
+
+
+class TestSerializerRegistry(object):
+    def test_default_is_joblib(self, object_file_path):
+        default_registry.dump([1, 2], object_file_path)
+
+        assert read_manifest(object_file_path) == {
+            'serializer': 'joblib', 'mmap': False, 'compression': 'zlib', 'compressionLevel': 3, 'protocol': 2,
+            'size': os.path.getsize(object_file_path)}
+        assert default_registry.load(object_file_path) == [1, 2]
+
+    def test_manifest_replaced_before_the_file(self, object_file_path):
+        default_registry.dump(np.arange(5), object_file_path, serializer='npy')
+        written = []
+        replace = os.replace
+
+        def replaced(src, dst):
+            written.append(dst)
+            if dst == object_file_path:
+                # the next manifest is in place, the previous file is still read right
+                assert read_manifest(object_file_path)['serializer'] == 'pickle'
+                assert (default_registry.load(object_file_path) == np.arange(5)).all()
+            replace(src, dst)
+
+        with mock.patch('os.replace', side_effect=replaced):
+            default_registry.dump([np.arange(3), 'text'], object_file_path, serializer='pickle')
+
+        assert written == [get_manifest_file_path(object_file_path), object_file_path]
+        assert default_registry.load(object_file_path)[1] == 'text'
+        assert not os.path.exists(get_manifest_file_path(object_file_path) + '.tmp')
+
+    @pytest.mark.parametrize('compression', ['none', 'zlib', 'lz4', 'zstd'])
+    def test_joblib_compression(self, compression, object_file_path):
+        if compression == 'lz4':
+            pytest.importorskip('lz4')
+        if compression == 'zstd':
+            pytest.importorskip('pyzstd')
+
+        obj = {'X': np.zeros(1000, dtype='float32')}
+        default_registry.dump(obj, object_file_path, compression=compression,
+                              compression_level=1, protocol=4)
+
+        manifest = read_manifest(object_file_path)
+        assert manifest['compression'] == compression
+        assert manifest['compressionLevel'] == 1
+        assert manifest['protocol'] == 4
+
+        # joblib detects the codec by itself
+        os.remove(get_manifest_file_path(object_file_path))
+        np.testing.assert_array_equal(obj['X'], default_registry.load(object_file_path)['X'])
+
+    def test_joblib_mmap_is_not_compressed(self, object_file_path):
+        default_registry.dump([1], object_file_path, mmap=True, compression='zlib')
+
+        assert read_manifest(object_file_path)['compression'] == 'none'
+
+    def test_unknown_serializer(self, object_file_path):
+        with pytest.raises(ValueError):
+            default_registry.dump([1, 2], object_file_path, serializer='xyz')
+
+    def test_auto_numpy(self, object_file_path):
+        obj = np.arange(10, dtype='float32')
+        default_registry.dump(obj, object_file_path, serializer='auto', mmap=True)
+
+        assert read_manifest(object_file_path)['serializer'] == 'npy'
+
+        loaded = default_registry.load(object_file_path)
+        assert isinstance(loaded, np.memmap)
+        np.testing.assert_array_equal(obj, loaded)
+
+    def test_auto_sparse(self, object_file_path):
+        sparse = pytest.importorskip('scipy.sparse')
+        obj = sparse.random(10, 5, density=0.3, format='csr')
+        default_registry.dump(obj, object_file_path, serializer='auto')
+
+        assert read_manifest(object_file_path)['serializer'] == 'npz'
+        assert (default_registry.load(object_file_path) != obj).nnz == 0
+
+    def test_auto_dataframe(self, object_file_path):
+        pd = pytest.importorskip('pandas')
+        pytest.importorskip('pyarrow')
+        obj = pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+        default_registry.dump(obj, object_file_path, serializer='auto')
+
+        assert read_manifest(object_file_path)['serializer'] == 'parquet'
+        pd.testing.assert_frame_equal(obj, default_registry.load(object_file_path))
+
+    def test_feather_unsupported_compression(self, object_file_path):
+        pd = pytest.importorskip('pandas')
+        pytest.importorskip('pyarrow')
+
+        # feather files are only compressed with lz4 or zstd
+        with pytest.raises(ValueError, match='options are lz4, none, zstd'):
+            default_registry.dump(pd.DataFrame({'a': [1]}), object_file_path, serializer='feather',
+                                  compression='zlib')
+
+    def test_npy_unsupported_compression(self, object_file_path):
+        with pytest.raises(ValueError, match='Unsupported compression zlib of npy artifacts'):
+            default_registry.dump(np.arange(5), object_file_path, serializer='npy', compression='zlib')
+
+    def test_auto_compressed_falls_back_to_joblib(self, object_file_path):
+        default_registry.dump(np.arange(5), object_file_path, serializer='auto', compression='zlib')
+
+        manifest = read_manifest(object_file_path)
+        assert manifest['serializer'] == 'joblib'
+        assert manifest['compression'] == 'zlib'
+        assert (default_registry.load(object_file_path) == np.arange(5)).all()
+
+    def test_dict_compression(self, object_file_path):
+        import zipfile
+        obj = {'a': np.zeros(1000), 'b': [1, 2]}
+        default_registry.dump(obj, object_file_path, serializer='dict', compression='zlib')
+
+        assert read_manifest(object_file_path)['compression'] == 'zlib'
+        with zipfile.ZipFile(object_file_path) as zf:
+            assert zf.getinfo('a').compress_type == zipfile.ZIP_DEFLATED
+        loaded = default_registry.load(object_file_path)
+        assert (loaded['a'] == obj['a']).all() and loaded['b'] == [1, 2]
+
+    def test_auto_pickle_out_of_band(self, object_file_path):
+        obj = [np.arange(5), 'text']
+        default_registry.dump(obj, object_file_path, serializer='auto')
+
+        assert read_manifest(object_file_path)['serializer'] == 'pickle'
+
+        loaded = default_registry.load(object_file_path)
+        np.testing.assert_array_equal(obj[0], loaded[0])
+        assert loaded[0].flags.writeable
+        assert loaded[1] == 'text'
+
+    def test_auto_dict(self, object_file_path):
+        sparse = pytest.importorskip('scipy.sparse')
+        obj = {'X_train': sparse.eye(3, format='csr'), 'y_train': np.array([0, 1, 0]),
+               'vect': {'vocabulary': ['a', 'b']}}
+        default_registry.dump(obj, object_file_path, serializer='auto')
+
+        manifest = read_manifest(object_file_path)
+        assert manifest['serializer'] == 'dict'
+        assert manifest['keys'] == {'X_train': 'npz', 'y_train': 'npy', 'vect': 'dict'}
+
+        loaded = default_registry.load(object_file_path)
+        assert list(loaded.keys()) == ['X_train', 'y_train', 'vect']
+        assert (loaded['X_train'] != obj['X_train']).nnz == 0
+        np.testing.assert_array_equal(obj['y_train'], loaded['y_train'])
+        assert loaded['vect'] == {'vocabulary': ['a', 'b']}
+
+    @pytest.mark.parametrize('obj', [np.arange(3), [1, 2], {'a': np.arange(2)}])
+    def test_load_without_manifest(self, obj, object_file_path):
+        default_registry.dump(obj, object_file_path, serializer='auto')
+        os.remove(get_manifest_file_path(object_file_path))
+
+        loaded = default_registry.load(object_file_path)
+        if isinstance(obj, dict):
+            np.testing.assert_array_equal(obj['a'], loaded['a'])
+        else:
+            np.testing.assert_array_equal(obj, loaded)
+
+    def test_lazy_dict(self, object_file_path):
+        obj = {'svm': np.arange(3), 'rf': [1, 2]}
+        default_registry.dump(obj, object_file_path, serializer='dict', lazy=True)
+
+        assert read_manifest(object_file_path)['lazy'] is True
+
+        loaded = default_registry.load(object_file_path)
+        assert isinstance(loaded, LazyDict)
+        assert list(loaded.keys()) == ['svm', 'rf']
+        assert loaded.loaded_keys() == []
+
+        np.testing.assert_array_equal(obj['svm'], loaded['svm'])
+        assert loaded.loaded_keys() == ['svm']
+        assert loaded['svm'] is loaded['svm']
+
+        assert dict(loaded)['rf'] == [1, 2]
+        loaded.evict('svm')
+        assert loaded.loaded_keys() == ['rf']
+        loaded.evict()
+        assert loaded.loaded_keys() == []
+
+        with pytest.raises(KeyError):
+            loaded['xgb']
+
+    def test_lazy_dict_reads_one_generation(self, object_file_path):
+        default_registry.dump({'svm': 'old-svm', 'rf': 'old-rf'}, object_file_path, serializer='dict', lazy=True)
+        loaded = default_registry.load(object_file_path)
+        assert loaded['svm'] == 'old-svm'
+
+        default_registry.dump({'svm': 'new-svm', 'rf': 'new-rf'}, object_file_path, serializer='dict', lazy=True)
+
+        # the keys not loaded yet still come from the file it was loaded from
+        assert loaded['rf'] == 'old-rf'
+        assert default_registry.load(object_file_path)['rf'] == 'new-rf'
+        loaded.close()
+
+    def test_lazy_dict_resolves_link(self, object_file_path, tmpdir):
+        default_registry.dump({'svm': 'v1'}, object_file_path, serializer='dict', lazy=True)
+        link_path = str(tmpdir.join('link'))
+        os.symlink(object_file_path, link_path)
+        os.symlink(get_manifest_file_path(object_file_path), get_manifest_file_path(link_path))
+
+        loaded = default_registry.load(link_path)
+        assert loaded.object_file_path == os.path.realpath(object_file_path)
+        loaded.close()
+
+    def test_lazy_dict_dump(self, object_file_path, tmpdir):
+        default_registry.dump({'a': [1]}, object_file_path, serializer='dict', lazy=True)
+        copy_file_path = str(tmpdir.join('copy'))
+
+        default_registry.dump(default_registry.load(object_file_path), copy_file_path, serializer='auto')
+
+        assert read_manifest(copy_file_path)['serializer'] == 'dict'
+        assert default_registry.load(copy_file_path) == {'a': [1]}
+
+    def test_lazy_not_supported(self, object_file_path):
+        default_registry.dump([1], object_file_path, lazy=True)
+
+        assert 'lazy' not in read_manifest(object_file_path)
+        assert default_registry.load(object_file_path) == [1]
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import numpy as np
+
+from marvin_python_daemon.engine_base import EngineBaseAction
+from marvin_python_daemon.engine_base.artifact_residency import residency_manager, parse_size
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import HealthCheckRequest, HealthCheckResponse
+from marvin_python_daemon.common.metrics import metrics_registry
+
+
+class EngineAction(EngineBaseAction):
+    def execute(self, params, **kwargs):
+        return 1
+
+
+@pytest.fixture
+def engine_action(tmpdir):
+    residency_manager.reset()
+    yield EngineAction(default_root_path=str(tmpdir), persistence_mode='local')
+    residency_manager.reset()
+
+
+def test_parse_size():
+    assert parse_size('') is None
+    assert parse_size(512) == 512
+    assert parse_size('800M') == 800 << 20
+    assert parse_size('2GB') == 2 << 30
+    assert parse_size('1.5k') == 1536
+
+    with pytest.raises(ValueError):
+        parse_size('lots')
+
+
+def test_disabled_without_budget(engine_action):
+    engine_action._save_obj('_model', np.zeros(1000))
+
+    assert residency_manager.resident_bytes == 0
+
+
+def test_evicts_least_recently_used(engine_action):
+    residency_manager.configure(budget_bytes=20000)
+
+    engine_action._save_obj('_dataset', np.zeros(1000))
+    engine_action._save_obj('_model', np.zeros(1000))
+    assert residency_manager.resident_bytes == 16000
+
+    engine_action._load_obj('_dataset')
+    engine_action._save_obj('_initialdataset', np.zeros(1000))
+
+    # the model was the least recently used
+    assert engine_action._model is None
+    assert engine_action._dataset is not None
+    assert residency_manager.resident_bytes == 16000
+    assert metrics_registry.get('artifact_resident_bytes') == 16000
+
+    # and is loaded again from disk on its next access
+    assert engine_action._load_obj('_model').shape == (1000,)
+    assert engine_action._dataset is None
+
+
+def test_health_check_after_eviction(engine_action):
+    residency_manager.configure(budget_bytes=10000)
+    engine_action._save_obj('_model', np.zeros(1000))
+    engine_action._save_obj('_dataset', np.zeros(1000))
+    assert engine_action._model is None
+
+    # evicted artifacts are still loadable, so the action is healthy
+    response = engine_action._health_check(HealthCheckRequest(artifacts='model,dataset'), None)
+    assert response.status == HealthCheckResponse.OK
+
+    engine_action._initialdataset = None
+    response = engine_action._health_check(HealthCheckRequest(artifacts='initialdataset'), None)
+    assert response.status == HealthCheckResponse.NOK
+
+
+def test_load_obj_evicted_meanwhile(engine_action, tmpdir):
+    class EvictedAction(EngineAction):
+        # evicted by another thread as soon as it is set
+        _model = property(lambda self: None, lambda self, value: None)
+
+    engine_action._save_obj('_model', np.zeros(1000))
+    evicted_action = EvictedAction(default_root_path=str(tmpdir), persistence_mode='local')
+
+    assert evicted_action._load_obj('_model').shape == (1000,)
+
+
+def test_shared_artifact_accounted_once(engine_action, tmpdir):
+    residency_manager.configure(budget_bytes=10000)
+    other_action = EngineAction(default_root_path=str(tmpdir), persistence_mode='local')
+
+    engine_action._save_obj('_model', np.zeros(1000))
+    other_action._model = engine_action._model
+    other_action._load_obj('_model')
+    assert residency_manager.resident_bytes == 8000
+
+    engine_action._save_obj('_dataset', np.zeros(1000))
+
+    assert engine_action._model is None
+    assert other_action._model is None
+
+
+def test_evicts_from_snapshot(engine_action):
+    residency_manager.configure(budget_bytes=10000)
+    engine_action._save_obj('_model', np.zeros(1000))
+    engine_action._swap_snapshot(engine_action._stage_reload(['model']))
+
+    engine_action._save_obj('_dataset', np.zeros(1000))
+
+    assert '_model' not in engine_action._snapshot
+    assert engine_action._load_obj('_model').shape == (1000,)
+
+
+def test_release(engine_action):
+    residency_manager.configure(budget_bytes=10000)
+    engine_action._save_obj('_model', np.zeros(1000))
+
+    engine_action._release_local_saved_objects()
+
+    assert residency_manager.resident_bytes == 0
+
+
+def test_hits_do_not_take_the_lock(engine_action):
+    residency_manager.configure(budget_bytes=20000)
+    engine_action._save_obj('_model', np.zeros(1000))
+    engine_action._save_obj('_dataset', np.zeros(1000))
+
+    lock = residency_manager._lock
+    residency_manager._lock = None
+    try:
+        engine_action._load_obj('_model')
+    finally:
+        residency_manager._lock = lock
+
+    # the hit still counts as a use when evicting
+    engine_action._save_obj('_initialdataset', np.zeros(1000))
+    assert engine_action._dataset is None
+    assert engine_action._model is not None
+
+
+def test_lazy_artifact_size_refreshed(engine_action):
+    residency_manager.configure(budget_bytes=1 << 20)
+    engine_action._artifacts_options = {'model': {'serializer': 'dict', 'lazy': True}}
+    engine_action._save_obj('_model', {'svm': np.zeros(1000), 'rf': np.zeros(1000)})
+
+    engine_action._model = None
+    model = engine_action._load_obj('_model')
+    assert residency_manager.resident_bytes < 8000
+
+    model['svm']
+    engine_action._load_obj('_model')
+    assert residency_manager.resident_bytes >= 8000
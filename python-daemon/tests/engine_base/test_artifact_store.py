@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from marvin_python_daemon.engine_base.artifact_store import ArtifactStore
+from marvin_python_daemon.engine_base.serializers import default_registry
+
+
+@pytest.fixture
+def store(tmpdir):
+    return ArtifactStore(str(tmpdir))
+
+
+@pytest.fixture
+def dump():
+    return mock.MagicMock(side_effect=default_registry.dump)
+
+
+class TestArtifactStore(object):
+    def test_save(self, store, dump):
+        assert store.save('model', [1, 2], dump=dump) == 1
+
+        path = os.path.join(store.directory, 'model')
+        assert os.path.islink(path)
+        assert os.path.islink(path + '.manifest')
+        assert default_registry.load(path) == [1, 2]
+        assert store.current_version('model') == 1
+        assert list(store.versions('model').keys()) == ['1']
+
+    def test_save_unchanged(self, store, dump):
+        store.save('model', [1, 2], dump=dump)
+        index = store.read_index()
+
+        assert store.save('model', [1, 2], dump=dump) == 1
+        assert dump.call_count == 1
+        assert store.read_index() == index
+
+    def test_save_new_version(self, store, dump):
+        store.save('model', [1, 2], dump=dump)
+        assert store.save('model', [3], dump=dump) == 2
+        assert store.save('model', [3], dump=dump, options={'compression': 'lz4'}) == 3
+
+        assert dump.call_count == 3
+        assert default_registry.load(os.path.join(store.directory, 'model')) == [3]
+
+    def test_save_not_hashable(self, store, dump):
+        with mock.patch('joblib.hash', side_effect=TypeError('not picklable')):
+            assert store.save('model', [1, 2], dump=dump) == 1
+            assert store.save('model', [1, 2], dump=dump) == 1
+
+        assert dump.call_count == 2
+        assert len(os.listdir(store.objects_path)) == 1
+
+    def test_checkout(self, store, dump):
+        store.save('model', [1, 2], dump=dump)
+        store.save('model', [3], dump=dump)
+
+        store.checkout('model', 1)
+
+        assert store.current_version('model') == 1
+        assert default_registry.load(os.path.join(store.directory, 'model')) == [1, 2]
+        assert dump.call_count == 2
+
+        # the previous version is still a hash compare away
+        assert store.save('model', [3], dump=dump) == 2
+        assert dump.call_count == 2
+
+    def test_version_path(self, store, dump):
+        store.save('model', [1, 2], dump=dump)
+        store.save('model', [3], dump=dump)
+
+        assert default_registry.load(store.version_path('model', 1)) == [1, 2]
+        assert store.current_version('model') == 2
+        with pytest.raises(ValueError):
+            store.version_path('model', 5)
+
+    def test_checkout_unknown_version(self, store, dump):
+        store.save('model', [1, 2], dump=dump)
+
+        with pytest.raises(ValueError):
+            store.checkout('model', 5)
+
+    def test_keep_versions(self, store, dump):
+        for version in range(4):
+            store.save('model', [version], dump=dump, keep_versions=2)
+        store.save('dataset', [0], dump=dump, keep_versions=2)
+
+        assert sorted(store.versions('model').keys()) == ['3', '4']
+        assert len(os.listdir(store.objects_path)) == 2 + 1
+
+    def test_replaces_plain_file(self, store, dump):
+        path = os.path.join(store.directory, 'model')
+        default_registry.dump([0], path)
+
+        store.save('model', [1], dump=dump)
+
+        assert os.path.islink(path)
+        assert default_registry.load(path) == [1]
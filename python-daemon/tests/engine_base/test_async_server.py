@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import asyncio
+from concurrent import futures
+
+import grpc
+import pytest
+
+from marvin_python_daemon.engine_base import EngineBaseOnlineAction
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineActionRequest, OnlineBatchActionRequest
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineStreamRequest, HealthCheckRequest, HealthCheckResponse
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import ReloadRequest
+from marvin_python_daemon.engine_base.stubs.actions_pb2_grpc import OnlineActionHandlerStub
+
+
+class PreparatorAction(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return input_message["k"]
+
+
+class SyncPredictorAction(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return {"k": input_message * (params or {}).get("factor", 1)}
+
+
+class AsyncPredictorAction(EngineBaseOnlineAction):
+    async def execute(self, input_message, params, **kwargs):
+        # e.g. a request to a remote model
+        await asyncio.sleep(0.2)
+        return {"k": input_message * (params or {}).get("factor", 1)}
+
+
+def serve(action, workers=1):
+    action._previous_step = PreparatorAction()
+    server = action._prepare_async_remote_server(port=0, workers=workers, rpc_workers=None)
+    server.start()
+
+    channel = grpc.insecure_channel('localhost:{}'.format(server.port))
+    return server, channel, OnlineActionHandlerStub(channel)
+
+
+@pytest.mark.parametrize('action_class', [SyncPredictorAction, AsyncPredictorAction])
+def test_async_server(action_class):
+    server, channel, stub = serve(action_class())
+
+    try:
+        response = stub._remote_execute(OnlineActionRequest(message="{\"k\": 2}", params="{\"factor\": 3}"))
+        assert response.message == "{\"k\":6}"
+
+        response = stub._remote_execute_batch(OnlineBatchActionRequest(messages=["{\"k\": 1}", "{\"k\": 2}"]))
+        assert list(response.messages) == ["{\"k\":1}", "{\"k\":2}"]
+
+        requests = [OnlineStreamRequest(correlation_id=str(k), message="{{\"k\": {}}}".format(k)) for k in range(3)]
+        requests.append(OnlineStreamRequest(correlation_id="bad", message="{"))
+        responses = {response.correlation_id: (response.message, bool(response.error))
+                     for response in stub._remote_execute_stream(iter(requests))}
+        assert responses == {"0": ("{\"k\":0}", False), "1": ("{\"k\":1}", False), "2": ("{\"k\":2}", False),
+                             "bad": ("", True)}
+
+        response = stub._health_check(HealthCheckRequest())
+        assert response.status == HealthCheckResponse.OK
+    finally:
+        channel.close()
+        server.stop(0)
+
+
+def test_async_server_concurrent_requests():
+    server, channel, stub = serve(AsyncPredictorAction(), workers=1)
+
+    try:
+        pool = futures.ThreadPoolExecutor(max_workers=20)
+        start = time.time()
+        responses = [pool.submit(stub._remote_execute, OnlineActionRequest(message="{{\"k\": {}}}".format(k)))
+                     for k in range(20)]
+
+        assert [response.result().message for response in responses] == \
+            ["{{\"k\":{}}}".format(k) for k in range(20)]
+        # the awaits of the requests overlap on the event loop, even with a single worker thread
+        assert time.time() - start < 20 * 0.2 / 2
+    finally:
+        channel.close()
+        server.stop(0)
+
+
+def test_async_server_step_timings():
+    server, channel, stub = serve(AsyncPredictorAction(step_timings=True))
+
+    try:
+        response, call = stub._remote_execute.with_call(OnlineActionRequest(message="{\"k\": 2}"))
+        assert response.message == "{\"k\":2}"
+
+        timings = dict(metadata for metadata in call.trailing_metadata())['marvin-step-ms']
+        steps = dict(timing.split("=") for timing in timings.split(","))
+        assert list(steps) == ["PreparatorAction", "AsyncPredictorAction"]
+        assert float(steps["AsyncPredictorAction"]) >= 200
+    finally:
+        channel.close()
+        server.stop(0)
+
+
+def test_async_server_deadline_and_shedding():
+    class SlowPredictorAction(EngineBaseOnlineAction):
+        def execute(self, input_message, params, **kwargs):
+            time.sleep(0.3)
+            return input_message
+
+    server, channel, stub = serve(SlowPredictorAction(max_queue_ms=100), workers=1)
+
+    try:
+        pool = futures.ThreadPoolExecutor(max_workers=3)
+        calls = [pool.submit(stub._remote_execute, OnlineActionRequest(message="{\"k\": 1}"), timeout=10)
+                 for _ in range(3)]
+
+        codes = []
+        for call in calls:
+            try:
+                call.result()
+                codes.append(grpc.StatusCode.OK)
+            except grpc.RpcError as e:
+                codes.append(e.code())
+
+        assert sorted(code.name for code in codes) == ["OK", "RESOURCE_EXHAUSTED", "RESOURCE_EXHAUSTED"]
+    finally:
+        channel.close()
+        server.stop(0)
+
+    server, channel, stub = serve(AsyncPredictorAction())
+
+    try:
+        with pytest.raises(grpc.RpcError) as e:
+            stub._remote_execute(OnlineActionRequest(message="{\"k\": 1}"), timeout=0.1)
+        assert e.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+    finally:
+        channel.close()
+        server.stop(0)
+
+
+def test_async_execute_requires_async_server():
+    with pytest.raises(ValueError):
+        AsyncPredictorAction()._prepare_remote_server(port=0, workers=1, rpc_workers=1)
+
+
+def test_async_execute_without_micro_batching():
+    action = AsyncPredictorAction(max_batch_size=8)
+    action._start_micro_batcher()
+
+    assert action._micro_batcher is None
+
+
+def test_async_server_reload_disabled():
+    action = SyncPredictorAction()
+    action._reload_disabled = "Reload is not supported with 4 processes"
+    server, channel, stub = serve(action)
+
+    try:
+        with pytest.raises(grpc.RpcError) as error:
+            stub._remote_reload(ReloadRequest(artifacts="model"))
+        assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+        assert error.value.details() == "Reload is not supported with 4 processes"
+    finally:
+        channel.close()
+        server.stop(0)
+
+
+def test_async_server_rpc_workers_only_limit_execute():
+    action = AsyncPredictorAction()
+    action._previous_step = PreparatorAction()
+    server = action._prepare_async_remote_server(port=0, workers=1, rpc_workers=1)
+    server.start()
+
+    try:
+        with grpc.insecure_channel('localhost:{}'.format(server.port)) as channel:
+            stub = OnlineActionHandlerStub(channel)
+            call = stub._remote_execute.future(OnlineActionRequest(message="{\"k\": 1}"), timeout=10)
+            time.sleep(0.1)
+
+            with pytest.raises(grpc.RpcError) as error:
+                stub._remote_execute(OnlineActionRequest(message="{\"k\": 2}"), timeout=2)
+            assert error.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+            assert stub._health_check(HealthCheckRequest(), timeout=2).status == HealthCheckResponse.OK
+
+            assert call.result().message == "{\"k\":1}"
+    finally:
+        server.stop(0)
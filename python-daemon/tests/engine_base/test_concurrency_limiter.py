@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import threading
+from concurrent import futures
+
+import grpc
+import pytest
+
+from marvin_python_daemon.common.metrics import metrics_registry
+from marvin_python_daemon.engine_base import EngineBaseOnlineAction
+from marvin_python_daemon.engine_base.concurrency_limiter import AdaptiveConcurrencyLimiter, LimitExceeded, AIMD
+from marvin_python_daemon.engine_base.load_shedding import DeadlineExceeded
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineActionRequest
+from marvin_python_daemon.engine_base.stubs.actions_pb2_grpc import OnlineActionHandlerStub
+
+
+class SlowPredictor(EngineBaseOnlineAction):
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def execute(self, input_message, params, **kwargs):
+        with self.lock:
+            SlowPredictor.running += 1
+            SlowPredictor.peak = max(SlowPredictor.peak, SlowPredictor.running)
+        time.sleep(0.05)
+        with self.lock:
+            SlowPredictor.running -= 1
+        return input_message
+
+
+def run_concurrently(limiter, latency, calls, threads):
+    def call():
+        with limiter.slot():
+            time.sleep(latency)
+
+    pool = futures.ThreadPoolExecutor(max_workers=threads)
+    for result in [pool.submit(call) for _ in range(calls)]:
+        result.result()
+    pool.shutdown()
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(algorithm='unknown')
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyLimiter(algorithm=AIMD)
+
+
+def test_gradient_grows_with_stable_latency():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=16)
+
+    run_concurrently(limiter, 0.01, calls=200, threads=16)
+
+    assert limiter.limit > 2
+    assert limiter.inflight == 0 and limiter.waiting == 0
+
+
+def test_gradient_shrinks_when_latency_grows():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, max_limit=16)
+
+    for _ in range(16):
+        limiter.acquire()
+    for _ in range(16):
+        limiter.release(0.01)
+    limit = limiter.limit
+
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(0.2)
+
+    assert limiter.limit < limit
+
+
+def test_aimd():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, algorithm=AIMD, latency_threshold_ms=50)
+
+    for _ in range(3):
+        limiter.acquire()
+    limiter.release(0.01)
+    assert limiter.limit == 5
+
+    limiter.release(0.1)
+    assert limiter.limit == 4.5
+
+    limiter.release(dropped=True)
+    assert limiter.limit == pytest.approx(4.05)
+
+
+def test_queue_and_rejections():
+    metrics_registry.reset()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1, max_queue=1, name='predictor')
+
+    limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    time.sleep(0.05)
+
+    assert metrics_registry.get('concurrency_limit', action='predictor') == 1
+    assert metrics_registry.get('concurrency_inflight', action='predictor') == 1
+    assert metrics_registry.get('concurrency_queue_depth', action='predictor') == 1
+
+    with pytest.raises(LimitExceeded):
+        limiter.acquire()
+    assert metrics_registry.get('concurrency_rejected', action='predictor') == 1
+
+    # the slot released is taken by the request waiting
+    limiter.release(0.01)
+    waiter.join(timeout=5)
+    assert limiter.inflight == 1 and limiter.waiting == 0
+
+    with pytest.raises(DeadlineExceeded):
+        limiter.acquire(deadline=time.time() + 0.05)
+
+
+def test_server_limits_concurrency():
+    SlowPredictor.peak = 0
+    action = SlowPredictor(concurrency_limit={"initialLimit": 2, "maxLimit": 2, "maxQueue": 2})
+    server = action._prepare_remote_server(port=0, workers=8, rpc_workers=None)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+
+    try:
+        with grpc.insecure_channel('localhost:{}'.format(port)) as channel:
+            stub = OnlineActionHandlerStub(channel)
+            pool = futures.ThreadPoolExecutor(max_workers=8)
+            calls = [pool.submit(stub._remote_execute, OnlineActionRequest(message="1"), timeout=10)
+                     for _ in range(8)]
+
+            codes = []
+            for call in calls:
+                try:
+                    call.result()
+                    codes.append(grpc.StatusCode.OK)
+                except grpc.RpcError as e:
+                    codes.append(e.code())
+
+        assert SlowPredictor.peak == 2
+        assert codes.count(grpc.StatusCode.OK) >= 4
+        assert set(codes) <= {grpc.StatusCode.OK, grpc.StatusCode.RESOURCE_EXHAUSTED}
+    finally:
+        server.stop(0)
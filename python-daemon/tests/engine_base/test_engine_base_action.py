@@ -17,10 +17,15 @@
 
 from builtins import str
 import joblib as serializer
+import numpy as np
 import pytest
 import os
 import shutil
 import copy
+from types import MappingProxyType
+import time
+import threading
+from concurrent import futures
 from mock import ANY
 try:
     import mock
@@ -29,8 +34,14 @@ except ImportError:
 
 from marvin_python_daemon.engine_base import EngineBaseBatchAction
 from marvin_python_daemon.engine_base import EngineBaseAction, EngineBaseOnlineAction
+from marvin_python_daemon.engine_base.artifact_metrics import read_report, flush_report
+from marvin_python_daemon.engine_base.artifact_store import ArtifactStore, artifact_hash
+from marvin_python_daemon.engine_base.concurrency_limiter import AdaptiveConcurrencyLimiter
+from marvin_python_daemon.engine_base.payloads import encode_payload, decode_payload
+from marvin_python_daemon.common.metrics import metrics_registry
 from marvin_python_daemon.engine_base.stubs.actions_pb2 import HealthCheckResponse, HealthCheckRequest
 from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineActionRequest, ReloadRequest, BatchActionRequest
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineBatchActionRequest, OnlineStreamRequest, Payload
 
 
 @pytest.fixture
@@ -42,6 +53,15 @@ def engine_action():
     return EngineAction(default_root_path="/tmp/.marvin")
 
 
+@pytest.fixture
+def clean_artifacts(engine_action):
+    yield
+
+    # the artifacts still being saved in the background would land in the next test
+    futures.wait([future for _, future in engine_action._pending_saved_objects])
+    shutil.rmtree("/tmp/.marvin", ignore_errors=True)
+
+
 @pytest.fixture
 def batch_engine_action():
     class BatchEngineAction(EngineBaseBatchAction):
@@ -94,6 +114,91 @@ class TestEngineBaseAction:
         assert list(engine_action._local_saved_objects.keys()) == [
             object_reference]
 
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_save_and_load_obj_report(self, engine_action):
+        shutil.rmtree("/tmp/.marvin", ignore_errors=True)
+        metrics_registry.reset()
+        engine_action._persistence_mode = 'local'
+        engine_action._artifacts_options = {'params': {'measureMemory': True}}
+        engine_action._save_obj('_params', [6, 5, 4])
+        engine_action._load_obj('_params', force=True)
+
+        # written once per phase
+        assert read_report("/tmp/.marvin/test_base_action") == {}
+        flush_report()
+
+        report = read_report("/tmp/.marvin/test_base_action")
+        assert report['params']['bytesOnDisk'] == os.path.getsize("/tmp/.marvin/test_base_action/params")
+        assert report['params']['memoryBytes'] > 0
+        assert report['params']['dump']['ioSeconds'] is not None
+        assert report['params']['load']['codecSeconds'] is not None
+        assert metrics_registry.get('artifact_dump_seconds', artifact='params')['count'] == 1
+        assert metrics_registry.get('artifact_load_io_seconds', artifact='params')['count'] == 1
+        assert metrics_registry.get('artifact_bytes_on_disk', artifact='params') == report['params']['bytesOnDisk']
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_save_obj_memory_not_measured(self, engine_action):
+        metrics_registry.reset()
+        engine_action._persistence_mode = 'local'
+
+        with mock.patch('marvin_python_daemon.engine_base.artifact_metrics.estimate_size') as estimate_mocked:
+            engine_action._save_obj('_params', [6, 5, 4])
+
+        estimate_mocked.assert_not_called()
+        assert metrics_registry.get('artifact_memory_bytes', artifact='params') is None
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_save_obj_write_behind(self, engine_action):
+        obj = [6, 5, 4]
+        object_reference = '_params'
+        engine_action._persistence_mode = 'local'
+        engine_action._artifacts_options = {'params': {'writeBehind': True}}
+        engine_action._save_obj(object_reference, obj)
+
+        assert obj == engine_action._params
+        assert len(engine_action._pending_saved_objects) == 1
+
+        engine_action._flush_saved_objects()
+
+        assert engine_action._pending_saved_objects == []
+        assert EngineBaseAction.retrieve_obj("/tmp/.marvin/test_base_action/params") == obj
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_save_obj_write_behind_concurrent_flush(self, engine_action):
+        engine_action._persistence_mode = 'local'
+        engine_action._is_remote_calling = True
+        engine_action._artifacts_options = {'default': {'writeBehind': True}}
+
+        def save(thread):
+            for index in range(50):
+                engine_action._save_obj('_obj{}x{}'.format(thread, index), [index])
+                engine_action._flush_saved_objects('_obj{}x{}'.format(thread, index - 1))
+
+        threads = [threading.Thread(target=save, args=(thread,)) for thread in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine_action._flush_saved_objects()
+
+        # no save scheduled meanwhile is lost by the concurrent flushes
+        assert engine_action._pending_saved_objects == []
+        assert all(os.path.exists("/tmp/.marvin/test_base_action/obj{}x{}".format(thread, index))
+                   for thread in range(4) for index in range(50))
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    @mock.patch('marvin_python_daemon.engine_base.engine_base_action.serializer_registry')
+    def test_save_obj_write_behind_error(self, registry_mocked, engine_action):
+        registry_mocked.dump.side_effect = IOError('disk full')
+        engine_action._persistence_mode = 'local'
+        engine_action._artifacts_options = {'default': {'writeBehind': True}}
+        engine_action._save_obj('_params', [1])
+
+        with pytest.raises(IOError):
+            engine_action._flush_saved_objects()
+
+        assert engine_action._pending_saved_objects == []
+
     def test_release_saved_objects(self, engine_action):
         obj = [6, 5, 4]
         object_reference = '_params'
@@ -138,6 +243,63 @@ class TestEngineBaseAction:
 
         assert [1] == engine_action2._params
 
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_load_obj_local_persistence_mmap(self, engine_action):
+        import numpy as np
+
+        engine_action2 = copy.copy(engine_action)
+
+        obj = {'X': np.arange(10, dtype='float32')}
+        object_reference = '_params'
+        engine_action._persistence_mode = 'local'
+        engine_action._artifacts_options = {'params': {'mmap': True}}
+        engine_action._save_obj(object_reference, obj)
+
+        assert os.path.exists("/tmp/.marvin/test_base_action/params.manifest")
+
+        engine_action2._persistence_mode = 'local'
+        engine_action2._artifacts_options = {}
+        engine_action2._params = None
+        engine_action2._load_obj(object_reference)
+
+        assert isinstance(engine_action2._params['X'], np.memmap)
+        assert not engine_action2._params['X'].flags.writeable
+        np.testing.assert_array_equal(obj['X'], engine_action2._params['X'])
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_retrieve_obj_mmap(self, engine_action):
+        import numpy as np
+
+        obj = np.arange(10)
+        engine_action._artifacts_options = {'xpath': {'mmap': True}}
+        path = engine_action._get_object_file_path('xpath')
+        engine_action._serializer_dump(obj, path)
+
+        assert isinstance(EngineBaseAction.retrieve_obj(path), np.memmap)
+
+    def test_get_artifact_options(self, engine_action):
+        engine_action._artifacts_options = {
+            'default': {'compression': 'lz4', 'compressionLevel': 1},
+            'dataset': {'compression': 'none'}
+        }
+
+        assert engine_action._get_artifact_options('/tmp/.marvin/dataset') == {
+            'compression': 'none', 'compressionLevel': 1}
+        assert engine_action._get_artifact_options('/tmp/.marvin/model') == {
+            'compression': 'lz4', 'compressionLevel': 1}
+
+    @mock.patch('marvin_python_daemon.engine_base.engine_base_action.serializer_registry')
+    def test_serializer_dump_options(self, registry_mocked, engine_action):
+        engine_action._artifacts_options = {
+            'default': {'compression': 'zstd', 'compressionLevel': 5, 'protocol': 4},
+            'xpath': {'serializer': 'auto', 'mmap': True}
+        }
+        engine_action._serializer_dump([1], '/tmp/.marvin/xpath')
+
+        registry_mocked.dump.assert_called_once_with(
+            [1], '/tmp/.marvin/xpath', serializer='auto', mmap=True, compression='zstd',
+            compression_level=5, protocol=4)
+
     def test_health_check_ok(self, engine_action):
         obj = "obj1"
         obj_key = '_{0}'.format(obj)
@@ -176,6 +338,18 @@ class TestEngineBaseAction:
 
         assert expected_response.status == response.status
 
+    def test_health_check_without_side_effects(self, tmpdir):
+        class EngineAction(EngineBaseAction):
+            def execute(self, params, **kwargs):
+                return 1
+
+        engine_action = EngineAction(default_root_path=str(tmpdir.join('artifacts')), persistence_mode='local')
+        engine_action._model = None
+        response = engine_action._health_check(request=HealthCheckRequest(artifacts="model"), context=None)
+
+        assert response.status == HealthCheckResponse.NOK
+        assert not tmpdir.join('artifacts').exists()
+
     def test_health_check_exception(self):
         class BadEngineAction(EngineBaseAction):
             def execute(self, params, **kwargs):
@@ -196,6 +370,77 @@ class TestEngineBaseAction:
 
         assert expected_response.status == response.status
 
+    def test_health_check_readiness_after_startup_warmup(self):
+        class Predictor(EngineBaseOnlineAction):
+            warmed = []
+            release = threading.Event()
+
+            def execute(self, input_message, params, **kwargs):
+                self.release.wait(timeout=5)
+                self.warmed.append(input_message)
+                return input_message
+
+        engine_action = Predictor(startup_warmup=2, startup_messages=[{"k": 1}, {"k": 2}])
+        engine_action._prepare_remote_server(port=0, workers=1, rpc_workers=1)
+
+        response = engine_action._health_check(request=HealthCheckRequest(), context=None)
+        assert response.status == HealthCheckResponse.NOK
+        assert response.live and not response.ready
+
+        Predictor.release.set()
+        engine_action._startup_thread.join(timeout=5)
+
+        response = engine_action._health_check(request=HealthCheckRequest(), context=None)
+        assert response.status == HealthCheckResponse.OK
+        assert response.live and response.ready
+        assert Predictor.warmed == [{"k": 1}, {"k": 2}] * 2
+
+    def test_startup_warmup_failure(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return 1 / input_message
+
+        engine_action = Predictor(startup_warmup=1, startup_messages=[0], startup_retries=0, startup_fail_open=False)
+        engine_action._prepare_remote_server(port=0, workers=1, rpc_workers=1)
+        engine_action._startup_thread.join(timeout=5)
+
+        # live, but kept out of the traffic
+        response = engine_action._health_check(request=HealthCheckRequest(), context=None)
+        assert response.live and not response.ready
+        assert Predictor()._is_ready()
+
+    def test_startup_warmup_retry(self):
+        class Predictor(EngineBaseOnlineAction):
+            _startup_backoff = 0.01
+            calls = []
+
+            def execute(self, input_message, params, **kwargs):
+                self.calls.append(input_message)
+                if len(self.calls) < 3:
+                    raise ValueError("not yet")
+                return input_message
+
+        engine_action = Predictor(startup_warmup=1, startup_messages=[1], startup_fail_open=False)
+        engine_action._prepare_remote_server(port=0, workers=1, rpc_workers=1)
+        engine_action._startup_thread.join(timeout=5)
+
+        assert len(Predictor.calls) == 3
+        assert engine_action._health_check(request=HealthCheckRequest(), context=None).ready
+
+    def test_startup_warmup_fail_open(self):
+        class Predictor(EngineBaseOnlineAction):
+            _startup_backoff = 0.01
+
+            def execute(self, input_message, params, **kwargs):
+                return 1 / input_message
+
+        engine_action = Predictor(startup_warmup=1, startup_messages=[0], startup_retries=1)
+        engine_action._prepare_remote_server(port=0, workers=1, rpc_workers=1)
+        engine_action._startup_thread.join(timeout=5)
+
+        # ready by default once the retries are exhausted
+        assert engine_action._health_check(request=HealthCheckRequest(), context=None).ready
+
     def test_remote_execute_with_string_response(self):
         class StringReturnedAction(EngineBaseOnlineAction):
             def execute(self, input_message, params, **kwargs):
@@ -208,6 +453,301 @@ class TestEngineBaseAction:
 
         assert response.message == "message 1"
 
+    def test_remote_execute_micro_batched(self):
+        class BatchedAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return "single"
+
+            def execute_batch(self, input_messages, params, **kwargs):
+                return ["batch of {}".format(len(input_messages))] * len(input_messages)
+
+        engine_action = BatchedAction(max_batch_size=8, max_wait_ms=100)
+        engine_action._prepare_remote_server(port=0, workers=1, rpc_workers=1)
+
+        pool = futures.ThreadPoolExecutor(max_workers=3)
+        responses = [pool.submit(engine_action._remote_execute, OnlineActionRequest(message="{\"k\": 1}"), None)
+                     for _ in range(3)]
+
+        assert [response.result().message for response in responses] == ["batch of 3"] * 3
+        engine_action._micro_batcher.close()
+
+    def test_remote_execute_batch(self):
+        class PreparatorAction(EngineBaseOnlineAction):
+            def execute_batch(self, input_messages, params, **kwargs):
+                return [message["k"] for message in input_messages]
+
+        class PredictorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return {"k": input_message * params["factor"]} if input_message > 1 else "low"
+
+        engine_action = PredictorAction()
+        engine_action._previous_step = PreparatorAction()
+
+        request = OnlineBatchActionRequest(messages=["{\"k\": 1}", "{\"k\": 2}"], params="{\"factor\": 3}")
+        response = engine_action._remote_execute_batch(request=request, context=None)
+
+        assert list(response.messages) == ["low", "{\"k\":6}"]
+
+    def test_remote_execute_batch_missing_results(self):
+        class BatchedAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                pass
+
+            def execute_batch(self, input_messages, params, **kwargs):
+                return []
+
+        request = OnlineBatchActionRequest(messages=["1", "2"])
+
+        with pytest.raises(ValueError):
+            BatchedAction()._remote_execute_batch(request=request, context=None)
+
+    def test_remote_execute_stream(self):
+        release_first = threading.Event()
+
+        class StreamedAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                if input_message == "fail":
+                    raise ValueError("bad message")
+                if input_message == 1:
+                    release_first.wait(timeout=5)
+                return {"k": input_message}
+
+        def requests():
+            yield OnlineStreamRequest(correlation_id="a", message="1")
+            yield OnlineStreamRequest(correlation_id="b", message="2")
+            yield OnlineStreamRequest(correlation_id="c", message="\"fail\"")
+            yield OnlineStreamRequest(correlation_id="d", message="{")
+
+        engine_action = StreamedAction()
+        engine_action._workers = 4
+
+        responses = engine_action._remote_execute_stream(request_iterator=requests(), context=None)
+        # the slow first message does not hold back the others
+        received = [next(responses) for _ in range(3)]
+        release_first.set()
+        received += list(responses)
+
+        assert [response.correlation_id for response in received][-1] == "a"
+        assert {response.correlation_id: (response.message, bool(response.error)) for response in received} == {
+            "a": ("{\"k\":1}", False), "b": ("{\"k\":2}", False), "c": ("", True), "d": ("", True)}
+
+    def test_remote_execute_stream_submit_error(self):
+        class StreamedAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message
+
+        def requests():
+            yield OnlineStreamRequest(correlation_id="a", payload=Payload(data=b"1", dtype="unknown"))
+            yield OnlineStreamRequest(correlation_id="b", message="2")
+
+        engine_action = StreamedAction()
+        engine_action._workers = 1
+
+        # the slot of the message that could not be submitted is released
+        received = futures.ThreadPoolExecutor(max_workers=1).submit(
+            list, engine_action._remote_execute_stream(request_iterator=requests(), context=None)).result(timeout=5)
+
+        assert {response.correlation_id: (response.message, bool(response.error)) for response in received} == {
+            "a": ("", True), "b": ("2", False)}
+
+    def test_remote_execute_stream_window(self):
+        read, executed = [], []
+
+        class StreamedAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                time.sleep(0.01)
+                executed.append(input_message)
+                return input_message
+
+        def requests():
+            for message in range(5):
+                # the next message is only read when a slot of the window is free
+                assert len(read) - len(executed) <= 2
+                read.append(message)
+                yield OnlineStreamRequest(correlation_id=str(message), message=str(message))
+
+        engine_action = StreamedAction()
+        engine_action._workers = 2
+
+        responses = list(engine_action._remote_execute_stream(request_iterator=requests(), context=None))
+
+        assert sorted(response.correlation_id for response in responses) == ["0", "1", "2", "3", "4"]
+        assert not any(response.error for response in responses)
+
+    def test_remote_execute_stream_limit_and_deadline(self):
+        running, overlapped = [], []
+
+        class StreamedAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                running.append(input_message)
+                overlapped.append(len(running))
+                time.sleep(0.05)
+                running.remove(input_message)
+                return input_message
+
+        def requests():
+            for message in range(4):
+                yield OnlineStreamRequest(correlation_id=str(message), message=str(message))
+
+        engine_action = StreamedAction()
+        engine_action._workers = 4
+        engine_action._concurrency_limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        context = mock.Mock(time_remaining=mock.Mock(return_value=0.12))
+
+        responses = list(engine_action._remote_execute_stream(request_iterator=requests(), context=context))
+
+        # one message at a time, the ones still waiting when the deadline of the stream passes fail
+        assert max(overlapped) == 1
+        errors = [response for response in responses if response.error]
+        assert errors and all('Deadline exceeded' in response.error for response in errors)
+
+    def test_pipeline_execute_batch(self):
+        class PreparatorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message + 1
+
+        class PredictorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message * 2
+
+        engine_action = PredictorAction()
+        engine_action._previous_step = PreparatorAction()
+
+        assert engine_action._pipeline_execute_batch(input_messages=[1, 2], params=None) == [4, 6]
+
+    def test_pipeline_execute_step_timings(self):
+        class PreparatorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message + 1
+
+        class PredictorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                time.sleep(0.01)
+                return input_message * 2
+
+        metrics_registry.reset()
+        engine_action = PredictorAction()
+        engine_action._previous_step = PreparatorAction()
+        timings = []
+
+        assert engine_action._pipeline_execute(input_message=1, params=None, timings=timings) == 4
+        assert [step for step, _ in timings] == ["PreparatorAction", "PredictorAction"]
+        assert timings[1][1] >= 0.01
+        assert metrics_registry.get('pipeline_step_seconds', action='PredictorAction', step='PreparatorAction')['count'] == 1
+        assert metrics_registry.get('pipeline_step_seconds', action='PredictorAction', step='PredictorAction')['count'] == 1
+
+    def test_compiled_pipeline(self):
+        class PreparatorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message + 1
+
+        class PredictorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message * 2
+
+        engine_action = PredictorAction()
+        engine_action._previous_step = PreparatorAction()
+        pipeline = engine_action._compile_pipeline()
+
+        assert [step for step, _, _ in pipeline] == ["PreparatorAction", "PredictorAction"]
+        assert engine_action._get_pipeline() is pipeline
+        assert engine_action._pipeline_execute(input_message=1, params=None) == 4
+
+    def test_remote_execute_step_timings_metadata(self):
+        class PreparatorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message["k"]
+
+        class PredictorAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message * 2
+
+        engine_action = PredictorAction(step_timings=True)
+        engine_action._previous_step = PreparatorAction()
+        context = mock.MagicMock()
+
+        response = engine_action._remote_execute(OnlineActionRequest(message="{\"k\": 1}"), context)
+        assert response.message == "2"
+
+        (metadata, ), _ = context.set_trailing_metadata.call_args
+        key, value = metadata[0]
+        assert key == 'marvin-step-ms'
+        assert [timing.split("=")[0] for timing in value.split(",")] == ["PreparatorAction", "PredictorAction"]
+
+        context = mock.MagicMock()
+        engine_action._remote_execute_batch(OnlineBatchActionRequest(messages=["{\"k\": 1}"]), context)
+        context.set_trailing_metadata.assert_called_once()
+
+        context = mock.MagicMock()
+        PredictorAction()._remote_execute(OnlineActionRequest(message="1"), context)
+        context.set_trailing_metadata.assert_not_called()
+
+    def test_remote_execute_with_payload(self):
+        class ArrayAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return input_message.sum(axis=0)
+
+        request = OnlineActionRequest(payload=encode_payload(np.ones((2, 3), dtype=np.int32)))
+        response = ArrayAction()._remote_execute(request=request, context=None)
+
+        assert response.message == ""
+        np.testing.assert_array_equal(decode_payload(response.payload), [2, 2, 2])
+
+    def test_remote_execute_array_to_json_request(self):
+        class ArrayAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return np.array(input_message) * 2
+
+        response = ArrayAction()._remote_execute(request=OnlineActionRequest(message="[1, 2]"), context=None)
+
+        assert response.message == "[2,4]"
+        assert not response.HasField('payload')
+
+    def test_remote_execute_invalid_payload(self):
+        context = mock.MagicMock()
+        request = OnlineActionRequest(payload=Payload(data=b"1", dtype="unknown"))
+
+        EngineBaseOnlineAction()._remote_execute(request=request, context=context)
+
+        assert context.abort.call_args[0][0].name == 'INVALID_ARGUMENT'
+
+    def test_remote_execute_batch_with_payloads(self):
+        class ArrayAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return int(input_message.sum())
+
+        request = OnlineBatchActionRequest(payloads=[encode_payload(np.ones(2)), encode_payload(np.ones(3))])
+        response = ArrayAction()._remote_execute_batch(request=request, context=None)
+
+        assert list(response.messages) == ["2", "3"]
+
+    def test_remote_execute_cached(self):
+        calls = []
+
+        class CachedAction(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                calls.append(input_message)
+                return input_message["k"] * 2
+
+        engine_action = CachedAction(prediction_cache={"maxEntries": 10})
+        request = OnlineActionRequest(message="{\"k\": 1}")
+
+        assert engine_action._remote_execute(request=request, context=None).message == "2"
+        assert engine_action._remote_execute(request=request, context=None).message == "2"
+        assert len(calls) == 1
+
+        # reloaded artifacts invalidate the cached results
+        engine_action._swap_snapshot(MappingProxyType({}))
+        engine_action._remote_execute(request=request, context=None)
+        assert len(calls) == 2
+
+        batch_request = OnlineBatchActionRequest(messages=["{\"k\": 1}", "{\"k\": 2}"])
+        response = engine_action._remote_execute_batch(request=batch_request, context=None)
+        assert list(response.messages) == ["2", "4"]
+        assert calls == [{"k": 1}, {"k": 1}, {"k": 2}]
+
+        assert engine_action._prediction_cache.stats()["hits"] == 2
+
     def test_remote_execute_with_int_response(self):
         class StringReturnedAction(EngineBaseOnlineAction):
             def execute(self, input_message, params, **kwargs):
@@ -230,7 +770,7 @@ class TestEngineBaseAction:
         engine_action = StringReturnedAction()
         response = engine_action._remote_execute(request=request, context=None)
 
-        assert response.message == "{\"r\": 1}"
+        assert response.message == "{\"r\":1}"
 
     def test_remote_execute_with_list_response(self):
         class StringReturnedAction(EngineBaseOnlineAction):
@@ -242,18 +782,117 @@ class TestEngineBaseAction:
         engine_action = StringReturnedAction()
         response = engine_action._remote_execute(request=request, context=None)
 
-        assert response.message == "[1, 2]"
+        assert response.message == "[1,2]"
 
-    @mock.patch('marvin_python_daemon.engine_base.engine_base_action.EngineBaseAction._load_obj')
-    def test_remote_reload_with_artifacts(self, load_obj_mocked, engine_action):
+    @mock.patch('marvin_python_daemon.engine_base.engine_base_action.EngineBaseAction._serializer_load')
+    def test_remote_reload_with_artifacts(self, serializer_load_mocked, engine_action):
+        serializer_load_mocked.return_value = "new"
         objs_key = "obj1"
         engine_action._save_obj(objs_key, "check")
         request = ReloadRequest(artifacts=objs_key, protocol='xyz')
 
         response = engine_action._remote_reload(request, None)
-        load_obj_mocked.assert_called_once_with(
-            force=True, object_reference=u'obj1')
+        serializer_load_mocked.assert_called_once_with(
+            "/tmp/.marvin/test_base_action/obj1")
         assert response.message == "Reloaded"
+        assert engine_action._obj1 == "new"
+        assert dict(engine_action._snapshot) == {"_obj1": "new"}
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_remote_reload_keeps_pinned_snapshot(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return [self._load_obj('model'), self._load_obj('metrics')]
+
+        engine_action = Predictor(default_root_path="/tmp/.marvin", persistence_mode='local')
+        for name, value in (('model', 1), ('metrics', 1)):
+            engine_action._serializer_dump(value, engine_action._get_object_file_path(name))
+        engine_action._remote_reload(ReloadRequest(artifacts='model,metrics'), None)
+
+        for name, value in (('model', 2), ('metrics', 2)):
+            engine_action._serializer_dump(value, engine_action._get_object_file_path(name))
+
+        with engine_action._pin_snapshot(engine_action._snapshot):
+            engine_action._remote_reload(ReloadRequest(artifacts='model,metrics'), None)
+
+            # an in-flight request still sees the artifacts it started with
+            assert engine_action._pipeline_execute(None, None) == [1, 1]
+
+        response = engine_action._remote_execute(OnlineActionRequest(), None)
+        assert response.message == "[2,2]"
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_remote_reload_warmup_failure(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return 1 / self._load_obj('model')
+
+        engine_action = Predictor(default_root_path="/tmp/.marvin", persistence_mode='local',
+                                  warmup_messages=[{"k": 1}])
+        engine_action._serializer_dump(1, engine_action._get_object_file_path('model'))
+        engine_action._remote_reload(ReloadRequest(artifacts='model'), None)
+
+        engine_action._serializer_dump(0, engine_action._get_object_file_path('model'))
+        with pytest.raises(ZeroDivisionError):
+            engine_action._remote_reload(ReloadRequest(artifacts='model'), None)
+
+        assert engine_action._snapshot["_model"] == 1
+        assert engine_action._model == 1
+
+    @mock.patch('marvin_python_daemon.engine_base.engine_base_action.EngineBaseAction._serializer_load')
+    def test_remote_reload_disabled(self, serializer_load_mocked, engine_action):
+        engine_action._reload_disabled = "Reload is not supported with 4 processes"
+        context = mock.MagicMock()
+
+        response = engine_action._remote_reload(ReloadRequest(artifacts='obj1'), context)
+
+        assert response.message == "Reload is not supported with 4 processes"
+        assert context.abort.call_args[0][0].name == 'FAILED_PRECONDITION'
+        assert not serializer_load_mocked.called
+        assert engine_action._remote_reload(ReloadRequest(), None).message == "Nothing to reload"
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_remote_reload_with_artifact_version(self, engine_action):
+        shutil.rmtree("/tmp/.marvin", ignore_errors=True)
+        engine_action._persistence_mode = 'local'
+        engine_action._is_remote_calling = True
+        engine_action._artifacts_options = {'params': {'versions': 3}}
+        engine_action._save_obj('_params', [1])
+        engine_action._save_obj('_params', [2])
+
+        response = engine_action._remote_reload(ReloadRequest(artifacts='params@1'), None)
+
+        assert response.message == "Reloaded"
+        assert engine_action._params == [1]
+        assert os.path.islink("/tmp/.marvin/test_base_action/params")
+
+        # without versions the artifact is written as a plain file again
+        engine_action._artifacts_options = {}
+        engine_action._save_obj('_params', [3])
+
+        assert not os.path.islink("/tmp/.marvin/test_base_action/params")
+        assert EngineBaseAction.retrieve_obj("/tmp/.marvin/test_base_action/params") == [3]
+
+    @pytest.mark.usefixtures('clean_artifacts')
+    def test_remote_reload_artifact_version_warmup_failure(self):
+        class Predictor(EngineBaseOnlineAction):
+            def execute(self, input_message, params, **kwargs):
+                return 1 / self._load_obj('model')
+
+        engine_action = Predictor(default_root_path="/tmp/.marvin", persistence_mode='local',
+                                  warmup_messages=[{"k": 1}])
+        engine_action._is_remote_calling = True
+        engine_action._artifacts_options = {'model': {'versions': 3}}
+        engine_action._save_obj('_model', 0)
+        engine_action._save_obj('_model', 1)
+        engine_action._flush_saved_objects()
+
+        with pytest.raises(ZeroDivisionError):
+            engine_action._remote_reload(ReloadRequest(artifacts='model@1'), None)
+
+        # the artifact path is only switched to versions that warmed up
+        assert ArtifactStore("/tmp/.marvin/test_base_action").current_version('model') == 2
+        assert EngineBaseAction.retrieve_obj("/tmp/.marvin/test_base_action/model") == 1
 
     @mock.patch('marvin_python_daemon.engine_base.engine_base_action.EngineBaseAction._load_obj')
     def test_remote_reload_without_artifacts(self, load_obj_mocked, engine_action):
@@ -304,6 +943,85 @@ class TestEngineBaseBatchAction:
         previous._pipeline_execute.assert_called_once_with(123)
         batch_engine_action.execute.assert_called_once_with(123)
 
+    def test_memoized_execute(self, batch_engine_action, tmpdir):
+        # memos of previous runs would restore the artifacts instead of executing
+        batch_engine_action._default_root_path = str(tmpdir)
+        path = batch_engine_action._get_object_file_path('dataset')
+
+        def execute(params, **kwargs):
+            batch_engine_action._dataset = None
+            batch_engine_action._save_obj('_dataset', [params['n']])
+
+        batch_engine_action.execute = mock.MagicMock(side_effect=execute)
+        batch_engine_action._persistence_mode = 'local'
+        batch_engine_action._memoize = True
+        batch_engine_action._input_artifacts = ['initialdataset']
+        batch_engine_action._serializer_dump([1], batch_engine_action._get_object_file_path('initialdataset'))
+
+        batch_engine_action._memoized_execute({'n': 1})
+        batch_engine_action._serializer_dump([0], path)
+        batch_engine_action._memoized_execute({'n': 1})
+
+        assert batch_engine_action.execute.call_count == 1
+        assert batch_engine_action._dataset is None
+        assert EngineBaseAction.retrieve_obj(path) == [1]
+
+        batch_engine_action._memoized_execute({'n': 2})
+
+        assert batch_engine_action.execute.call_count == 2
+        assert EngineBaseAction.retrieve_obj(path) == [2]
+
+        batch_engine_action._serializer_dump([2], batch_engine_action._get_object_file_path('initialdataset'))
+        batch_engine_action._memoized_execute({'n': 2})
+
+        assert batch_engine_action.execute.call_count == 3
+
+    def test_memoized_execute_links(self, batch_engine_action, tmpdir):
+        batch_engine_action._default_root_path = str(tmpdir)
+        batch_engine_action._persistence_mode = 'local'
+        batch_engine_action._memoize = True
+        batch_engine_action._artifacts_options = {'model': {'versions': 3}}
+
+        def execute(params, **kwargs):
+            batch_engine_action._dataset = None
+            batch_engine_action._model = None
+            batch_engine_action._save_obj('_dataset', [params['n']])
+            batch_engine_action._save_obj('_model', {'n': params['n']})
+
+        batch_engine_action.execute = mock.MagicMock(side_effect=execute)
+        dataset_path = batch_engine_action._get_object_file_path('dataset')
+        model_path = batch_engine_action._get_object_file_path('model')
+
+        batch_engine_action._memoized_execute({'n': 1})
+        model_hash = artifact_hash(model_path)
+
+        # the memo hard links the artifact, the next save replaces it without writing through the link
+        assert os.stat(dataset_path).st_nlink == 2
+        batch_engine_action._memoized_execute({'n': 2})
+        batch_engine_action._memoized_execute({'n': 1})
+
+        assert batch_engine_action.execute.call_count == 2
+        assert EngineBaseAction.retrieve_obj(dataset_path) == [1]
+        # stored artifacts are checked out again, still links into the store
+        assert os.path.islink(model_path) and artifact_hash(model_path) == model_hash
+        assert ArtifactStore(os.path.dirname(model_path)).current_version('model') == 1
+
+    def test_memoized_execute_disabled(self, batch_engine_action):
+        batch_engine_action.execute = mock.MagicMock()
+        batch_engine_action._persistence_mode = 'local'
+
+        batch_engine_action._memoized_execute(123)
+        batch_engine_action._memoized_execute(123)
+
+        assert batch_engine_action.execute.call_count == 2
+
+    def test_pipeline_execute_flushes_saved_objects(self, batch_engine_action):
+        batch_engine_action._flush_saved_objects = mock.MagicMock()
+        batch_engine_action._flush_saved_objects.side_effect = IOError('disk full')
+
+        with pytest.raises(IOError):
+            batch_engine_action._pipeline_execute(params=123)
+
     def test_remote_execute_without_request_params(self, batch_engine_action):
         batch_engine_action._params = 123
         batch_engine_action._pipeline_execute = mock.MagicMock()
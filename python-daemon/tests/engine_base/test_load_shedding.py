@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from concurrent import futures
+
+import grpc
+import pytest
+
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from marvin_python_daemon.common.metrics import metrics_registry
+from marvin_python_daemon.engine_base import EngineBaseOnlineAction, EngineBaseBatchAction
+from marvin_python_daemon.engine_base.micro_batcher import MicroBatcher
+from marvin_python_daemon.engine_base.load_shedding import DeadlineExceeded, RequestShed, QueueTimeShedder
+from marvin_python_daemon.engine_base.load_shedding import deadline_scope, check_deadline, get_deadline
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineActionRequest, BatchActionRequest
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import HealthCheckRequest, HealthCheckResponse
+from marvin_python_daemon.engine_base.stubs.actions_pb2_grpc import OnlineActionHandlerStub
+
+executed = []
+
+
+class SlowPreparator(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        time.sleep(0.3)
+        return input_message
+
+
+class Predictor(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        executed.append(input_message)
+        return input_message
+
+
+def context_with_deadline(remaining):
+    context = mock.MagicMock()
+    context.time_remaining.return_value = remaining
+    return context
+
+
+def test_deadline_scope():
+    assert get_deadline() is None
+
+    with deadline_scope(context_with_deadline(0.05)) as deadline:
+        assert get_deadline() == deadline
+        check_deadline('step')
+
+        # nested rpcs without a deadline keep the one of the request
+        with deadline_scope(None):
+            assert get_deadline() == deadline
+
+        time.sleep(0.06)
+        with pytest.raises(DeadlineExceeded):
+            check_deadline('step')
+
+    assert get_deadline() is None
+
+
+def test_pipeline_abandoned_after_deadline():
+    del executed[:]
+    action = Predictor()
+    action._previous_step = SlowPreparator()
+    context = context_with_deadline(0.1)
+
+    action._remote_execute(OnlineActionRequest(message="1"), context)
+
+    assert executed == []
+    context.abort.assert_called_once_with(grpc.StatusCode.DEADLINE_EXCEEDED, mock.ANY)
+
+    with deadline_scope(context_with_deadline(0)):
+        with pytest.raises(DeadlineExceeded):
+            action._pipeline_execute(1, None)
+
+
+def test_batch_action_deadline():
+    class Trainer(EngineBaseBatchAction):
+        def execute(self, params, **kwargs):
+            executed.append(params)
+
+    del executed[:]
+    context = context_with_deadline(0)
+
+    Trainer()._remote_execute(BatchActionRequest(), context)
+
+    assert executed == []
+    context.abort.assert_called_once_with(grpc.StatusCode.DEADLINE_EXCEEDED, mock.ANY)
+
+
+def test_micro_batcher_expired_messages():
+    batcher = MicroBatcher(lambda messages, params: messages, max_batch_size=4, max_wait_ms=10)
+
+    expired = batcher.submit(1, None, deadline=time.time() - 1)
+    valid = batcher.submit(2, None, deadline=time.time() + 10)
+
+    with pytest.raises(DeadlineExceeded):
+        expired.result(timeout=5)
+    assert valid.result(timeout=5) == 2
+    batcher.close()
+
+
+def test_queue_time_shedder():
+    metrics_registry.reset()
+    shedder = QueueTimeShedder(max_queue_ms=50, name='predictor')
+
+    shedder.check(0.01)
+    with pytest.raises(RequestShed):
+        shedder.check(0.06)
+
+    assert metrics_registry.get('rpc_queue_seconds', action='predictor')['count'] == 2
+    assert metrics_registry.get('rpc_shed', action='predictor') == 1
+    QueueTimeShedder().check(100)
+
+
+def test_server_sheds_queued_requests():
+    action = SlowPreparator(max_queue_ms=100)
+    server = action._prepare_remote_server(port=0, workers=1, rpc_workers=None)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+
+    try:
+        with grpc.insecure_channel('localhost:{}'.format(port)) as channel:
+            stub = OnlineActionHandlerStub(channel)
+            pool = futures.ThreadPoolExecutor(max_workers=3)
+            calls = [pool.submit(stub._remote_execute, OnlineActionRequest(message="1"), timeout=10)
+                     for _ in range(3)]
+
+            codes = []
+            for call in calls:
+                try:
+                    call.result()
+                    codes.append(grpc.StatusCode.OK)
+                except grpc.RpcError as e:
+                    codes.append(e.code())
+
+            # the first request is served, the others waited 300ms or more for the only thread
+            assert codes.count(grpc.StatusCode.OK) == 1
+            assert codes.count(grpc.StatusCode.RESOURCE_EXHAUSTED) == 2
+
+            # health checks are never shed
+            assert stub._health_check(HealthCheckRequest()).status == HealthCheckResponse.OK
+    finally:
+        server.stop(0)
+
+
+def test_server_deadline_exceeded():
+    del executed[:]
+    action = Predictor()
+    action._previous_step = SlowPreparator()
+    server = action._prepare_remote_server(port=0, workers=1, rpc_workers=None)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+
+    try:
+        with grpc.insecure_channel('localhost:{}'.format(port)) as channel:
+            with pytest.raises(grpc.RpcError) as e:
+                OnlineActionHandlerStub(channel)._remote_execute(OnlineActionRequest(message="1"), timeout=0.1)
+
+        assert e.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+        time.sleep(0.4)
+        assert executed == []
+    finally:
+        server.stop(0)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from marvin_python_daemon.engine_base.micro_batcher import MicroBatcher
+
+
+@pytest.fixture
+def batches():
+    return []
+
+
+def make_batcher(batches, max_batch_size=4, max_wait_ms=200):
+    def handler(input_messages, params):
+        batches.append((list(input_messages), params))
+        if "bad" in input_messages:
+            raise ValueError("bad message")
+        return [message * params["factor"] for message in input_messages]
+
+    return MicroBatcher(handler, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+
+def test_groups_concurrent_messages(batches):
+    batcher = make_batcher(batches)
+    results = [batcher.submit(message, {"factor": 2}) for message in range(6)]
+
+    assert [future.result(timeout=5) for future in results] == [0, 2, 4, 6, 8, 10]
+    assert [len(messages) for messages, _ in batches] == [4, 2]
+
+    batcher.close()
+
+
+def test_batches_share_params(batches):
+    batcher = make_batcher(batches)
+    first = batcher.submit(1, {"factor": 2})
+    second = batcher.submit(1, {"factor": 3})
+    third = batcher.submit(2, {"factor": 2})
+
+    assert (first.result(timeout=5), second.result(timeout=5), third.result(timeout=5)) == (2, 3, 4)
+    assert batches == [([1, 2], {"factor": 2}), ([1], {"factor": 3})]
+
+    batcher.close()
+
+
+def test_failed_batch_falls_back_per_message(batches):
+    batcher = make_batcher(batches)
+    good = batcher.submit(1, {"factor": 2})
+    bad = batcher.submit("bad", {"factor": 2})
+
+    assert good.result(timeout=5) == 2
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert [messages for messages, _ in batches] == [[1, "bad"], [1], ["bad"]]
+
+    batcher.close()
+
+
+def test_closed(batches):
+    batcher = make_batcher(batches)
+    batcher.close()
+
+    with pytest.raises(RuntimeError):
+        batcher.submit(1, {"factor": 2})
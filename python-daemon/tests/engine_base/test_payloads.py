@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import mock
+import pytest
+import numpy as np
+
+from marvin_python_daemon.engine_base.payloads import decode_payload, encode_payload, is_array, InvalidPayload
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import Payload
+
+
+def test_raw_payload():
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+    payload = encode_payload(array)
+
+    assert (payload.encoding, payload.dtype, list(payload.shape)) == ('raw', '<f4', [3, 4])
+
+    decoded = decode_payload(Payload.FromString(payload.SerializeToString()))
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, array)
+    # decoded in place, without copying the request bytes
+    assert not decoded.flags.writeable
+
+
+def test_raw_payload_defaults():
+    np.testing.assert_array_equal(decode_payload(Payload(data=b'\x01\x02')), np.array([1, 2], dtype=np.uint8))
+
+
+def test_msgpack_payload():
+    pytest.importorskip('msgpack')
+    obj = {'pixels': [1, 2, 3], 'label': 'seven'}
+
+    assert decode_payload(encode_payload(obj, encoding='msgpack')) == obj
+
+
+def test_msgpack_payload_not_installed():
+    with mock.patch.dict('sys.modules', {'msgpack': None}):
+        with pytest.raises(InvalidPayload, match='msgpack package is required'):
+            decode_payload(Payload(data=b'\x80', encoding='msgpack'))
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        decode_payload(Payload(data=b'', encoding='avro'))
+    with pytest.raises(ValueError):
+        encode_payload([1], encoding='avro')
+
+
+def test_invalid_raw_payload():
+    with pytest.raises(InvalidPayload):
+        decode_payload(Payload(data=b'1234', dtype='unknown'))
+    with pytest.raises(InvalidPayload):
+        decode_payload(Payload(data=b'1234', dtype='<f4', shape=[2, 2]))
+
+
+def test_is_array():
+    assert is_array(np.zeros(2))
+    assert not is_array(np.array([{}, None]))
+    assert not is_array([1, 2])
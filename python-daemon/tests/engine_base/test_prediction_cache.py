@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+try:
+    import mock
+except ImportError:
+    import unittest.mock as mock
+
+from marvin_python_daemon.engine_base.prediction_cache import PredictionCache, cache_key
+from marvin_python_daemon.common.metrics import metrics_registry
+
+
+def test_cache_key():
+    assert cache_key({"a": 1, "b": 2}, None, 0) == cache_key({"b": 2, "a": 1}, None, 0)
+    assert cache_key({"a": 1}, None, 0) != cache_key({"a": 1}, None, 1)
+    assert cache_key({"a": 1}, {"p": 1}, 0) != cache_key({"a": 1}, {"p": 2}, 0)
+    assert cache_key(np.ones(3), None, 0) == cache_key(np.ones(3), None, 0)
+    assert cache_key(np.ones(3), None, 0) != cache_key(np.zeros(3), None, 0)
+
+
+def test_get_and_put():
+    metrics_registry.reset()
+    cache = PredictionCache(max_entries=2, name='predictor')
+
+    assert cache.get('a') == (False, None)
+    cache.put('a', 1)
+    assert cache.get('a') == (True, 1)
+
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'bytes': 0}
+    assert metrics_registry.get('prediction_cache_hits', cache='predictor') == 1
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.evictions == 1
+
+
+@mock.patch('marvin_python_daemon.engine_base.prediction_cache.time.time')
+def test_ttl(time_mocked):
+    time_mocked.return_value = 100
+    cache = PredictionCache(ttl_seconds=10)
+    cache.put('a', 1)
+
+    time_mocked.return_value = 105
+    assert cache.get('a') == (True, 1)
+
+    time_mocked.return_value = 111
+    assert cache.get('a') == (False, None)
+    assert len(cache) == 0
+
+
+def test_memory_cap():
+    cache = PredictionCache(max_entries=None, max_bytes='20K')
+    cache.put('a', np.zeros(1000))
+    cache.put('b', np.zeros(1000))
+    cache.put('c', np.zeros(1000))
+    # bigger than the whole cache
+    cache.put('d', np.zeros(10000))
+
+    assert [cache.get(key)[0] for key in 'abcd'] == [False, True, True, False]
+    assert cache.size_bytes <= 20 * 1024
+
+
+def test_from_metadata():
+    cache = PredictionCache.from_metadata({"maxEntries": 10, "ttlSeconds": 60, "maxBytes": "1M"})
+
+    assert (cache.max_entries, cache.ttl_seconds, cache.max_bytes) == (10, 60.0, 1 << 20)
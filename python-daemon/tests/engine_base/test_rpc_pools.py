@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import threading
+
+import grpc
+import pytest
+
+from marvin_python_daemon.common.metrics import metrics_registry
+from marvin_python_daemon.engine_base import EngineBaseOnlineAction
+from marvin_python_daemon.engine_base.rpc_pools import MeteredThreadPoolExecutor
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineActionRequest, ReloadRequest
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import HealthCheckRequest, HealthCheckResponse
+from marvin_python_daemon.engine_base.stubs.actions_pb2_grpc import OnlineActionHandlerStub
+
+
+class BlockedPredictor(EngineBaseOnlineAction):
+    release = threading.Event()
+    threads = {}
+
+    def execute(self, input_message, params, **kwargs):
+        self.release.wait(timeout=10)
+        return input_message
+
+    def _health_check(self, request, context):
+        self.threads['health'] = threading.current_thread().name
+        return super(BlockedPredictor, self)._health_check(request, context)
+
+    def _remote_reload(self, request, context):
+        self.threads['reload'] = threading.current_thread().name
+        return super(BlockedPredictor, self)._remote_reload(request, context)
+
+
+def test_metered_thread_pool_executor():
+    metrics_registry.reset()
+    pool = MeteredThreadPoolExecutor(1, 'execute', action='predictor')
+    release = threading.Event()
+
+    pool.submit(release.wait, 5)
+    queued = [pool.submit(lambda value: value, value) for value in range(3)]
+
+    assert pool.queue_depth == 3
+    assert metrics_registry.get('rpc_pool_queue_depth', pool='execute', action='predictor') == 3
+
+    release.set()
+    assert [future.result(timeout=5) for future in queued] == [0, 1, 2]
+    assert pool.queue_depth == 0
+    assert metrics_registry.get('rpc_pool_queue_seconds', pool='execute', action='predictor')['count'] == 4
+    pool.shutdown()
+
+
+def test_control_rpcs_not_queued_behind_execute():
+    action = BlockedPredictor()
+    server = action._prepare_remote_server(port=0, workers=1, rpc_workers=None)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+
+    try:
+        with grpc.insecure_channel('localhost:{}'.format(port)) as channel:
+            stub = OnlineActionHandlerStub(channel)
+            # the only execute thread is busy and another request is queued for it
+            calls = [stub._remote_execute.future(OnlineActionRequest(message="1"), timeout=10) for _ in range(2)]
+
+            assert stub._health_check(HealthCheckRequest(), timeout=2).status == HealthCheckResponse.OK
+            assert stub._remote_reload(ReloadRequest(), timeout=2).message == "Nothing to reload"
+
+            BlockedPredictor.release.set()
+            assert [call.result().message for call in calls] == ["1", "1"]
+
+        assert BlockedPredictor.threads['health'].startswith('BlockedPredictor-health')
+        assert BlockedPredictor.threads['reload'].startswith('BlockedPredictor-reload')
+    finally:
+        server.stop(0)
+
+
+def test_rpc_workers_only_limit_execute():
+    BlockedPredictor.release = threading.Event()
+    action = BlockedPredictor()
+    server = action._prepare_remote_server(port=0, workers=1, rpc_workers=2)
+    port = server.add_insecure_port('localhost:0')
+    server.start()
+
+    try:
+        with grpc.insecure_channel('localhost:{}'.format(port)) as channel:
+            stub = OnlineActionHandlerStub(channel)
+            calls = [stub._remote_execute.future(OnlineActionRequest(message="1"), timeout=10) for _ in range(2)]
+            time.sleep(0.2)
+
+            with pytest.raises(grpc.RpcError) as error:
+                stub._remote_execute(OnlineActionRequest(message="1"), timeout=2)
+            assert error.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+
+            # the control rpcs are not counted in the limit
+            assert stub._health_check(HealthCheckRequest(), timeout=2).status == HealthCheckResponse.OK
+            assert stub._remote_reload(ReloadRequest(), timeout=2).message == "Nothing to reload"
+
+            BlockedPredictor.release.set()
+            assert [call.result().message for call in calls] == ["1", "1"]
+            assert stub._remote_execute(OnlineActionRequest(message="2"), timeout=2).message == "2"
+    finally:
+        server.stop(0)
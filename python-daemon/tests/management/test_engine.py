@@ -24,7 +24,12 @@ from mock import call
 from mock import ANY
 from marvin_python_daemon.management.engine import MarvinDryRun
 from marvin_python_daemon.management.engine import dryrun
+from marvin_python_daemon.management.engine import get_artifacts_options, get_warmup_messages, get_startup_warmup, \
+    get_startup_retries
+from marvin_python_daemon.management.engine import generate_kwargs, ArtifactsLoader
+from marvin_python_daemon.management.engine import configure_artifacts_residency, configure_serving_logging
 import os
+import pytest
 
 
 mocked_conf = {
@@ -48,6 +53,9 @@ class AcquisitorAndCleaner():
     def execute(self, **kwargs):
         print('test')
 
+    def _flush_saved_objects(self):
+        pass
+
 
 @mock.patch('marvin_python_daemon.management.engine.time.time')
 @mock.patch('marvin_python_daemon.management.engine.MarvinDryRun')
@@ -60,7 +68,7 @@ def test_dryrun(system_mocked, MarvinDryRun_mocked, time_mocked):
 
     time_mocked.assert_called()
     MarvinDryRun_mocked.assert_called_with(config=mocked_conf, messages=[
-                                           {}, {}])
+                                           {}, {}], artifacts_options={}, memoize=False)
 
     MarvinDryRun_mocked.return_value.execute.assert_called_with(clazz='Feedback',
                                                                 params={}, profiling_enabled=None)
@@ -71,7 +79,7 @@ def test_dryrun(system_mocked, MarvinDryRun_mocked, time_mocked):
 
     time_mocked.assert_called()
     MarvinDryRun_mocked.assert_called_with(config=mocked_conf, messages=[
-                                           {}, {}])
+                                           {}, {}], artifacts_options={}, memoize=False)
 
 
 @mock.patch('marvin_python_daemon.management.engine.dynamic_import')
@@ -112,3 +120,104 @@ def test_marvindryrun(import_mocked):
     MarvinDryRun(config=mocked_conf, messages=messages)
     test_dryrun = MarvinDryRun(config=mocked_conf, messages=messages)
     test_dryrun.execute(clazz=clazz, params=None, profiling_enabled=False)
+
+
+def test_get_artifacts_options():
+    metadata = {'artifactsOptions': {'dataset': {'mmap': True}}}
+
+    assert get_artifacts_options(mocked_conf, metadata) == {'dataset': {'mmap': True}}
+
+    config = dict(mocked_conf, artifacts_compression='lz4', artifacts_compression_level='1')
+    metadata['artifactsOptions']['default'] = {'compressionLevel': 9}
+
+    assert get_artifacts_options(config, metadata) == {
+        'default': {'compression': 'lz4', 'compressionLevel': 9},
+        'dataset': {'mmap': True}
+    }
+
+    config = dict(mocked_conf, artifacts_write_behind='true')
+
+    assert get_artifacts_options(config, {}) == {'default': {'writeBehind': True}}
+
+
+@mock.patch('marvin_python_daemon.management.engine.configure_hot_path_logging')
+def test_configure_serving_logging(configure_mocked):
+    configure_serving_logging(mocked_conf)
+    configure_mocked.assert_called_with(sample_rate=None, use_queue=False)
+
+    configure_serving_logging(dict(mocked_conf, log_sample_rate='0.01', log_queue='true'))
+    configure_mocked.assert_called_with(sample_rate='0.01', use_queue=True)
+
+
+@mock.patch('marvin_python_daemon.management.engine.residency_manager')
+def test_configure_artifacts_residency(residency_manager_mocked):
+    configure_artifacts_residency(mocked_conf)
+    residency_manager_mocked.configure.assert_not_called()
+
+    configure_artifacts_residency(dict(mocked_conf, artifacts_memory_budget='2G'))
+    residency_manager_mocked.configure.assert_called_once_with(budget_bytes=2 << 30)
+
+
+@mock.patch('marvin_python_daemon.management.engine.read_file')
+def test_get_warmup_messages(read_file_mocked):
+    read_file_mocked.return_value = [{"k": 1}]
+
+    assert get_warmup_messages('predictor', {}) is None
+    assert get_warmup_messages('predictor', {"reloadWarmup": True}) == [{"k": 1}]
+    read_file_mocked.assert_called_with('engine.messages')
+
+    get_warmup_messages('feedback', {"reloadWarmup": True})
+    read_file_mocked.assert_called_with('feedback.messages')
+
+
+@mock.patch('marvin_python_daemon.management.engine.read_file')
+def test_get_startup_warmup(read_file_mocked):
+    read_file_mocked.return_value = [{"k": 1}]
+
+    assert get_startup_warmup('predictor', {}) == (None, None)
+    assert get_startup_warmup('predictor', {"startupWarmup": 3}) == (3, [{"k": 1}])
+    read_file_mocked.assert_called_with('engine.messages')
+    assert get_startup_warmup('predictor', {"startupWarmup": {"messages": [{"k": 2}]}}) == (1, [{"k": 2}])
+
+
+def test_get_startup_retries():
+    assert get_startup_retries({"startupWarmup": 3}) == (None, None)
+    assert get_startup_retries({"startupWarmup": {"retries": 5, "failOpen": False}}) == (5, False)
+
+
+def test_artifacts_loader():
+    class Trainer(object):
+        retrieve_obj = mock.MagicMock(side_effect=lambda path: path.upper())
+
+        def _serializer_load(self, object_file_path):
+            pass
+
+    class MetricsEvaluator(Trainer):
+        pass
+
+    loader = ArtifactsLoader(max_workers=2)
+
+    with mock.patch.dict(os.environ, {'MARVIN_DATA_PATH': '/tmp/data'}):
+        trainer_kwargs = generate_kwargs('marvin_test_engine', Trainer, artifacts_loader=loader)
+        evaluator_kwargs = generate_kwargs('marvin_test_engine', MetricsEvaluator, artifacts_loader=loader)
+
+    assert evaluator_kwargs['dataset'] is trainer_kwargs['dataset']
+
+    evaluator_kwargs = loader.resolve(evaluator_kwargs)
+    loader.shutdown()
+
+    assert evaluator_kwargs['dataset'] == '/TMP/DATA/.ARTIFACTS/TEST/DATASET'
+    assert evaluator_kwargs['model'] == '/TMP/DATA/.ARTIFACTS/TEST/MODEL'
+    assert Trainer.retrieve_obj.call_count == 2
+
+
+def test_generate_kwargs_without_loader():
+    class Trainer(object):
+        retrieve_obj = mock.MagicMock(side_effect=IOError('not found'))
+
+        def _serializer_load(self, object_file_path):
+            pass
+
+    with mock.patch.dict(os.environ, {'MARVIN_DATA_PATH': '/tmp/data'}):
+        with pytest.raises(IOError):
+            generate_kwargs('marvin_test_engine', Trainer)
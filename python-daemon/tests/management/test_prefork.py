@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+# Copyright [2020] [Apache Software Foundation]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import json
+import time
+import socket
+import signal
+import functools
+
+import grpc
+import pytest
+
+from marvin_python_daemon.engine_base import EngineBaseOnlineAction
+from marvin_python_daemon.engine_base.stubs.actions_pb2 import OnlineActionRequest
+from marvin_python_daemon.engine_base.stubs.actions_pb2_grpc import OnlineActionHandlerStub
+from marvin_python_daemon.management.prefork import PreforkServer, REUSE_PORT_OPTIONS
+
+
+class PidAction(EngineBaseOnlineAction):
+    def execute(self, input_message, params, **kwargs):
+        return {"pid": os.getpid()}
+
+
+def prepare_pid_server(port):
+    # runs in the worker processes
+    return PidAction()._prepare_remote_server(port=port, workers=1, rpc_workers=None, options=REUSE_PORT_OPTIONS)
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('localhost', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def served_pids(port, calls=30):
+    pids = set()
+    for _ in range(calls):
+        # a connection per call, so the kernel balances them between the workers
+        with grpc.insecure_channel('localhost:{}'.format(port)) as channel:
+            response = OnlineActionHandlerStub(channel)._remote_execute(OnlineActionRequest(), timeout=30,
+                                                                          wait_for_ready=True)
+            pids.add(json.loads(response.message)["pid"])
+    return pids
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.1)
+    return condition()
+
+
+def test_prefork_server():
+    port = free_port()
+    server = PreforkServer(functools.partial(prepare_pid_server, port), processes=3, name='predictor',
+                           restart_delay=0)
+
+    server.start()
+    try:
+        workers = set(server.pids)
+        assert len(workers) == 3 and os.getpid() not in workers
+        assert wait_for(lambda: len(served_pids(port)) > 1)
+        assert served_pids(port) <= workers
+
+        # a worker that dies is replaced
+        os.kill(server.pids[0], signal.SIGKILL)
+        assert wait_for(lambda: server.restarts == 1)
+        assert len(set(server.pids) - workers) == 1
+        assert served_pids(port) <= set(server.pids)
+    finally:
+        processes = list(server._workers.values())
+        server.stop(0)
+
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_prefork_server_invalid_processes():
+    with pytest.raises(ValueError):
+        PreforkServer(lambda: None, processes=0)
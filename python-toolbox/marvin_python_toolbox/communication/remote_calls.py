@@ -60,18 +60,28 @@ class RemoteCalls:
         else:
             logger.info("{} stopped!".format(name))
 
-    def run_dryrun(self, actions, profiling):
+    def run_dryrun(self, actions, profiling, memoize=False):
         parameters = {
             'action': actions,
-            'profiling': str(profiling)
+            'profiling': str(profiling),
+            'memoize': str(memoize)
         }
 
         self.call_command('DRYRUN', parameters)
 
-    def run_grpc(self, actions, max_workers, max_rpc_workers):
+    def run_grpc(self, actions, max_workers, max_rpc_workers, memoize=False, aio=False, processes=None):
         parameters = {
-            'action': actions
+            'action': actions,
+            'memoize': str(memoize),
+            'aio': str(aio)
         }
+        if max_workers:
+            parameters['max_workers'] = str(max_workers)
+        if max_rpc_workers:
+            parameters['max_rpc_workers'] = str(max_rpc_workers)
+        if processes:
+            parameters['processes'] = str(processes)
+
         self.call_command('GRPC', parameters)
 
     def stop_grpc(self):
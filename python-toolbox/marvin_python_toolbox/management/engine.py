@@ -220,13 +220,14 @@ def import_project(file, dest):
     type=click.Choice(['all', 'acquisitor', 'tpreparator', 'trainer', 'evaluator', 'ppreparator', 'predictor', 'feedback']),
     help='Marvin engine action name')
 @click.option('--profiling', '-p', default=False, is_flag=True, help='Deterministic profiling of user code.')
+@click.option('--memoize', '-m', default=False, is_flag=True, help='Skip the batch actions whose code, params and input artifacts did not change.')
 @click.pass_context
-def dryrun(ctx, grpchost, grpcport, action, profiling):
+def dryrun(ctx, grpchost, grpcport, action, profiling, memoize):
     if not grpchost:
         grpchost = 'localhost'
 
     rc = RemoteCalls(grpchost, grpcport)
-    rc.run_dryrun(action, profiling)
+    rc.run_dryrun(action, profiling, memoize)
 
 def grpc_port_forwarding(engine_name, grpchost):
     ports = [
@@ -251,13 +252,16 @@ def grpc_port_forwarding(engine_name, grpchost):
     help='Marvin engine action name')
 @click.option('--max-workers', '-w', help='Max Workers', default=None)
 @click.option('--max-rpc-workers', '-rw', help='Max gRPC Workers', default=None)
+@click.option('--memoize', '-m', default=False, is_flag=True, help='Skip the batch actions whose code, params and input artifacts did not change.')
+@click.option('--aio', default=False, is_flag=True, help='Serve the online actions with the asyncio gRPC server.')
+@click.option('--processes', '-np', help='Worker processes per action, sharing its port. Their artifacts are not reloaded.', default=None, type=int)
 @click.pass_context
-def grpc(ctx, grpchost, grpcport, action, max_workers, max_rpc_workers):
+def grpc(ctx, grpchost, grpcport, action, max_workers, max_rpc_workers, memoize, aio, processes):
     if not grpchost:
         grpchost = 'localhost'
 
     rc = RemoteCalls(grpchost, grpcport)
-    rc.run_grpc(action, max_workers, max_rpc_workers)
+    rc.run_grpc(action, max_workers, max_rpc_workers, memoize, aio, processes)
     grpc_port_forwarding(ctx.obj['engine_name'], ctx.obj['default_host'])
     rc.stop_grpc()
     logger.info("gRPC server terminated!")
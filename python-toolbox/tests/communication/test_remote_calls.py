@@ -57,6 +57,20 @@ def test_run_grpc(call_mocked):
     rc.run_grpc('all', None, None)
     call_mocked.assert_called()
 
+@mock.patch('marvin_python_toolbox.communication.remote_calls.RemoteCalls.call_command')
+def test_run_grpc_aio(call_mocked):
+    rc = RemoteCalls()
+    rc.run_grpc('predictor', 4, None, aio=True)
+    call_mocked.assert_called_with('GRPC', {'action': 'predictor', 'memoize': 'False', 'aio': 'True',
+                                            'max_workers': '4'})
+
+@mock.patch('marvin_python_toolbox.communication.remote_calls.RemoteCalls.call_command')
+def test_run_grpc_processes(call_mocked):
+    rc = RemoteCalls()
+    rc.run_grpc('predictor', None, None, processes=16)
+    call_mocked.assert_called_with('GRPC', {'action': 'predictor', 'memoize': 'False', 'aio': 'False',
+                                            'processes': '16'})
+
 @mock.patch('marvin_python_toolbox.communication.remote_calls.RemoteCalls.stop_command')
 def test_stop_grpc(stop_mocked):
     rc = RemoteCalls()